@@ -0,0 +1,56 @@
+"""
+Compare request latency and payload size of the JSON and binary risk endpoints.
+
+Runs in-process against the FastAPI app (no network):
+    python -m benchmarks.bench_api_payloads --sizes 1000 100000
+"""
+import argparse
+import io
+import time
+import numpy as np
+from fastapi.testclient import TestClient
+from src.api.main import app
+
+
+def _payloads(n: int, rng: np.random.Generator) -> dict:
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    signals = rng.integers(-1, 2, n).astype(np.float64)
+    npy = io.BytesIO()
+    np.save(npy, np.stack([prices, signals]))
+    return {
+        'json': dict(url='/risk', json={'prices': prices.tolist(), 'signals': signals.astype(int).tolist()}),
+        'npy': dict(url='/risk/bulk', content=npy.getvalue(), headers={'Content-Type': 'application/x-npy'}),
+        'npy->binary': dict(url='/risk/bulk?format=binary', content=npy.getvalue(), headers={'Content-Type': 'application/x-npy'}),
+        'npy->json(2k pts)': dict(url='/risk/bulk?max_points=2000', content=npy.getvalue(), headers={'Content-Type': 'application/x-npy'}),
+    }
+
+
+def _request_size(kwargs: dict) -> int:
+    if 'json' in kwargs:
+        import json
+        return len(json.dumps(kwargs['json']))
+    return len(kwargs['content'])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    client = TestClient(app)
+    rng = np.random.default_rng(0)
+    print(f"{'points':>10} {'path':<20} {'req bytes':>12} {'resp bytes':>12} {'median ms':>10}")
+    for n in args.sizes:
+        for name, kwargs in _payloads(n, rng).items():
+            url = kwargs.pop('url')
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                resp = client.post(url, **kwargs)
+                timings.append(time.perf_counter() - t0)
+                resp.raise_for_status()
+            print(f"{n:>10} {name:<20} {_request_size(kwargs):>12} {len(resp.content):>12} {1e3 * np.median(timings):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
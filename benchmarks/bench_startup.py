@@ -0,0 +1,108 @@
+"""
+Cold-start time of the API, measured in fresh interpreter processes.
+
+Each run starts a new Python process that imports ``src.api.main``, runs the app's startup
+(lifespan, including any ``RISK_API_WARMUP`` targets) and answers one ``/health`` and one small
+``/risk`` request. Reports the median of each phase and the heavy backends that got imported:
+
+    python -m benchmarks.bench_startup --repeat 5 --update            # record the baseline
+    python -m benchmarks.bench_startup --repeat 5 --max-ratio 1.3     # exit 1 above 1.3x the baseline
+    RISK_API_WARMUP=backtest python -m benchmarks.bench_startup
+
+The gate is on the time until the replica could answer ``/health`` (import + startup). The
+budget is relative to the ready time stored under 'startup' in ``benchmarks/baselines.json``,
+scaled by the same machine calibration as the benchmark suite, since absolute startup times
+differ widely between machines. ``--max-seconds`` sets an absolute budget instead.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from benchmarks import suite
+from src.api.service import HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from src.api import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client_ready = time.perf_counter()
+with TestClient(main.app) as client:
+    client.get('/health').raise_for_status()
+    ready = time.perf_counter()
+    client.post('/risk', json={'prices': [100.0, 101.0, 99.5, 102.0], 'signals': [1, 1, -1, 0]}).raise_for_status()
+    first_risk = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'startup_seconds': ready - client_ready,
+    'first_risk_seconds': first_risk - ready,
+    'heavy_modules': sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+
+def measure(env: Optional[Dict[str, str]] = None) -> Dict[str, object]:
+    """
+    Start the API once in a fresh process.
+    Args:
+        env (Dict[str, str], optional): Extra environment variables (e.g. RISK_API_WARMUP).
+    Returns:
+        Dict[str, object]: 'process_seconds' (interpreter start to exit), 'import_seconds',
+            'startup_seconds', 'first_risk_seconds', 'ready_seconds' (import + startup) and 'heavy_modules'.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', _PROBE % (HEAVY_MODULES,)], cwd=ROOT, capture_output=True,
+                          text=True, env=dict(os.environ, **(env or {})), check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['process_seconds'] = time.perf_counter() - start
+    result['ready_seconds'] = result['import_seconds'] + result['startup_seconds']
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ratio', type=float, default=None,
+                        help='Fail if the median ready time exceeds this multiple of the (calibrated) baseline.')
+    parser.add_argument('--max-seconds', type=float, default=None, help='Fail if the median ready time exceeds this.')
+    parser.add_argument('--baseline', default=suite.BASELINE_PATH)
+    parser.add_argument('--update', action='store_true', help='Store the median ready time as the baseline.')
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.repeat)]
+    for phase in ('import_seconds', 'startup_seconds', 'ready_seconds', 'first_risk_seconds', 'process_seconds'):
+        values = [r[phase] for r in runs]
+        print(f"{phase:<20} median {np.median(values):.3f}s  min {min(values):.3f}s  max {max(values):.3f}s")
+    heavy = sorted({m for r in runs for m in r['heavy_modules']})
+    print(f"heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    ready = float(np.median([r['ready_seconds'] for r in runs]))
+    stored = suite.load_baseline(args.baseline)
+    if args.update:
+        stored['startup'] = {'ready_seconds': ready, 'calibration_seconds': suite.calibrate()}
+        with open(args.baseline, 'w') as f:
+            json.dump(stored, f, indent=2)
+            f.write('\n')
+        print(f"Startup baseline written to {args.baseline}")
+        return 0
+    budget = args.max_seconds
+    if args.max_ratio is not None:
+        base = stored.get('startup')
+        if base is None:
+            print("No startup baseline; record one with --update.", file=sys.stderr)
+            return 1
+        budget = base['ready_seconds'] * suite.calibrate() / base['calibration_seconds'] * args.max_ratio
+    if budget is not None and ready > budget:
+        print(f"REGRESSION ready in {ready:.3f}s, budget {budget:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
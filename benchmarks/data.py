@@ -0,0 +1,51 @@
+"""
+Synthetic, offline data generators for the benchmark suite.
+
+Every generator is seeded, so a given scale always produces the same inputs.
+"""
+import numpy as np
+import pandas as pd
+
+# Series length and universe size per scale
+POINTS = {'small': 1_000, 'medium': 100_000, 'large': 10_000_000}
+ASSETS = {'small': 10, 'medium': 1_000, 'large': 10_000}
+
+
+def price_series(n: int, seed: int = 0) -> np.ndarray:
+    """Geometric random-walk prices of length n."""
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, n)))
+
+
+def signal_series(n: int, seed: int = 1, hold: int = 5) -> np.ndarray:
+    """Long/flat/short signals that change every ``hold`` periods on average."""
+    rng = np.random.default_rng(seed)
+    changes = rng.random(n) < 1 / hold
+    levels = rng.integers(-1, 2, n)
+    return levels[np.maximum.accumulate(np.where(changes, np.arange(n), 0))]
+
+
+def heavy_tailed_returns(n: int, seed: int = 2, df: float = 4.0) -> np.ndarray:
+    """Student-t daily returns (for tail models)."""
+    return np.random.default_rng(seed).standard_t(df, n) * 0.01
+
+
+def price_frame(n_dates: int, n_assets: int, n_factors: int = 5, seed: int = 3) -> pd.DataFrame:
+    """Business-day price panel (Date x Asset) driven by a few common factors."""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.008, (n_dates, n_factors))
+    loadings = rng.normal(0.5, 0.3, (n_assets, n_factors)).astype(np.float64)
+    returns = factors @ loadings.T + rng.normal(0, 0.01, (n_dates, n_assets))
+    index = pd.bdate_range('2000-01-03', periods=n_dates)
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index,
+                        columns=[f'A{i:05d}' for i in range(n_assets)])
+
+
+def weight_frame(prices: pd.DataFrame, rebalance: int = 21, seed: int = 4) -> pd.DataFrame:
+    """Long-short weights (summing to one in gross terms) rebalanced every ``rebalance`` rows."""
+    rng = np.random.default_rng(seed)
+    n_dates, n_assets = prices.shape
+    raw = np.full((n_dates, n_assets), np.nan)
+    raw[::rebalance] = rng.normal(0, 1, (len(range(0, n_dates, rebalance)), n_assets))
+    weights = pd.DataFrame(raw, index=prices.index, columns=prices.columns).ffill()
+    return weights.div(weights.abs().sum(axis=1), axis=0)
@@ -0,0 +1,259 @@
+"""
+Benchmark suite and regression gate for the backtesting, feature, model and API hot paths.
+
+Each case runs on seeded synthetic data (see ``benchmarks.data``) at one or more scales,
+is timed over several repeats and memory-profiled with tracemalloc in a separate run, and
+is compared with the stored baselines. Everything runs offline and in-process:
+
+    python -m benchmarks.suite --scale small            # compare with baselines, exit 1 on regression
+    python -m benchmarks.suite --scale small medium large --rounds 3 --update   # record new baselines
+    python -m benchmarks.suite --only backtest --threshold 0.5
+
+The gate compares median times over the repeats, not the best one. Each case also has a
+relative noise floor (``CASES``) added to the threshold: run-to-run spread of the median on
+an idle machine, which is large for the scipy optimizer in ``tail_risk_fit`` and the HTTP
+stack in ``risk_endpoint``. Baselines are recorded as the median over ``--rounds`` separate
+measurements.
+
+Baselines record the machine they were measured on together with a short calibration
+workload timed there. The gate scales every baseline time by how much slower or faster the
+calibration runs on the current machine, so it compares speed relative to the machine rather
+than raw seconds. Re-record on the CI runner class anyway when possible, since the scaling
+ratio is only an approximation across different hardware.
+
+The ``large`` tier is recorded for every case except ``fractal_dimension`` (100k points take
+minutes per call with its rolling Python apply) and ``backtest_engine_weights`` (10k assets
+peak above 1 GiB of traced memory). Run those two explicitly with ``--only`` on a bigger machine.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from benchmarks import data
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+# Timing differences below this many seconds are treated as noise
+MIN_DELTA_SECONDS = 0.002
+# Cases whose large tier is not part of the stored baselines (see the module docstring)
+SKIP_LARGE = ('fractal_dimension', 'backtest_engine_weights')
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Best time of a fixed NumPy/pandas/Python workload; used to compare machine speed."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=1_000_000)
+    frame = pd.DataFrame(rng.normal(size=(100_000, 4)))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        np.sort(values)
+        np.cumprod(1 + values * 1e-3)
+        frame.rolling(21).std()
+        sum(i * i for i in range(200_000))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _backtest_engine_run(n: int) -> Callable[[], Any]:
+    from src.backtesting.engine import BacktestEngine
+    prices = pd.DataFrame({'A': data.price_series(n)})
+    signals = pd.Series(data.signal_series(n))
+    return lambda: BacktestEngine().run(prices, signals)
+
+
+def _backtest_engine_weights(n_assets: int) -> Callable[[], Any]:
+    from src.backtesting.engine import BacktestEngine
+    prices = data.price_frame(2_520, n_assets)
+    weights = data.weight_frame(prices)
+    return lambda: BacktestEngine().run(prices, weights)
+
+
+def _fractal_dimension(n: int) -> Callable[[], Any]:
+    from src.features.fractal_hurst import fractal_dimension
+    series = pd.Series(data.price_series(n))
+    return lambda: fractal_dimension(series)
+
+
+def _tail_risk_fit(n: int) -> Callable[[], Any]:
+    from src.models.tail_risk_model import TailRiskModel
+    returns = data.heavy_tailed_returns(n)
+    return lambda: TailRiskModel().fit(returns)
+
+
+def _risk_endpoint(n: int) -> Callable[[], Any]:
+    from fastapi.testclient import TestClient
+    from src.api import main
+    from src.api.cache import ResultCache
+    # No result cache, so every repeat measures the full request path; the app's own cache
+    # is swapped out only for the duration of each call
+    uncached = ResultCache(max_entries=0)
+    client = TestClient(main.app)
+    payload = {'prices': data.price_series(n).tolist(), 'signals': data.signal_series(n).tolist()}
+
+    def call():
+        saved, main.cache = main.cache, uncached
+        try:
+            resp = client.post('/risk', json=payload)
+            resp.raise_for_status()
+        finally:
+            main.cache = saved
+        return resp
+    return call
+
+
+# name -> (setup(size) returning the timed callable, size per scale, relative noise floor)
+CASES: Dict[str, tuple] = {
+    'backtest_engine_run': (_backtest_engine_run, data.POINTS, 0.15),
+    'backtest_engine_weights': (_backtest_engine_weights, data.ASSETS, 0.15),
+    # Rolling Python apply: two orders of magnitude slower per point, so smaller sizes
+    'fractal_dimension': (_fractal_dimension, {'small': 1_000, 'medium': 10_000, 'large': 100_000}, 0.25),
+    # genpareto.fit runs a Nelder-Mead search; its median moves by more than 2x between idle runs
+    'tail_risk_fit': (_tail_risk_fit, data.POINTS, 1.0),
+    # JSON request bodies grow ~20 bytes per point
+    'risk_endpoint': (_risk_endpoint, {'small': 1_000, 'medium': 100_000, 'large': 1_000_000}, 0.5),
+}
+
+
+def run_case(name: str, scale: str, repeat: int = 5, profile_memory: bool = True, budget: float = 10.0) -> Dict[str, float]:
+    """
+    Time one case at one scale and measure its peak traced allocation.
+    Args:
+        name (str): Case name in ``CASES``.
+        scale (str): 'small', 'medium' or 'large'.
+        repeat (int): Timed repetitions (after one warm-up call).
+        profile_memory (bool): Also run once under tracemalloc.
+        budget (float): Stop repeating once this many seconds were spent (at least two repeats).
+    Returns:
+        Dict[str, float]: 'size', 'seconds' (best), 'median_seconds' and 'peak_mb'.
+    """
+    setup, sizes, _ = CASES[name]
+    size = sizes[scale]
+    func = setup(size)
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        if len(timings) >= 2 and sum(timings) > budget:
+            break
+    result = {'size': size, 'seconds': min(timings), 'median_seconds': float(np.median(timings))}
+    if profile_memory:
+        # Traced separately: tracemalloc slows allocation-heavy code and would skew the timings
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['peak_mb'] = peak / 2 ** 20
+    return result
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = 0.25, memory_threshold: float = 0.25, speed_ratio: float = 1.0) -> List[str]:
+    """
+    Regressions of ``results`` against ``baseline`` (keys 'name[scale]').
+    Args:
+        results (Dict): Current measurements.
+        baseline (Dict): Stored measurements.
+        threshold (float): Allowed relative slowdown of the median time, on top of the case's noise floor.
+        memory_threshold (float): Allowed relative growth of peak traced memory.
+        speed_ratio (float): Calibration time on this machine over the baseline machine's;
+            baseline times are scaled by it before comparing.
+    Returns:
+        List[str]: One message per regression (empty when the gate passes).
+    """
+    failures = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        allowed = threshold + CASES.get(key.split('[')[0], (None, None, 0.0))[2]
+        expected = base['median_seconds'] * speed_ratio
+        slower = current['median_seconds'] - expected
+        if current['median_seconds'] > expected * (1 + allowed) and slower > MIN_DELTA_SECONDS:
+            failures.append(f"{key}: median {current['median_seconds']:.4f}s vs scaled baseline {expected:.4f}s "
+                            f"(+{slower / expected:.0%}, allowed {allowed:.0%})")
+        if 'peak_mb' in current and 'peak_mb' in base and current['peak_mb'] > base['peak_mb'] * (1 + memory_threshold) + 0.1:
+            failures.append(f"{key}: peak {current['peak_mb']:.1f} MiB vs baseline {base['peak_mb']:.1f} MiB "
+                            f"(threshold {memory_threshold:.0%})")
+    return failures
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {'results': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], calibration: float, path: str = BASELINE_PATH) -> None:
+    """Merge ``results`` into the baseline file, recording the machine and calibration time they were measured with."""
+    stored = load_baseline(path)
+    stored['machine'] = {'python': platform.python_version(), 'platform': platform.platform(),
+                         'processor': platform.processor() or platform.machine(), 'cpu_count': os.cpu_count(),
+                         'numpy': np.__version__, 'pandas': pd.__version__, 'calibration_seconds': calibration}
+    stored.setdefault('results', {}).update(results)
+    stored['results'] = dict(sorted(stored['results'].items()))
+    with open(path, 'w') as f:
+        json.dump(stored, f, indent=2)
+        f.write('\n')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', nargs='+', default=['small'], choices=['small', 'medium', 'large'])
+    parser.add_argument('--only', nargs='+', default=['*'], help='Case name patterns (fnmatch).')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rounds', type=int, default=1,
+                        help='Separate measurements per case; the median of their medians is kept (use 3+ with --update).')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown.')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='Allowed relative peak memory growth.')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update', action='store_true', help='Write the measurements as the new baseline.')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run.')
+    args = parser.parse_args(argv)
+
+    names = [n for n in CASES if any(fnmatch.fnmatch(n, p) or p in n for p in args.only)]
+    stored = load_baseline(args.baseline)
+    baseline = stored['results']
+    calibration = calibrate()
+    reference = stored.get('machine', {}).get('calibration_seconds')
+    speed_ratio = calibration / reference if reference else 1.0
+    print(f"calibration {calibration:.4f}s (baseline machine {reference or float('nan'):.4f}s, ratio {speed_ratio:.2f})")
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<36} {'size':>10} {'best s':>10} {'median s':>10} {'peak MiB':>10} {'baseline med':>13}")
+    for scale in args.scale:
+        for name in names:
+            if scale == 'large' and name in SKIP_LARGE and args.only == ['*']:
+                print(f"{name}[large]: skipped (see SKIP_LARGE; select it with --only)")
+                continue
+            key = f'{name}[{scale}]'
+            rounds = [run_case(name, scale, repeat=args.repeat, profile_memory=not args.no_memory and i == 0)
+                      for i in range(max(args.rounds, 1))]
+            result = dict(rounds[0], seconds=min(r['seconds'] for r in rounds),
+                          median_seconds=float(np.median([r['median_seconds'] for r in rounds])))
+            results[key] = result
+            base = baseline.get(key, {}).get('median_seconds')
+            print(f"{key:<36} {result['size']:>10} {result['seconds']:>10.4f} {result['median_seconds']:>10.4f} "
+                  f"{result.get('peak_mb', float('nan')):>10.1f} {base if base is not None else float('nan'):>13.4f}")
+    if args.update:
+        save_baseline(results, calibration, args.baseline)
+        print(f"Baselines written to {args.baseline}")
+        return 0
+    failures = compare(results, baseline, args.threshold, args.memory_threshold, speed_ratio)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
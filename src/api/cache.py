@@ -0,0 +1,215 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from src.backtesting.incremental import IncrementalBacktest
+from src.data.hashing import fingerprint
+
+HEAD_POINTS = 64
+
+
+class ResultCache:
+    """
+    Content-addressed cache for ``/risk`` and ``/backtest`` results.
+
+    Entries are keyed by a hash of the price/signal arrays and the engine parameters and
+    hold the result plus the backtest's terminal ``IncrementalBacktest`` state. The
+    in-process tier is an LRU bounded by entry count, total bytes and a TTL; an optional
+    directory adds a local on-disk tier, also bounded by entry count and bytes, with files
+    evicted least recently used first (by modification time, refreshed on every disk hit). Series of at least ``HEAD_POINTS`` points are also
+    indexed by their head, so a request that extends a cached series can resume from
+    its terminal state instead of recomputing the whole history.
+    """
+    def __init__(self, max_entries: int = 512, max_bytes: int = 256 * 2 ** 20, ttl: float = 300.0,
+                 cache_dir: Optional[str] = None, max_prefix_candidates: int = 8,
+                 max_disk_entries: int = 4096, max_disk_bytes: int = 2 ** 30):
+        """
+        Args:
+            max_entries (int): Maximum in-memory entries.
+            max_bytes (int): Maximum total size of cached curves in memory.
+            ttl (float): Entry lifetime in seconds (0 disables expiry).
+            cache_dir (str, optional): Directory for the on-disk tier.
+            max_prefix_candidates (int): Cached series checked per prefix lookup.
+            max_disk_entries (int): Maximum files in the on-disk tier.
+            max_disk_bytes (int): Maximum total size of the on-disk tier.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.max_prefix_candidates = max_prefix_candidates
+        self.stats = {'hits': 0, 'misses': 0, 'prefix_hits': 0, 'disk_hits': 0, 'evictions': 0}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._heads: Dict[str, "OrderedDict[str, int]"] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        """
+        Build from RISK_API_CACHE_SIZE, RISK_API_CACHE_BYTES, RISK_API_CACHE_TTL, RISK_API_CACHE_DIR,
+        RISK_API_CACHE_DISK_SIZE and RISK_API_CACHE_DISK_BYTES.
+        """
+        return cls(
+            max_entries=int(os.getenv("RISK_API_CACHE_SIZE", "512")),
+            max_bytes=int(os.getenv("RISK_API_CACHE_BYTES", str(256 * 2 ** 20))),
+            ttl=float(os.getenv("RISK_API_CACHE_TTL", "300")),
+            cache_dir=os.getenv("RISK_API_CACHE_DIR") or None,
+            max_disk_entries=int(os.getenv("RISK_API_CACHE_DISK_SIZE", "4096")),
+            max_disk_bytes=int(os.getenv("RISK_API_CACHE_DISK_BYTES", str(2 ** 30))),
+        )
+
+    @staticmethod
+    def key(prices: np.ndarray, signals: np.ndarray, params: Tuple) -> str:
+        """Content hash of the inputs and engine parameters."""
+        return fingerprint(np.asarray(prices, dtype=np.float64), np.asarray(signals, dtype=np.float64), params)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry ('result', 'state') for ``key`` or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry
+        entry = self._load(key)
+        with self._lock:
+            if entry is not None:
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                self._insert(key, entry)
+            else:
+                self.stats['misses'] += 1
+        return entry
+
+    def find_prefix(self, prices: np.ndarray, signals: np.ndarray, params: Tuple) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Find the longest cached series that is a strict prefix of ``prices``/``signals``.
+        Returns:
+            Optional[Tuple[int, Dict[str, Any]]]: (prefix length, entry) or None.
+        """
+        n = len(prices)
+        if n <= HEAD_POINTS:
+            return None
+        head = self.key(prices[:HEAD_POINTS], signals[:HEAD_POINTS], params)
+        with self._lock:
+            candidates = sorted(self._heads.get(head, {}).items(), key=lambda kv: -kv[1])
+        checked = 0
+        for key, length in candidates:
+            if length >= n:
+                continue
+            if checked >= self.max_prefix_candidates:
+                break
+            checked += 1
+            if self.key(prices[:length], signals[:length], params) != key:
+                continue
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or self._expired(entry):
+                    continue
+                self._entries.move_to_end(key)
+                self.stats['prefix_hits'] += 1
+            return length, entry
+        return None
+
+    def put(self, key: str, prices: np.ndarray, signals: np.ndarray, params: Tuple,
+            result: Dict[str, Any], state: IncrementalBacktest) -> None:
+        """Store a result and its terminal state under ``key``."""
+        entry = {'result': result, 'state': state, 'created': time.time(), 'length': len(prices)}
+        if len(prices) >= HEAD_POINTS:
+            entry['head'] = self.key(prices[:HEAD_POINTS], signals[:HEAD_POINTS], params)
+        with self._lock:
+            self._insert(key, entry)
+        self._save(key, entry)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._heads.clear()
+            self._bytes = 0
+
+    def _insert(self, key: str, entry: Dict[str, Any]) -> None:
+        if key in self._entries:
+            self._drop(key)
+        entry['nbytes'] = sum(v.nbytes for v in entry['result'].values() if isinstance(v, np.ndarray))
+        self._entries[key] = entry
+        self._bytes += entry['nbytes']
+        if 'head' in entry:
+            self._heads.setdefault(entry['head'], OrderedDict())[key] = entry['length']
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.stats['evictions'] += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry['nbytes']
+        head = entry.get('head')
+        if head in self._heads:
+            self._heads[head].pop(key, None)
+            if not self._heads[head]:
+                del self._heads[head]
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return bool(self.ttl) and time.time() - entry['created'] > self.ttl
+
+    def _save(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        tmp = os.path.join(self.cache_dir, f'{key}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump({k: v for k, v in entry.items() if k != 'nbytes'}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(self.cache_dir, f'{key}.pkl'))
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        count, total = len(files), sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if count <= self.max_disk_entries and total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            count, total = count - 1, total - size
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f'{key}.pkl')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if self._expired(entry):
+            os.remove(path)
+            return None
+        os.utime(path)
+        return entry
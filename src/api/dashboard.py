@@ -1,3 +1,5 @@
+import hashlib
+import io
 import streamlit as st
 import pandas as pd
 import requests
@@ -7,72 +9,104 @@ st.set_page_config(page_title="Portfolio Risk Dashboard", layout="wide")
 st.title("Portfolio Risk Assessment Dashboard")
 
 API_URL = "http://api:8000"
+# Points requested for the overview chart and for each zoomed segment
+MAX_POINTS = 2000
+
+def parse_values(text, dtype):
+    """Parse comma- or newline-separated numbers with NumPy's C text reader (blank entries are skipped)."""
+    return np.loadtxt(io.StringIO(text.replace(",", "\n")), dtype=dtype, ndmin=1)
 
 def get_data(key=None):
     st.write("### Upload CSV or Enter Data Manually")
     uploaded = st.file_uploader("Upload CSV with columns 'price' and 'signal'", type=["csv"], key=key)
     if uploaded:
-        df = pd.read_csv(uploaded)
-        if 'price' in df.columns and 'signal' in df.columns:
-            return df['price'].tolist(), df['signal'].tolist()
-        else:
+        try:
+            df = pd.read_csv(uploaded, usecols=['price', 'signal'], dtype={'price': np.float64, 'signal': np.float64}, engine='c')
+        except ValueError:
             st.error("CSV must have 'price' and 'signal' columns.")
             return None, None
+        return df['price'].to_numpy(), df['signal'].to_numpy()
     else:
         prices = st.text_area("Enter prices (comma-separated)", key=f"prices_{key}")
         signals = st.text_area("Enter signals (comma-separated, e.g. 1,0,-1)", key=f"signals_{key}")
         if prices and signals:
             try:
-                price_list = [float(x) for x in prices.split(",")]
-                signal_list = [int(x) for x in signals.split(",")]
-                if len(price_list) != len(signal_list):
+                price_arr = parse_values(prices, np.float64)
+                signal_arr = parse_values(signals, np.float64)
+                if len(price_arr) != len(signal_arr):
                     st.error("Prices and signals must have the same length.")
                     return None, None
-                return price_list, signal_list
+                return price_arr, signal_arr
             except Exception as e:
                 st.error(f"Error parsing input: {e}")
                 return None, None
         return None, None
 
+def encode_payload(prices, signals):
+    """Raw float64 body (prices then signals) for the bulk endpoints, plus its content hash."""
+    body = np.concatenate([prices, signals]).astype('<f8').tobytes()
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def fetch_curve(endpoint, digest, start, end, _body):
+    """
+    Call a bulk endpoint for a downsampled (LTTB) curve, cached per input hash and range.
+    The body itself is excluded from Streamlit's hashing; ``digest`` identifies it.
+    """
+    params = {"max_points": MAX_POINTS, "downsample": "lttb"}
+    if start is not None:
+        params.update(start=start, end=end)
+    resp = requests.post(f"{API_URL}/{endpoint}/bulk", params=params, data=_body,
+                         headers={"Content-Type": "application/octet-stream"})
+    resp.raise_for_status()
+    return resp.json()
+
+def render_curve(endpoint, key, body, digest, n):
+    """Overview chart plus a drill-down range that fetches the selected segment at higher resolution."""
+    data = fetch_curve(endpoint, digest, None, None, body)
+    chart = pd.Series(data['portfolio_value'], index=data.get('portfolio_index', range(len(data['portfolio_value']))))
+    st.line_chart(chart, use_container_width=True)
+    if n > MAX_POINTS:
+        lo, hi = st.slider("Zoom (index range)", 0, n - 1, (0, n - 1), key=f"zoom_{key}")
+        if (lo, hi) != (0, n - 1):
+            segment = fetch_curve(endpoint, digest, lo, hi + 1, body)
+            st.line_chart(pd.Series(segment['portfolio_value'], index=segment['portfolio_index']), use_container_width=True)
+    return data
+
+def run_section(endpoint, key, button_label, spinner_label):
+    prices, signals = get_data(key=key)
+    if prices is None or signals is None or not len(prices):
+        return False
+    body, digest = encode_payload(prices, signals)
+    # Remember the last submitted input so widget interactions re-render from cache instead of re-posting
+    if st.button(button_label, key=f"run_{key}"):
+        st.session_state[f"submitted_{key}"] = digest
+    if st.session_state.get(f"submitted_{key}") != digest:
+        return True
+    with st.spinner(spinner_label):
+        try:
+            data = fetch_curve(endpoint, digest, None, None, body)
+        except requests.HTTPError as e:
+            st.error(f"API error: {e.response.text}")
+            return True
+        except Exception as e:
+            st.error(f"Request failed: {e}")
+            return True
+    if 'risk_score' in data:
+        st.success(f"Risk Score: {data['risk_score']:.2f}")
+    st.write(f"Max Drawdown: {data['max_drawdown']:.2%}")
+    st.write(f"Sharpe Ratio: {data['sharpe_ratio']:.2f}")
+    render_curve(endpoint, key, body, digest, len(prices))
+    return True
+
 tabs = st.tabs(["Risk Assessment", "Backtesting"])
 
 with tabs[0]:
     st.header("Risk Assessment")
-    prices, signals = get_data(key="risk")
-    if prices and signals:
-        if st.button("Run Risk Assessment"):
-            with st.spinner("Assessing risk..."):
-                try:
-                    resp = requests.post(f"{API_URL}/risk", json={"prices": prices, "signals": signals})
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        st.success(f"Risk Score: {data['risk_score']:.2f}")
-                        st.write(f"Max Drawdown: {data['max_drawdown']:.2%}")
-                        st.write(f"Sharpe Ratio: {data['sharpe_ratio']:.2f}")
-                        st.line_chart(data['portfolio_value'], use_container_width=True)
-                    else:
-                        st.error(f"API error: {resp.text}")
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
-    else:
+    if not run_section("risk", "risk", "Run Risk Assessment", "Assessing risk..."):
         st.info("Upload a CSV or enter data to assess risk.")
 
 with tabs[1]:
     st.header("Backtesting")
-    prices, signals = get_data(key="backtest")
-    if prices and signals:
-        if st.button("Run Backtest"):
-            with st.spinner("Running backtest..."):
-                try:
-                    resp = requests.post(f"{API_URL}/backtest", json={"prices": prices, "signals": signals})
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        st.write(f"Max Drawdown: {data['max_drawdown']:.2%}")
-                        st.write(f"Sharpe Ratio: {data['sharpe_ratio']:.2f}")
-                        st.line_chart(data['portfolio_value'], use_container_width=True)
-                    else:
-                        st.error(f"API error: {resp.text}")
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
-    else:
-        st.info("Upload a CSV or enter data to run a backtest.") 
\ No newline at end of file
+    if not run_section("backtest", "backtest", "Run Backtest", "Running backtest..."):
+        st.info("Upload a CSV or enter data to run a backtest.")
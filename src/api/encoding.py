@@ -0,0 +1,254 @@
+import io
+import json
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+NPY_TYPES = ('application/x-npy', 'application/npy')
+ARROW_TYPES = ('application/vnd.apache.arrow.stream', 'application/vnd.apache.arrow.file')
+RAW_TYPES = ('application/octet-stream',)
+RESPONSE_FORMATS = ('json', 'arrow', 'binary')
+
+
+class PayloadError(ValueError):
+    """Raised when a bulk payload cannot be decoded."""
+    status_code = 400
+
+
+class InvalidPayload(PayloadError):
+    """Raised for a decoded payload whose values are not valid input (empty, mismatched, non-finite)."""
+    status_code = 422
+
+
+class UnsupportedMediaType(PayloadError):
+    """Raised for payload or response types the service cannot handle."""
+    status_code = 415
+
+
+def decode_array(buf: bytes, content_type: str) -> np.ndarray:
+    """
+    Decode one numeric array from a binary buffer without copying where possible.
+    Args:
+        buf (bytes): Raw payload.
+        content_type (str): MIME type of the payload (npy, Arrow IPC or raw float64).
+    Returns:
+        np.ndarray: Decoded array (read-only view of ``buf`` for npy/raw input).
+    """
+    content_type = _base_type(content_type)
+    if content_type in NPY_TYPES:
+        return _decode_npy(buf)
+    if content_type in ARROW_TYPES:
+        table = _read_arrow(buf, content_type)
+        if not table.num_columns:
+            raise PayloadError("Arrow payload has no columns.")
+        return _arrow_column(table, 0)
+    if content_type in RAW_TYPES or not content_type:
+        return _decode_raw(buf)
+    raise UnsupportedMediaType(f"Unsupported content type: {content_type}")
+
+
+def decode_prices_signals(buf: bytes, content_type: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode a price/signal pair from a single request body.
+
+    npy bodies hold a (2, N) array or a structured array with 'price' and 'signal' fields,
+    Arrow bodies a table with 'price' and 'signal' columns, and raw bodies N float64
+    prices followed by N float64 signals.
+    Args:
+        buf (bytes): Raw request body.
+        content_type (str): MIME type of the body.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Prices and signals.
+    """
+    content_type = _base_type(content_type)
+    if content_type in ARROW_TYPES:
+        table = _read_arrow(buf, content_type)
+        names = set(table.column_names)
+        if not {'price', 'signal'} <= names:
+            raise PayloadError("Arrow payload must have 'price' and 'signal' columns.")
+        return _arrow_column(table, 'price'), _arrow_column(table, 'signal')
+    arr = decode_array(buf, content_type)
+    if arr.dtype.names:
+        if not {'price', 'signal'} <= set(arr.dtype.names):
+            raise PayloadError("Structured payload must have 'price' and 'signal' fields.")
+        return arr['price'], arr['signal']
+    if arr.ndim == 1:
+        if arr.size % 2:
+            raise PayloadError("Raw payload must contain N prices followed by N signals.")
+        arr = arr.reshape(2, -1)
+    if arr.ndim != 2 or arr.shape[0] != 2:
+        raise PayloadError("Array payload must have shape (2, N).")
+    return arr[0], arr[1]
+
+
+def negotiate_format(fmt: Optional[str], accept: Optional[str]) -> str:
+    """
+    Pick the response format from an explicit ``format`` parameter or the Accept header.
+    Args:
+        fmt (str, optional): Requested format ('json', 'arrow' or 'binary').
+        accept (str, optional): HTTP Accept header.
+    Returns:
+        str: One of ``RESPONSE_FORMATS``.
+    """
+    if fmt:
+        if fmt not in RESPONSE_FORMATS:
+            raise UnsupportedMediaType(f"format must be one of {RESPONSE_FORMATS}")
+        return fmt
+    accept = accept or ''
+    if any(t in accept for t in ARROW_TYPES):
+        return 'arrow'
+    if any(t in accept for t in RAW_TYPES):
+        return 'binary'
+    return 'json'
+
+
+def encode_result(result: Dict[str, Any], fmt: str) -> Tuple[bytes, str, Dict[str, str]]:
+    """
+    Serialize a risk/backtest result whose 'portfolio_value' (and optional 'portfolio_index')
+    are NumPy arrays.
+
+    Arrow responses carry the curve as a table and the scalar metrics as schema metadata;
+    binary responses carry the raw float64 curve with the metrics in ``X-`` headers.
+    Args:
+        result (Dict[str, Any]): Scalar metrics plus array curves.
+        fmt (str): One of ``RESPONSE_FORMATS``.
+    Returns:
+        Tuple[bytes, str, Dict[str, str]]: Body, media type and extra headers.
+    """
+    curves = {k: np.asarray(v) for k, v in result.items() if isinstance(v, (np.ndarray, list))}
+    # NaN/inf are not valid JSON: undefined metrics are sent as null
+    scalars = {k: (None if isinstance(v, float) and not np.isfinite(v) else v) for k, v in result.items() if k not in curves}
+    if fmt == 'json':
+        body = dict(scalars)
+        body.update({k: _json_list(v) for k, v in curves.items()})
+        return json.dumps(body, allow_nan=False).encode(), 'application/json', {}
+    if fmt == 'arrow':
+        pa = _pyarrow()
+        table = pa.table({k: v for k, v in curves.items()})
+        table = table.replace_schema_metadata({k: json.dumps(v, allow_nan=False) for k, v in scalars.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_TYPES[0], {}
+    headers = {f"X-{k.replace('_', '-').title()}": json.dumps(v, allow_nan=False) for k, v in scalars.items()}
+    if 'portfolio_index' in curves:
+        headers['X-Portfolio-Length'] = str(len(curves['portfolio_value']))
+        body = np.concatenate([curves['portfolio_index'].astype(np.float64), curves['portfolio_value']])
+    else:
+        body = curves['portfolio_value']
+    return np.ascontiguousarray(body, dtype='<f8').tobytes(), RAW_TYPES[0], headers
+
+
+def downsample_minmax(values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min/max decimation: keep the first, last, minimum and maximum point of each bucket.
+    Args:
+        values (np.ndarray): 1-D series.
+        max_points (int): Upper bound on the number of returned points.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Original positions and values of the kept points.
+    """
+    n = len(values)
+    if max_points <= 0 or n <= max_points:
+        return np.arange(n), values
+    n_buckets = max(1, (max_points - 2) // 2)
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    keep = [np.array([0, n - 1])]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            seg = values[lo:hi]
+            keep.append(np.array([lo + np.argmin(seg), lo + np.argmax(seg)]))
+    idx = np.unique(np.concatenate(keep))
+    return idx, values[idx]
+
+
+def downsample_lttb(values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the visually most significant point
+    of each bucket, preserving the shape of the curve better than striding.
+    Args:
+        values (np.ndarray): 1-D series (x is the position).
+        max_points (int): Number of points to return (at least 3).
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Original positions and values of the kept points.
+    """
+    n = len(values)
+    if max_points < 3 or n <= max_points:
+        return np.arange(n), values
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    idx = np.empty(max_points, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    prev = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], max(edges[b + 1], edges[b] + 1)
+        nxt_lo, nxt_hi = edges[b + 1], edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = (nxt_lo + max(nxt_hi, nxt_lo + 1) - 1) / 2.0
+        avg_y = values[nxt_lo:max(nxt_hi, nxt_lo + 1)].mean()
+        xs = np.arange(lo, hi)
+        area = np.abs((prev - avg_x) * (values[lo:hi] - values[prev]) - (prev - xs) * (avg_y - values[prev]))
+        prev = lo + int(np.argmax(area))
+        idx[b + 1] = prev
+    return idx, values[idx]
+
+
+DOWNSAMPLERS = {'minmax': downsample_minmax, 'lttb': downsample_lttb}
+
+
+def _json_list(values: np.ndarray) -> list:
+    if values.dtype.kind == 'f' and not np.isfinite(values).all():
+        return [x if np.isfinite(x) else None for x in values.tolist()]
+    return values.tolist()
+
+
+def _decode_npy(buf: bytes) -> np.ndarray:
+    stream = io.BytesIO(buf)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise PayloadError(f"Invalid npy payload: {e}")
+    if dtype.hasobject:
+        raise PayloadError("Object arrays are not accepted.")
+    count = int(np.prod(shape)) if shape else 1
+    try:
+        arr = np.frombuffer(buf, dtype=dtype, count=count, offset=stream.tell())
+    except ValueError as e:
+        raise PayloadError(f"Invalid npy payload (truncated body?): {e}")
+    return arr.reshape(shape, order='F' if fortran else 'C')
+
+
+def _decode_raw(buf: bytes) -> np.ndarray:
+    if len(buf) % 8:
+        raise PayloadError("Raw payload length must be a multiple of 8 (float64).")
+    return np.frombuffer(buf, dtype='<f8')
+
+
+def _read_arrow(buf: bytes, content_type: str):
+    pa = _pyarrow()
+    try:
+        reader = pa.ipc.open_file(buf) if content_type.endswith('.file') else pa.ipc.open_stream(buf)
+        return reader.read_all()
+    except pa.ArrowException as e:
+        raise PayloadError(f"Invalid Arrow payload: {e}")
+
+
+def _arrow_column(table, column) -> np.ndarray:
+    try:
+        return table.column(column).to_numpy()
+    except _pyarrow().ArrowException as e:
+        raise PayloadError(f"Invalid Arrow column {column!r}: {e}")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise UnsupportedMediaType("pyarrow is required for Arrow payloads.")
+    return pa
+
+
+def _base_type(content_type: Optional[str]) -> str:
+    return (content_type or '').split(';')[0].strip().lower()
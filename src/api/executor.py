@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class Saturated(Exception):
+    """Raised when the execution layer has no free queue slots (maps to HTTP 429)."""
+
+
+class JobTimeout(Exception):
+    """Raised when a job exceeds its time budget (maps to HTTP 504)."""
+
+
+class ExecutionLayer:
+    """
+    Admission control and offloading for CPU-bound API work.
+
+    Calls whose input size is at most ``inline_max_points`` run in the event loop's default
+    thread pool, so they never block the loop; larger ones go to a bounded process pool so
+    they cannot starve small requests. Both paths share the admission limit: at most
+    ``max_pending`` calls may be queued or running at once; beyond that ``run`` raises
+    ``Saturated``. Every call is bounded by ``timeout`` seconds; a timed-out call keeps its
+    slot until its thread or worker actually finishes, so runaway work still counts against
+    ``max_pending``. Long-running work can also be submitted as a background job and polled by id.
+    """
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64, inline_max_points: int = 5_000,
+                 timeout: float = 30.0, max_jobs: int = 1_000):
+        """
+        Args:
+            max_workers (int, optional): Process pool size (defaults to the CPU count).
+            max_pending (int): Maximum offloaded calls queued or running.
+            inline_max_points (int): Largest input size executed inline.
+            timeout (float): Per-request timeout in seconds for offloaded calls.
+            max_jobs (int): Finished jobs retained for polling.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.inline_max_points = inline_max_points
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> 'ExecutionLayer':
+        """Build from RISK_API_MAX_WORKERS, RISK_API_MAX_PENDING, RISK_API_INLINE_MAX_POINTS and RISK_API_TIMEOUT."""
+        workers = os.getenv("RISK_API_MAX_WORKERS")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_pending=int(os.getenv("RISK_API_MAX_PENDING", "64")),
+            inline_max_points=int(os.getenv("RISK_API_INLINE_MAX_POINTS", "5000")),
+            timeout=float(os.getenv("RISK_API_TIMEOUT", "30")),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func: Callable[..., Any], *args: Any, size: int, timeout: Optional[float] = None) -> Any:
+        """
+        Execute ``func(*args)`` in a thread or in the process pool depending on ``size``.
+        Args:
+            func (Callable): Picklable top-level function.
+            *args: Picklable arguments.
+            size (int): Input size (e.g. number of price points) used for routing.
+            timeout (float, optional): Override of the default timeout.
+        Returns:
+            Any: The function result.
+        """
+        self._acquire()
+        try:
+            if size <= self.inline_max_points:
+                # Threads cannot be cancelled: shield the call so a timeout leaves it (and its slot) running
+                context = contextvars.copy_context()
+                inline = asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, func, *args))
+                inline.add_done_callback(self._settle)
+                waiter = asyncio.shield(inline)
+            else:
+                future = self._get_pool().submit(func, *args)
+                # The slot is freed when the worker is done, not when the caller stops waiting
+                future.add_done_callback(lambda f: self._release())
+                waiter = asyncio.wrap_future(future)
+        except Exception:
+            self._release()
+            raise
+        try:
+            return await asyncio.wait_for(waiter, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise JobTimeout(f"Computation exceeded {timeout or self.timeout:.0f}s")
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> str:
+        """
+        Start ``func(*args)`` in the process pool as a background job.
+
+        The job is tracked through the pool's own future, so it keeps running independently
+        of the request (and event loop) that submitted it.
+        Returns:
+            str: Job id for ``job``.
+        """
+        self._acquire()
+        job_id = uuid.uuid4().hex
+        job = {"id": job_id, "status": "running", "submitted": time.time(), "result": None, "error": None}
+        self._jobs[job_id] = job
+        self._trim_jobs()
+        try:
+            future = self._get_pool().submit(func, *args)
+        except Exception:
+            self._jobs.pop(job_id, None)
+            self._release()
+            raise
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job_id
+
+    def warm_up(self, func: Callable[..., Any], *args: Any) -> None:
+        """
+        Start every pool worker ahead of traffic and run ``func(*args)`` once per worker, so the
+        first offloaded request does not pay for process spawn and imports. Each worker gets
+        ``timeout`` seconds; a stuck warm-up raises ``TimeoutError`` instead of blocking startup.
+        """
+        pool = self._get_pool()
+        for future in [pool.submit(func, *args) for _ in range(self.max_workers)]:
+            future.result(timeout=self.timeout)
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record (status, result, error) or None if unknown."""
+        return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """Stop the process pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _finish(self, job: Dict[str, Any], future: Future) -> None:
+        self._release()
+        job["finished"] = time.time()
+        if future.cancelled():
+            job["error"], job["status"] = "cancelled", "failed"
+        elif future.exception() is not None:
+            job["error"], job["status"] = str(future.exception()), "failed"
+        else:
+            job["result"], job["status"] = future.result(), "done"
+
+    def _trim_jobs(self) -> None:
+        finished = [k for k, j in self._jobs.items() if j["status"] in ("done", "failed")]
+        for key in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[key]
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise Saturated("Too many requests in flight; retry later.")
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _settle(self, future: "asyncio.Future") -> None:
+        self._release()
+        if not future.cancelled():
+            # Retrieve the error of a call nobody waits for anymore, so asyncio does not log it
+            future.exception()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
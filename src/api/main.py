@@ -1,60 +1,419 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Any, Dict
-import pandas as pd
-from src.backtesting.engine import BacktestEngine
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import UploadFile
+from pydantic import BaseModel, model_validator
+from typing import Any, Dict, Literal, Optional
+import json
+import logging
+import math
+import os
+import time
+import uuid
+import numpy as np
+from src.api.encoding import DOWNSAMPLERS, InvalidPayload, PayloadError, decode_array, decode_prices_signals, encode_result, negotiate_format
+from src.api.cache import ResultCache
+from src.api.executor import ExecutionLayer, JobTimeout, Saturated
+from src.backtesting.incremental import IncrementalBacktest
+from src.api.service import ENGINE_PARAMS, compute_backtest, compute_backtest_with_state, compute_batch, curve_report, to_json_result, warm_up
+from src.monitoring import instrumentation
+from src.monitoring.instrumentation import REGISTRY, SamplingProfiler, configure_logging, span
 
-app = FastAPI(title="Portfolio Risk Assessment API")
+logger = logging.getLogger(__name__)
+executor = ExecutionLayer.from_env()
+cache = ResultCache.from_env()
+# Portfolios per execution-layer call when streaming a batch
+STREAM_CHUNK = 256
+# Per-request sampling profiles (X-Profile: 1) are only taken when RISK_API_PROFILING=1
+PROFILING = os.getenv("RISK_API_PROFILING") == "1"
+profiles: "OrderedDict[str, str]" = OrderedDict()
+MAX_PROFILES = 32
+
+REQUESTS = REGISTRY.counter("risk_api_requests_total", "HTTP requests by method, route and status.", ("method", "route", "status"))
+LATENCY = REGISTRY.histogram("risk_api_request_seconds", "HTTP request latency by method and route.", ("method", "route"))
+CACHE_LOOKUPS = REGISTRY.counter("risk_api_cache_lookups_total", "Backtest cache lookups by outcome.", ("outcome",))
+WS_UPDATES = REGISTRY.counter("risk_api_ws_updates_total", "Updates sent on /ws/risk.")
+CACHE_STATS = REGISTRY.gauge("risk_api_cache", "Result cache counters and size at scrape time.", ("stat",))
+EXECUTOR_PENDING = REGISTRY.gauge("risk_api_executor_pending", "Offloaded calls queued or running.")
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    configure_logging()
+    # RISK_API_WARMUP: comma-separated warm-up targets run before the app reports ready
+    # ('backtest', 'models', 'collectors', and 'pool' to start the process pool workers)
+    targets = [t.strip() for t in os.getenv("RISK_API_WARMUP", "").split(",") if t.strip()]
+    if targets:
+        start = time.perf_counter()
+        timings = warm_up([t for t in targets if t != "pool"])
+        if "pool" in targets:
+            executor.warm_up(warm_up)
+            timings["pool"] = time.perf_counter() - start - sum(timings.values())
+        logger.info("Warm-up finished in %.3fs", time.perf_counter() - start, extra={"warmup": timings})
+    yield
+    executor.shutdown()
+
+app = FastAPI(title="Portfolio Risk Assessment API", lifespan=_lifespan)
+
+@app.middleware("http")
+async def _instrument(request: Request, call_next):
+    """Request counters and latency, a Server-Timing header with the stage spans, and on-demand profiles."""
+    if not instrumentation.ENABLED:
+        return await call_next(request)
+    profiler = None
+    if PROFILING and request.headers.get("x-profile") == "1":
+        profiler = SamplingProfiler().start()
+    token = instrumentation.start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        # Unhandled errors still count, as the 500 the server will answer with
+        _record(request, 500, time.perf_counter() - start)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        spans = instrumentation.end_request(token)
+        if profiler is not None:
+            profiler.stop()
+    _record(request, response.status_code, elapsed)
+    response.headers["Server-Timing"] = instrumentation.server_timing(spans + [("total", elapsed)])
+    if profiler is not None:
+        profile_id = uuid.uuid4().hex
+        profiles[profile_id] = profiler.collapsed()
+        while len(profiles) > MAX_PROFILES:
+            profiles.popitem(last=False)
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+def _record(request: Request, status: int, elapsed: float) -> None:
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    REQUESTS.inc(method=request.method, route=route, status=status)
+    LATENCY.observe(elapsed, method=request.method, route=route)
 
 class RiskRequest(BaseModel):
     prices: list[float]
     signals: list[int]
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def _timed_parse(cls, data: Any, handler):
+        with span("parse"):
+            return handler(data)
+
+    @model_validator(mode="after")
+    def _check_lengths(self) -> "RiskRequest":
+        _check_series(self.prices, self.signals)
+        return self
+
+
+def _check_series(prices, signals) -> None:
+    """Input checks shared by the JSON and bulk single-portfolio endpoints; raises ValueError."""
+    if not len(prices) or len(prices) != len(signals):
+        raise ValueError("prices and signals must be non-empty and the same length.")
+    prices = np.asarray(prices, dtype=np.float64)
+    if not (np.isfinite(prices).all() and (prices > 0).all()):
+        raise ValueError("prices must be finite and positive.")
+    if not np.isfinite(np.asarray(signals, dtype=np.float64)).all():
+        raise ValueError("signals must be finite.")
+
+
+class PortfolioItem(BaseModel):
+    id: Optional[str] = None
+    prices: list[float]
+    signals: list[int]
+
+
+class BatchRequest(BaseModel):
+    portfolios: list[PortfolioItem]
+    include_curves: bool = False
+
 
-def _to_df_and_series(prices: list[float], signals: list[int]) -> tuple[pd.DataFrame, pd.Series]:
-    idx = pd.RangeIndex(len(prices))
-    prices_df = pd.DataFrame({'A': prices}, index=idx)
-    signals_ser = pd.Series(signals, index=idx)
-    return prices_df, signals_ser
+class JobRequest(BaseModel):
+    kind: Literal["risk", "backtest", "risk_batch", "backtest_batch"]
+    payload: Dict[str, Any]
+
+
+async def _execute(func, *args, size: int) -> Any:
+    """Run through the execution layer, mapping admission/timeout failures to HTTP errors."""
+    try:
+        return await executor.run(func, *args, size=size)
+    except Saturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except JobTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _cached_backtest(prices, signals, include_risk: bool) -> Dict[str, Any]:
+    """Serve from the result cache, resume from a cached prefix, or compute and cache."""
+    prices = np.asarray(prices, dtype=np.float64)
+    signals = np.asarray(signals, dtype=np.float64)
+    key = cache.key(prices, signals, ENGINE_PARAMS)
+    with span("cache"):
+        entry = cache.get(key)
+        found = cache.find_prefix(prices, signals, ENGINE_PARAMS) if entry is None else None
+    if entry is not None:
+        CACHE_LOOKUPS.inc(outcome="hit")
+        result = entry["result"]
+    else:
+        result = None
+        if found is not None:
+            CACHE_LOOKUPS.inc(outcome="prefix")
+            with span("resume"):
+                length, prior = found
+                state = prior["state"].copy()
+                try:
+                    tail = state.extend(prices[length:], signals[length:])
+                    result = dict(state.metrics(), portfolio_value=np.concatenate([prior["result"]["portfolio_value"], tail]))
+                except ValueError:
+                    # Inputs the incremental state rejects (e.g. non-positive prices) get the full engine run
+                    result = None
+        if result is None:
+            CACHE_LOOKUPS.inc(outcome="miss")
+            with span("compute"):
+                result, state = await _execute(compute_backtest_with_state, prices, signals, size=len(prices))
+        cache.put(key, prices, signals, ENGINE_PARAMS, result, state)
+    out = dict(result)
+    if not include_risk:
+        out.pop("risk_score")
+    return out
 
 @app.get("/health")
 def health_check() -> Dict[str, str]:
     """Health check endpoint."""
     return {"status": "ok"}
 
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    """Result cache hit/miss counters and size."""
+    return cache.snapshot()
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """Request, stage, cache and executor metrics in the Prometheus text format."""
+    for stat, value in cache.snapshot().items():
+        CACHE_STATS.set(value, stat=stat)
+    EXECUTOR_PENDING.set(executor.pending)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiles/{profile_id}")
+def profile(profile_id: str) -> Response:
+    """Collapsed-stack sampling profile of a request sent with ``X-Profile: 1`` (needs RISK_API_PROFILING=1)."""
+    if profile_id not in profiles:
+        raise HTTPException(status_code=404, detail="Unknown profile id.")
+    return PlainTextResponse(profiles[profile_id])
+
+def _json(out: Dict[str, Any]) -> Response:
+    with span("serialize"):
+        return JSONResponse(to_json_result(out))
+
 @app.post("/risk")
-def risk_assessment(request: RiskRequest) -> Dict[str, Any]:
-    """Compute risk score using max drawdown from backtest."""
-    try:
-        prices, signals = _to_df_and_series(request.prices, request.signals)
-        engine = BacktestEngine()
-        results = engine.run(prices, signals)
-        mdd = engine.max_drawdown()
-        sharpe = engine.sharpe_ratio()
-        # Simple risk score: higher drawdown = higher risk
-        risk_score = min(1.0, max(0.0, -mdd * 10))
-        return {
-            "risk_score": risk_score,
-            "max_drawdown": float(mdd),
-            "sharpe_ratio": float(sharpe),
-            "portfolio_value": results['portfolio_value'].tolist(),
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def risk_assessment(request: RiskRequest) -> Dict[str, Any]:
+    """
+    Compute risk score using max drawdown from backtest, plus the extended risk report
+    (Sortino, Calmar, Omega, Ulcer index, drawdown duration, hit rate, moments, VaR/CVaR) under 'metrics'.
+    """
+    out = await _cached_backtest(request.prices, request.signals, True)
+    with span("report"):
+        out["metrics"] = curve_report(out["portfolio_value"], ENGINE_PARAMS[0])
+    return _json(out)
 
 @app.post("/backtest")
-def run_backtest(request: RiskRequest) -> Dict[str, Any]:
+async def run_backtest(request: RiskRequest) -> Dict[str, Any]:
     """Run backtest and return key metrics and portfolio value series."""
+    return _json(await _cached_backtest(request.prices, request.signals, False))
+
+async def _read_bulk(request: Request) -> tuple[np.ndarray, np.ndarray]:
+    """Decode prices/signals from a raw binary body or a multipart form with 'prices' and 'signals' parts."""
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        if 'prices' not in form or 'signals' not in form:
+            raise PayloadError("Multipart payload must have 'prices' and 'signals' parts.")
+        arrays = []
+        for name in ('prices', 'signals'):
+            part = form[name]
+            if not isinstance(part, UploadFile):
+                raise PayloadError(f"Multipart part '{name}' must be a file upload.")
+            arrays.append(decode_array(await part.read(), part.content_type or ''))
+        prices, signals = arrays
+    else:
+        prices, signals = decode_prices_signals(await request.body(), content_type)
+    if prices.ndim != 1 or signals.ndim != 1:
+        raise PayloadError("Prices and signals must be 1-D arrays.")
+    if not all(np.issubdtype(a.dtype, np.number) or a.dtype == np.bool_ for a in (prices, signals)):
+        raise PayloadError("Prices and signals must be numeric.")
     try:
-        prices, signals = _to_df_and_series(request.prices, request.signals)
-        engine = BacktestEngine()
-        results = engine.run(prices, signals)
-        mdd = engine.max_drawdown()
-        sharpe = engine.sharpe_ratio()
-        return {
-            "max_drawdown": float(mdd),
-            "sharpe_ratio": float(sharpe),
-            "portfolio_value": results['portfolio_value'].tolist(),
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        _check_series(prices, signals)
+    except ValueError as e:
+        raise InvalidPayload(str(e))
+    return prices, signals
+
+async def _bulk(request: Request, include_risk: bool, fmt: Optional[str], max_points: int,
+                downsample: str, start: Optional[int], end: Optional[int]) -> Response:
+    if downsample not in DOWNSAMPLERS:
+        raise HTTPException(status_code=400, detail=f"downsample must be one of {sorted(DOWNSAMPLERS)}")
+    try:
+        fmt = negotiate_format(fmt, request.headers.get('accept'))
+        prices, signals = await _read_bulk(request)
+    except PayloadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    out = await _cached_backtest(prices, signals, include_risk)
+    curve = out["portfolio_value"]
+    offset = 0
+    if start is not None or end is not None:
+        # Metrics stay over the full series; only the returned curve is restricted to [start, end)
+        offset, stop, _ = slice(start, end).indices(len(curve))
+        curve = curve[offset:max(stop, offset)]
+        out["portfolio_index"] = np.arange(offset, offset + len(curve))
+    if max_points and len(curve) > max_points:
+        index, curve = DOWNSAMPLERS[downsample](curve, max_points)
+        out["portfolio_index"] = index + offset
+    out["portfolio_value"] = curve
+    with span("serialize"):
+        body, media_type, headers = encode_result(out, fmt)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@app.post("/risk/bulk")
+async def risk_assessment_bulk(request: Request, format: Optional[str] = None, max_points: int = 0, downsample: str = "minmax",
+                               start: Optional[int] = None, end: Optional[int] = None) -> Response:
+    """
+    Risk assessment for binary payloads (npy, Arrow IPC or raw float64, as a raw body or multipart).
+    The response format follows ``format`` or the Accept header. ``max_points`` downsamples the curve
+    ('minmax' or 'lttb'); ``start``/``end`` return only a segment of it (metrics cover the full series).
+    """
+    return await _bulk(request, True, format, max_points, downsample, start, end)
+
+@app.post("/backtest/bulk")
+async def run_backtest_bulk(request: Request, format: Optional[str] = None, max_points: int = 0, downsample: str = "minmax",
+                            start: Optional[int] = None, end: Optional[int] = None) -> Response:
+    """Backtest for binary payloads; same encoding options as ``/risk/bulk``."""
+    return await _bulk(request, False, format, max_points, downsample, start, end)
+
+def _batch_args(request: BatchRequest, include_risk: bool) -> tuple:
+    for p in request.portfolios:
+        if len(p.prices) != len(p.signals) or not p.prices:
+            raise HTTPException(status_code=400, detail=f"Portfolio {p.id}: prices and signals must be non-empty and the same length.")
+    items = request.portfolios
+    return ([p.prices for p in items], [p.signals for p in items], [p.id for p in items], include_risk, request.include_curves)
+
+async def _batch_response(request: BatchRequest, http_request: Request, include_risk: bool, stream: bool):
+    args = _batch_args(request, include_risk)
+    if stream or "application/x-ndjson" in http_request.headers.get("accept", ""):
+        return await _stream_batch(*args)
+    size = sum(len(p.prices) for p in request.portfolios)
+    return {"results": await _execute(compute_batch, *args, size=size)}
+
+async def _stream_batch(prices_list, signals_list, ids, include_risk: bool, include_curves: bool) -> StreamingResponse:
+    """
+    Stream a batch as NDJSON, computing ``STREAM_CHUNK`` portfolios per execution-layer call so
+    streamed batches get the same size routing, admission control and timeouts as the rest.
+    The first chunk is computed before the response starts (so 429/504 are still HTTP errors);
+    a later failure ends the stream with an ``{"error": ..., "status": ...}`` line.
+    """
+    ids = [pid if pid is not None else str(i) for i, pid in enumerate(ids)]
+    parts = [slice(start, start + STREAM_CHUNK) for start in range(0, len(ids), STREAM_CHUNK)]
+
+    async def run(part: slice):
+        return await _execute(compute_batch, prices_list[part], signals_list[part], ids[part], include_risk,
+                              include_curves, size=sum(len(p) for p in prices_list[part]))
+
+    first = await run(parts[0]) if parts else []
+
+    async def lines():
+        for row in first:
+            yield json.dumps(row) + "\n"
+        for part in parts[1:]:
+            try:
+                rows = await run(part)
+            except HTTPException as e:
+                yield json.dumps({"error": e.detail, "status": e.status_code}) + "\n"
+                return
+            for row in rows:
+                yield json.dumps(row) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/risk/batch")
+async def risk_assessment_batch(request: BatchRequest, http_request: Request, stream: bool = False):
+    """
+    Risk metrics for many portfolios in one request (vectorized backtest).
+    With ``stream=true`` or ``Accept: application/x-ndjson`` results are streamed as NDJSON.
+    """
+    return await _batch_response(request, http_request, True, stream)
+
+@app.post("/backtest/batch")
+async def run_backtest_batch(request: BatchRequest, http_request: Request, stream: bool = False):
+    """Backtest metrics for many portfolios; same options as ``/risk/batch``."""
+    return await _batch_response(request, http_request, False, stream)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest) -> Dict[str, str]:
+    """Submit a long-running risk/backtest/batch computation; poll ``/jobs/{job_id}`` for its status."""
+    try:
+        if request.kind.endswith("_batch"):
+            batch = BatchRequest(**request.payload)
+            func, args = compute_batch, _batch_args(batch, request.kind == "risk_batch")
+        else:
+            single = RiskRequest(**request.payload)
+            func, args = compute_backtest, (single.prices, single.signals, request.kind == "risk")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        job_id = executor.submit(func, *args)
+    except Saturated as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    return {"job_id": job_id, "status": executor.job(job_id)["status"]}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str) -> Dict[str, Any]:
+    """Status of a submitted job."""
+    job = executor.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return {k: job[k] for k in ("id", "status", "error")}
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str, response: Response):
+    """Result of a finished job (202 while it is still running)."""
+    job = executor.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "done":
+        response.status_code = 202
+        return {"id": job_id, "status": job["status"]}
+    result = job["result"]
+    return {"results": result} if isinstance(result, list) else to_json_result(result)
+
+@app.websocket("/ws/risk")
+async def risk_stream(websocket: WebSocket, initial_cash: float = ENGINE_PARAMS[0], transaction_cost: float = ENGINE_PARAMS[1]):
+    """
+    Streaming risk session. Send ``{"price": p, "signal": s}`` (or ``{"prices": [...], "signals": [...]}``)
+    per message and receive the updated portfolio value, drawdown, max drawdown, Sharpe ratio and risk score.
+    Each session keeps O(1) state, so many sessions can share the event loop.
+    """
+    await websocket.accept()
+    state = IncrementalBacktest(initial_cash, transaction_cost)
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+                if isinstance(message, dict) and "prices" in message:
+                    values = state.extend(message["prices"], message["signals"])
+                    if not len(values):
+                        raise ValueError("Empty update.")
+                else:
+                    state.update(message["price"], message["signal"])
+            except (KeyError, TypeError, ValueError) as e:
+                await websocket.send_json({"error": f"Invalid tick: {e}"})
+                continue
+            metrics = state.metrics()
+            update = {"n": state.n, "portfolio_value": state.value, "drawdown": state.drawdown}
+            update.update({k: (v if math.isfinite(v) else None) for k, v in metrics.items()})
+            await websocket.send_json(update)
+            WS_UPDATES.inc()
+    except WebSocketDisconnect:
+        return
@@ -0,0 +1,160 @@
+import importlib
+import math
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from src.backtesting.engine import BacktestEngine
+from src.backtesting.batch import iter_batch
+from src.backtesting.incremental import IncrementalBacktest
+from src.backtesting.metrics import risk_report
+from src.monitoring.instrumentation import span
+
+_DEFAULT_ENGINE = BacktestEngine()
+# (initial_cash, transaction_cost) of the engine behind the endpoints, taken from the
+# BacktestEngine defaults so result-cache keys always match the parameters actually used
+ENGINE_PARAMS = (_DEFAULT_ENGINE.initial_cash, _DEFAULT_ENGINE.transaction_cost)
+
+
+def _to_df_and_series(prices: Sequence[float], signals: Sequence[float]) -> tuple[pd.DataFrame, pd.Series]:
+    idx = pd.RangeIndex(len(prices))
+    prices_df = pd.DataFrame({'A': prices}, index=idx)
+    signals_ser = pd.Series(signals, index=idx)
+    return prices_df, signals_ser
+
+
+def compute_backtest(prices: Sequence[float], signals: Sequence[float], include_risk: bool) -> Dict[str, Any]:
+    """
+    Run the backtest behind ``/risk`` and ``/backtest``.
+    Args:
+        prices (Sequence[float]): Price series.
+        signals (Sequence[float]): Position signals.
+        include_risk (bool): Add the drawdown-based 'risk_score'.
+    Returns:
+        Dict[str, Any]: Scalar metrics and the 'portfolio_value' array.
+    """
+    out, _ = compute_backtest_with_state(prices, signals)
+    if not include_risk:
+        out.pop("risk_score")
+    return out
+
+
+def compute_backtest_with_state(prices: Sequence[float], signals: Sequence[float]) -> tuple[Dict[str, Any], IncrementalBacktest]:
+    """
+    Run the backtest with the risk score and also return its terminal state for the result cache.
+    Args:
+        prices (Sequence[float]): Price series.
+        signals (Sequence[float]): Position signals.
+    Returns:
+        tuple[Dict[str, Any], IncrementalBacktest]: Result and resumable state.
+    """
+    with span('to_frame'):
+        prices_df, signals_ser = _to_df_and_series(prices, signals)
+    engine = BacktestEngine(*ENGINE_PARAMS)
+    results = engine.run(prices_df, signals_ser)
+    with span('engine_metrics'):
+        mdd = engine.max_drawdown()
+        out = {
+            "risk_score": float(min(1.0, max(0.0, -mdd * 10))),
+            "max_drawdown": float(mdd),
+            "sharpe_ratio": float(engine.sharpe_ratio()),
+            "portfolio_value": results['portfolio_value'].to_numpy(),
+        }
+    return out, IncrementalBacktest.from_results(results, engine.initial_cash, engine.transaction_cost)
+
+
+def curve_report(portfolio_value: np.ndarray, initial_cash: float) -> Dict[str, Optional[float]]:
+    """
+    Extended risk metrics (``risk_report``) from a portfolio value curve, JSON-ready.
+    Args:
+        portfolio_value (np.ndarray): Portfolio values of the backtest.
+        initial_cash (float): Starting value the curve grew from.
+    Returns:
+        Dict[str, Optional[float]]: Metric name to value (None where undefined).
+    """
+    values = np.asarray(portfolio_value, dtype=np.float64)
+    returns = values / np.concatenate([[initial_cash], values[:-1]]) - 1
+    return {k: (v if math.isfinite(v) else None) for k, v in risk_report(returns).items()}
+
+
+def iter_batch_rows(prices_list: Sequence[Sequence[float]], signals_list: Sequence[Sequence[float]],
+                    ids: Sequence[Optional[str]], include_risk: bool, include_curves: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one JSON-ready row per portfolio for the batch endpoints, in input order.
+    Args:
+        prices_list (Sequence[Sequence[float]]): Price series per portfolio.
+        signals_list (Sequence[Sequence[float]]): Signal series per portfolio.
+        ids (Sequence[Optional[str]]): Client ids (position used when None).
+        include_risk (bool): Keep the 'risk_score' metric.
+        include_curves (bool): Include each portfolio's value curve.
+    Returns:
+        Iterator[Dict[str, Any]]: Rows with 'id' and the metrics.
+    """
+    for chunk in iter_batch(prices_list, signals_list, include_curves=include_curves):
+        for i, metrics in chunk:
+            if not include_risk:
+                metrics.pop("risk_score")
+            row: Dict[str, Any] = {"id": ids[i] if ids[i] is not None else str(i)}
+            # NaN/inf (e.g. Sortino with fewer than two losing days) is not valid JSON
+            row.update({k: (None if isinstance(v, float) and not math.isfinite(v) else v) for k, v in metrics.items()})
+            yield row
+
+
+def compute_batch(prices_list: Sequence[Sequence[float]], signals_list: Sequence[Sequence[float]],
+                  ids: Sequence[Optional[str]], include_risk: bool, include_curves: bool = False) -> List[Dict[str, Any]]:
+    """Materialize ``iter_batch_rows`` (picklable entry point for the process pool)."""
+    return list(iter_batch_rows(prices_list, signals_list, ids, include_risk, include_curves))
+
+
+def to_json_result(out: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert array values of a result to lists for JSON responses, with NaN/inf as None (not valid JSON)."""
+    return {k: _json_value(v) for k, v in out.items()}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f' and not np.isfinite(value).all():
+            return [x if math.isfinite(x) else None for x in value.tolist()]
+        return value.tolist()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+# Backends that must stay off the API's import path (loaded on first use or by warm_up)
+HEAVY_MODULES = ('torch', 'pytorch_lightning', 'lightning', 'sklearn', 'scipy', 'yfinance', 'fredapi', 'statsmodels')
+# Modules imported by the 'models' and 'collectors' warm-up targets
+WARMUP_MODULES = {
+    'models': ('src.models.volatility_forecaster', 'src.models.ensemble_model', 'src.models.risk_factor_model',
+               'src.models.tail_risk_model', 'src.models.portfolio_optimizer', 'scipy.stats', 'scipy.optimize'),
+    'collectors': ('yfinance', 'fredapi'),
+}
+
+
+def warm_up(targets: Sequence[str] = ('backtest',)) -> Dict[str, float]:
+    """
+    Pay first-use costs before serving traffic.
+    Args:
+        targets (Sequence[str]): 'backtest' runs a small ``/risk`` computation end to end (first-call
+            setup in pandas/NumPy); 'models' and 'collectors' import the lazily loaded backends
+            listed in ``WARMUP_MODULES``.
+    Returns:
+        Dict[str, float]: Seconds spent per target.
+    """
+    timings = {}
+    for target in targets:
+        start = time.perf_counter()
+        if target == 'backtest':
+            rng = np.random.default_rng(0)
+            prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 256)))
+            out, state = compute_backtest_with_state(prices, np.sign(rng.normal(size=256)))
+            state.copy().extend(prices[-2:], [1.0, 1.0])
+            curve_report(out['portfolio_value'], ENGINE_PARAMS[0])
+            next(iter_batch_rows([prices], [np.ones(256)], [None], True))
+        elif target in WARMUP_MODULES:
+            for module in WARMUP_MODULES[target]:
+                importlib.import_module(module)
+        else:
+            raise ValueError(f"Unknown warm-up target {target!r}; expected 'backtest' or one of {sorted(WARMUP_MODULES)}.")
+        timings[target] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,99 @@
+import numpy as np
+from typing import Dict, Iterator, List, Sequence, Tuple
+from src.backtesting.metrics import risk_report
+from src.monitoring.instrumentation import timed
+
+
+@timed('backtest.batch')
+def run_batch_backtest(prices: np.ndarray, signals: np.ndarray, initial_cash: float = 1_000_000,
+                       transaction_cost: float = 0.001) -> Dict[str, np.ndarray]:
+    """
+    Vectorized ``BacktestEngine.run`` for many single-asset portfolios of equal length.
+    Args:
+        prices (np.ndarray): Prices, shape (T, P) with one column per portfolio.
+        signals (np.ndarray): Position signals, shape (T, P).
+        initial_cash (float): Starting portfolio value.
+        transaction_cost (float): Cost per unit change in position.
+    Returns:
+        Dict[str, np.ndarray]: (T, P) 'strategy_returns', 'portfolio_value' and 'drawdown'.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    signals = np.asarray(signals, dtype=np.float64)
+    if prices.ndim == 1:
+        prices, signals = prices[:, None], signals[:, None]
+    if prices.shape != signals.shape:
+        raise ValueError("Prices and signals must have the same shape.")
+    returns = np.zeros_like(prices)
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    held = np.zeros_like(signals)
+    held[1:] = signals[:-1]
+    trades = np.zeros_like(signals)
+    trades[1:] = np.abs(np.diff(signals, axis=0))
+    strategy_returns = returns * held - transaction_cost * trades
+    value = initial_cash * np.cumprod(1 + strategy_returns, axis=0)
+    drawdown = value / np.maximum.accumulate(value, axis=0) - 1
+    return {'strategy_returns': strategy_returns, 'portfolio_value': value, 'drawdown': drawdown}
+
+
+def batch_metrics(strategy_returns: np.ndarray, risk_free_rate: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Per-portfolio risk metrics for the output of ``run_batch_backtest``.
+
+    Matches ``BacktestEngine.sharpe_ratio``/``max_drawdown`` and the ``sortino_ratio``/
+    ``calmar_ratio`` helpers column by column (computed by ``risk_report``).
+    Args:
+        strategy_returns (np.ndarray): (T, P) strategy returns.
+        risk_free_rate (float): Risk-free rate (annualized).
+    Returns:
+        Dict[str, np.ndarray]: One (P,) vector per metric.
+    """
+    report = risk_report(np.asarray(strategy_returns, dtype=np.float64).reshape(len(strategy_returns), -1),
+                         levels=(), risk_free_rate=risk_free_rate)
+    return {
+        'risk_score': np.clip(-report['max_drawdown'] * 10, 0.0, 1.0),
+        'max_drawdown': report['max_drawdown'],
+        'sharpe_ratio': report['sharpe_ratio'],
+        'sortino_ratio': report['sortino_ratio'],
+        'calmar_ratio': report['calmar_ratio'],
+    }
+
+
+def iter_batch(prices_list: Sequence[Sequence[float]], signals_list: Sequence[Sequence[float]], chunk_size: int = 256,
+               initial_cash: float = 1_000_000, transaction_cost: float = 0.001,
+               include_curves: bool = False) -> Iterator[List[Tuple[int, Dict[str, object]]]]:
+    """
+    Backtest many portfolios, yielding results chunk by chunk in input order.
+
+    Within each chunk, portfolios of equal length are stacked into one (T, P) array and
+    run through ``run_batch_backtest`` together, so ragged batches stay vectorized.
+    Args:
+        prices_list (Sequence[Sequence[float]]): Price series per portfolio.
+        signals_list (Sequence[Sequence[float]]): Signal series per portfolio.
+        chunk_size (int): Portfolios per yielded chunk.
+        initial_cash (float): Starting portfolio value.
+        transaction_cost (float): Cost per unit change in position.
+        include_curves (bool): Include each portfolio's value curve.
+    Returns:
+        Iterator[List[Tuple[int, Dict[str, object]]]]: (input position, metrics) pairs per chunk.
+    """
+    if len(prices_list) != len(signals_list):
+        raise ValueError("prices_list and signals_list must have the same length.")
+    for start in range(0, len(prices_list), chunk_size):
+        stop = min(start + chunk_size, len(prices_list))
+        groups: Dict[int, List[int]] = {}
+        for i in range(start, stop):
+            if len(prices_list[i]) != len(signals_list[i]):
+                raise ValueError(f"Portfolio {i}: prices and signals must have the same length.")
+            groups.setdefault(len(prices_list[i]), []).append(i)
+        chunk: Dict[int, Dict[str, object]] = {}
+        for members in groups.values():
+            prices = np.column_stack([np.asarray(prices_list[i], dtype=np.float64) for i in members])
+            signals = np.column_stack([np.asarray(signals_list[i], dtype=np.float64) for i in members])
+            results = run_batch_backtest(prices, signals, initial_cash, transaction_cost)
+            metrics = batch_metrics(results['strategy_returns'])
+            for j, i in enumerate(members):
+                row: Dict[str, object] = {k: float(v[j]) for k, v in metrics.items()}
+                if include_curves:
+                    row['portfolio_value'] = results['portfolio_value'][:, j].tolist()
+                chunk[i] = row
+        yield [(i, chunk[i]) for i in range(start, stop)]
@@ -0,0 +1,214 @@
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from typing import Dict, Mapping, Optional, Sequence, Union
+from src.monitoring.instrumentation import timed
+
+PerAsset = Union[float, Sequence[float], Mapping[str, float]]
+
+
+class CostModel(ABC):
+    """
+    Base class for execution cost models.
+
+    A model returns per-asset costs in return units (fraction of portfolio value) for
+    every period. Inputs are (T, N) NumPy arrays of weights held over each period, weight
+    traded at each period, prices and optionally volumes; ``aum`` is a grid of portfolio
+    sizes of shape (A, 1, 1), so one call evaluates every AUM level and asset at once and
+    returns an array broadcastable to (A, T, N). Models combine with ``+``; subclasses must
+    implement ``cost``.
+    """
+    @abstractmethod
+    def cost(self, held: np.ndarray, trades: np.ndarray, prices: np.ndarray, volume: Optional[np.ndarray],
+             aum: np.ndarray, assets: Sequence[str]) -> np.ndarray:
+        """Per-asset costs in return units, broadcastable to (A, T, N)."""
+
+    def __add__(self, other: 'CostModel') -> 'CompositeCost':
+        return CompositeCost(self, other)
+
+
+class CompositeCost(CostModel):
+    """Sum of several cost models."""
+    def __init__(self, *models: CostModel):
+        self.models = []
+        for model in models:
+            self.models.extend(model.models if isinstance(model, CompositeCost) else [model])
+
+    def cost(self, held, trades, prices, volume, aum, assets):
+        total = 0.0
+        for model in self.models:
+            total = total + model.cost(held, trades, prices, volume, aum, assets)
+        return total
+
+
+class FlatCost(CostModel):
+    """Proportional cost per unit of weight traded (the engine's ``transaction_cost``)."""
+    def __init__(self, rate: PerAsset = 0.001):
+        self.rate = rate
+
+    def cost(self, held, trades, prices, volume, aum, assets):
+        return _per_asset(self.rate, assets) * trades
+
+
+class SpreadCost(CostModel):
+    """Crossing half the bid-ask spread on every trade; ``spread_bps`` is the full quoted spread."""
+    def __init__(self, spread_bps: PerAsset = 5.0):
+        self.spread_bps = spread_bps
+
+    def cost(self, held, trades, prices, volume, aum, assets):
+        return 0.5e-4 * _per_asset(self.spread_bps, assets) * trades
+
+
+class SquareRootImpact(CostModel):
+    """
+    Square-root market impact: a trade of notional Q in an asset with average daily
+    dollar volume ADV and daily volatility sigma moves the price by
+    ``coefficient * sigma * sqrt(Q / ADV)`` (capped at ``max_impact``). ADV and sigma are
+    trailing ``window``-period estimates from the Volume column and close-to-close returns,
+    using data up to the previous period only. Trades made while either estimate is still
+    unknown (the first periods, or missing volume) are charged ``max_impact``.
+    """
+    def __init__(self, coefficient: float = 0.1, window: int = 21, max_impact: float = 0.1):
+        self.coefficient = coefficient
+        self.window = window
+        self.max_impact = max_impact
+
+    def cost(self, held, trades, prices, volume, aum, assets):
+        if volume is None:
+            raise ValueError("SquareRootImpact requires volume data.")
+        sigma, adv = self.liquidity(prices, volume)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            participation = np.where(adv > 0, trades / adv, np.inf)
+            # fmin: unknown (NaN) estimates fall back to the cap instead of propagating
+            impact = np.fmin(self.coefficient * sigma * np.sqrt(aum * participation), self.max_impact)
+        return np.where(trades > 0, impact, 0.0) * trades
+
+    def liquidity(self, prices: np.ndarray, volume: np.ndarray) -> tuple:
+        """Trailing daily volatility and average daily dollar volume, shape (T, N) each (NaN where unknown)."""
+        frame = pd.DataFrame(prices)
+        returns = frame.pct_change()
+        # Estimates use data up to the previous period so costs never look ahead
+        sigma = returns.rolling(self.window, min_periods=2).std()
+        sigma = sigma.fillna(returns.expanding(min_periods=2).std()).shift(1)
+        adv = (frame * volume).rolling(self.window, min_periods=1).mean().shift(1)
+        return sigma.to_numpy(), adv.to_numpy()
+
+
+class BorrowCost(CostModel):
+    """Stock borrow fee on short positions, charged per period at ``annual_rate / periods_per_year``."""
+    def __init__(self, annual_rate: PerAsset = 0.0025, periods_per_year: int = 252):
+        self.annual_rate = annual_rate
+        self.periods_per_year = periods_per_year
+
+    def cost(self, held, trades, prices, volume, aum, assets):
+        return np.maximum(-held, 0.0) * _per_asset(self.annual_rate, assets) / self.periods_per_year
+
+
+class CommissionSchedule(CostModel):
+    """
+    Broker commissions per asset: a rate on notional plus a per-share fee, with a minimum
+    ticket charge and an optional cap as a fraction of notional. Any parameter can be a
+    scalar, a per-asset sequence or a mapping from asset name to value.
+    """
+    def __init__(self, rate: PerAsset = 0.0, per_share: PerAsset = 0.0, minimum: PerAsset = 0.0,
+                 max_rate: Optional[PerAsset] = None):
+        self.rate = rate
+        self.per_share = per_share
+        self.minimum = minimum
+        self.max_rate = max_rate
+
+    def cost(self, held, trades, prices, volume, aum, assets):
+        notional = aum * trades
+        fee = _per_asset(self.rate, assets) * notional + _per_asset(self.per_share, assets) * notional / prices
+        fee = np.where(trades > 0, np.maximum(fee, _per_asset(self.minimum, assets)), 0.0)
+        if self.max_rate is not None:
+            fee = np.minimum(fee, _per_asset(self.max_rate, assets) * notional)
+        return fee / aum
+
+
+@timed('backtest.costs')
+def evaluate_costs(prices: pd.DataFrame, weights: pd.DataFrame, cost_model: CostModel, aum: Union[float, Sequence[float]],
+                   volume: Optional[pd.DataFrame] = None) -> Dict[str, np.ndarray]:
+    """
+    Gross returns, turnover and costs of a weights strategy for one or more AUM levels.
+    Args:
+        prices (pd.DataFrame): Prices (index: date, columns: assets).
+        weights (pd.DataFrame): Target weights per asset, held from the next period on.
+        cost_model (CostModel): Cost model to evaluate.
+        aum (float or Sequence[float]): Portfolio size(s) the costs are evaluated at.
+        volume (pd.DataFrame, optional): Traded volume per asset (same layout as prices).
+    Returns:
+        Dict[str, np.ndarray]: 'gross_returns' and 'turnover' (T,), 'costs' (A, T) and 'asset_costs' (A, T, N).
+    """
+    weights = weights.reindex(index=prices.index, columns=prices.columns).fillna(0.0)
+    price_arr = prices.to_numpy(dtype=np.float64)
+    weight_arr = weights.to_numpy(dtype=np.float64)
+    volume_arr = None
+    if volume is not None:
+        volume_arr = volume.reindex(index=prices.index, columns=prices.columns).to_numpy(dtype=np.float64)
+    asset_returns = np.zeros_like(price_arr)
+    asset_returns[1:] = price_arr[1:] / price_arr[:-1] - 1
+    held = np.zeros_like(weight_arr)
+    held[1:] = weight_arr[:-1]
+    trades = np.zeros_like(weight_arr)
+    trades[1:] = np.abs(np.diff(weight_arr, axis=0))
+    aum_grid = np.atleast_1d(np.asarray(aum, dtype=np.float64))[:, None, None]
+    asset_costs = np.broadcast_to(
+        cost_model.cost(held, trades, price_arr, volume_arr, aum_grid, list(prices.columns)),
+        (len(aum_grid),) + weight_arr.shape)
+    return {
+        'gross_returns': np.nan_to_num(held * asset_returns).sum(axis=1),
+        'turnover': trades.sum(axis=1),
+        'costs': asset_costs.sum(axis=2),
+        'asset_costs': asset_costs,
+    }
+
+
+def capacity_curve(prices: pd.DataFrame, weights: pd.DataFrame, aum_grid: Sequence[float], cost_model: CostModel,
+                   volume: Optional[pd.DataFrame] = None, min_net_return: float = 0.0,
+                   periods_per_year: int = 252) -> pd.DataFrame:
+    """
+    Net performance of a strategy across a grid of AUM levels, evaluated in one vectorized run.
+    Args:
+        prices (pd.DataFrame): Prices (index: date, columns: assets).
+        weights (pd.DataFrame): Target weights per asset.
+        aum_grid (Sequence[float]): Portfolio sizes to evaluate.
+        cost_model (CostModel): Cost model (e.g. ``SpreadCost() + SquareRootImpact() + BorrowCost()``).
+        volume (pd.DataFrame, optional): Traded volume per asset, needed for market impact.
+        min_net_return (float): Annualized net return defining capacity.
+        periods_per_year (int): Periods per year for annualization.
+    Returns:
+        pd.DataFrame: Per AUM level: annualized gross/net return, cost drag, net Sharpe and max drawdown.
+            ``attrs['capacity']`` is the largest AUM whose net return is at least ``min_net_return``.
+    """
+    evaluated = evaluate_costs(prices, weights, cost_model, aum_grid, volume)
+    gross = evaluated['gross_returns']
+    net = gross[None, :] - evaluated['costs']
+    wealth = np.cumprod(1 + net, axis=1)
+    drawdown = wealth / np.maximum.accumulate(wealth, axis=1) - 1
+    curve = pd.DataFrame({
+        'gross_return': np.full(len(net), gross.mean() * periods_per_year),
+        'cost_drag': evaluated['costs'].mean(axis=1) * periods_per_year,
+        'net_return': net.mean(axis=1) * periods_per_year,
+        'net_sharpe': np.sqrt(periods_per_year) * net.mean(axis=1) / (net.std(axis=1, ddof=1) + 1e-9),
+        'max_drawdown': drawdown.min(axis=1),
+        'turnover': np.full(len(net), evaluated['turnover'].mean() * periods_per_year),
+    }, index=pd.Index(np.asarray(aum_grid, dtype=np.float64), name='aum'))
+    viable = curve.index[curve['net_return'] >= min_net_return]
+    curve.attrs['capacity'] = float(viable.max()) if len(viable) else np.nan
+    return curve
+
+
+def _per_asset(value: PerAsset, assets: Sequence[str]) -> Union[float, np.ndarray]:
+    """Resolve a scalar, per-asset sequence or name mapping to something broadcastable over assets."""
+    if isinstance(value, Mapping):
+        missing = [a for a in assets if a not in value]
+        if missing:
+            raise ValueError(f"No cost parameter for assets: {missing}")
+        return np.array([value[a] for a in assets], dtype=np.float64)
+    if np.ndim(value):
+        value = np.asarray(value, dtype=np.float64)
+        if value.shape != (len(assets),):
+            raise ValueError(f"Expected {len(assets)} per-asset values, got shape {value.shape}.")
+        return value
+    return float(value)
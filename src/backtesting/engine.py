@@ -1,29 +1,46 @@
+import logging
 import pandas as pd
 import numpy as np
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, Union
+from src.backtesting.costs import CostModel, FlatCost, evaluate_costs
+from src.monitoring.instrumentation import timed
+
+logger = logging.getLogger(__name__)
 
 class BacktestEngine:
     """
     Simple backtesting engine for portfolio strategies.
+
+    Without a ``cost_model`` trades cost a flat ``transaction_cost`` per unit of position
+    change. With one (see ``src.backtesting.costs``), costs are evaluated at
+    ``initial_cash`` AUM from the model, e.g. spread, square-root impact and borrow fees.
     """
-    def __init__(self, initial_cash: float = 1_000_000, transaction_cost: float = 0.001):
+    def __init__(self, initial_cash: float = 1_000_000, transaction_cost: float = 0.001,
+                 cost_model: Optional[CostModel] = None):
         self.initial_cash = initial_cash
         self.transaction_cost = transaction_cost
+        self.cost_model = cost_model
         self.results = None
 
-    def run(self, prices: pd.DataFrame, signals: pd.Series) -> pd.DataFrame:
+    @timed('backtest.run')
+    def run(self, prices: pd.DataFrame, signals: Union[pd.Series, pd.DataFrame],
+            volume: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Run a backtest given price data and trading signals.
         Args:
             prices (pd.DataFrame): Price data (index: date, columns: assets).
-            signals (pd.Series): Position signals (index: date, values: -1, 0, 1).
+            signals (pd.Series or pd.DataFrame): Position signals for the first asset (index: date,
+                values: -1, 0, 1), or a frame of target weights per asset (columns matching prices).
+            volume (pd.DataFrame, optional): Traded volume per asset, used by volume-driven cost models.
         Returns:
             pd.DataFrame: Backtest results (portfolio value, returns, drawdown).
         """
         try:
+            if isinstance(signals, pd.DataFrame) or self.cost_model is not None:
+                return self._run_weights(prices, signals, volume)
             portfolio = pd.DataFrame(index=prices.index)
             portfolio['signal'] = signals
-            portfolio['price'] = prices.iloc[:, 0]  # Assume single asset for simplicity
+            portfolio['price'] = prices.iloc[:, 0].astype(np.float64)  # Assume single asset for simplicity
             portfolio['returns'] = portfolio['price'].pct_change().fillna(0)
             portfolio['strategy_returns'] = portfolio['returns'] * portfolio['signal'].shift(1).fillna(0)
             portfolio['strategy_returns'] -= self.transaction_cost * (portfolio['signal'].diff().abs().fillna(0))
@@ -31,10 +48,29 @@ class BacktestEngine:
             portfolio['drawdown'] = (portfolio['portfolio_value'] / portfolio['portfolio_value'].cummax()) - 1
             self.results = portfolio
             return portfolio
-        except Exception as e:
-            print(f"Error in backtest: {e}")
+        except Exception:
+            logger.exception("Error in backtest")
             return pd.DataFrame()
 
+    def _run_weights(self, prices: pd.DataFrame, signals: Union[pd.Series, pd.DataFrame],
+                     volume: Optional[pd.DataFrame]) -> pd.DataFrame:
+        single = isinstance(signals, pd.Series)
+        weights = signals.to_frame(prices.columns[0]) if single else signals
+        cost_model = self.cost_model if self.cost_model is not None else FlatCost(self.transaction_cost)
+        evaluated = evaluate_costs(prices.astype(np.float64), weights, cost_model, self.initial_cash, volume)
+        portfolio = pd.DataFrame(index=prices.index)
+        if single:
+            portfolio['signal'] = signals
+            portfolio['price'] = prices.iloc[:, 0].astype(np.float64)
+        portfolio['gross_returns'] = evaluated['gross_returns']
+        portfolio['transaction_costs'] = evaluated['costs'][0]
+        portfolio['turnover'] = evaluated['turnover']
+        portfolio['strategy_returns'] = portfolio['gross_returns'] - portfolio['transaction_costs']
+        portfolio['portfolio_value'] = self.initial_cash * (1 + portfolio['strategy_returns']).cumprod()
+        portfolio['drawdown'] = (portfolio['portfolio_value'] / portfolio['portfolio_value'].cummax()) - 1
+        self.results = portfolio
+        return portfolio
+
     def sharpe_ratio(self, risk_free_rate: float = 0.0) -> float:
         if self.results is None:
             raise ValueError("Run the backtest first.")
@@ -1,5 +1,7 @@
+import logging
 import numpy as np
-from scipy.stats import norm
+
+logger = logging.getLogger(__name__)
 
 def dynamic_hedge_ratio(S: float, K: float, T: float, r: float, sigma: float, option_type: str = 'call') -> float:
     """
@@ -14,6 +16,7 @@ def dynamic_hedge_ratio(S: float, K: float, T: float, r: float, sigma: float, op
     Returns:
         float: Hedge ratio (delta).
     """
+    from scipy.stats import norm
     try:
         d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T) + 1e-9)
         if option_type == 'call':
@@ -22,6 +25,6 @@ def dynamic_hedge_ratio(S: float, K: float, T: float, r: float, sigma: float, op
             return norm.cdf(d1) - 1
         else:
             raise ValueError("option_type must be 'call' or 'put'")
-    except Exception as e:
-        print(f"Error in dynamic hedge ratio: {e}")
+    except Exception:
+        logger.exception("Error in dynamic hedge ratio")
         return np.nan 
\ No newline at end of file
@@ -0,0 +1,139 @@
+import copy
+import math
+import numpy as np
+from typing import Dict, Sequence
+
+
+class IncrementalBacktest:
+    """
+    Running state of a single-asset backtest that can be extended with new data.
+
+    Follows ``BacktestEngine.run`` (position = previous signal, cost on signal changes)
+    but keeps only the terminal state: last price and signal, portfolio value, running
+    peak, worst drawdown and streaming moments of the strategy returns. Extending a
+    series therefore costs O(new points) instead of re-running the whole history, and
+    ``update`` processes a single tick in O(1).
+    """
+    def __init__(self, initial_cash: float = 1_000_000, transaction_cost: float = 0.001):
+        self.initial_cash = initial_cash
+        self.transaction_cost = transaction_cost
+        self.n = 0
+        self.last_price = np.nan
+        self.last_signal = 0.0
+        self.value = float(initial_cash)
+        self.peak = float(initial_cash)
+        self.drawdown = 0.0
+        self.min_drawdown = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def extend(self, prices: Sequence[float], signals: Sequence[float]) -> np.ndarray:
+        """
+        Append new observations (vectorized) and update the state.
+        Args:
+            prices (Sequence[float]): New prices.
+            signals (Sequence[float]): New position signals.
+        Returns:
+            np.ndarray: Portfolio values at the new observations.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        signals = np.asarray(signals, dtype=np.float64)
+        if prices.shape != signals.shape or prices.ndim != 1:
+            raise ValueError("Prices and signals must be 1-D arrays of the same length.")
+        if not len(prices):
+            return prices
+        if not (np.isfinite(prices).all() and (prices > 0).all() and np.isfinite(signals).all()):
+            raise ValueError("Prices must be finite and positive, and signals finite.")
+        first = self.n == 0
+        prev_prices = np.concatenate([[prices[0] if first else self.last_price], prices[:-1]])
+        held = np.concatenate([[signals[0] if first else self.last_signal], signals[:-1]])
+        strategy_returns = (prices / prev_prices - 1) * held - self.transaction_cost * np.abs(signals - held)
+        values = self.value * np.cumprod(1 + strategy_returns)
+        peaks = np.maximum(self.peak, np.maximum.accumulate(values))
+        drawdowns = values / peaks - 1
+        self.drawdown = float(drawdowns[-1])
+        self.min_drawdown = min(self.min_drawdown, float(drawdowns.min()))
+        self._merge_moments(strategy_returns)
+        self.last_price, self.last_signal = float(prices[-1]), float(signals[-1])
+        self.value, self.peak = float(values[-1]), float(peaks[-1])
+        return values
+
+    def update(self, price: float, signal: float) -> float:
+        """
+        Append one observation in O(1) time and memory.
+        Args:
+            price (float): New price.
+            signal (float): New position signal.
+        Returns:
+            float: Portfolio value after the observation.
+        """
+        price, signal = float(price), float(signal)
+        if not (math.isfinite(price) and price > 0 and math.isfinite(signal)):
+            raise ValueError("Prices must be finite and positive, and signals finite.")
+        if self.n == 0:
+            strategy_return = 0.0
+        else:
+            held = self.last_signal
+            strategy_return = (price / self.last_price - 1) * held - self.transaction_cost * abs(signal - held)
+        self.value *= 1 + strategy_return
+        self.peak = max(self.peak, self.value)
+        self.drawdown = self.value / self.peak - 1
+        self.min_drawdown = min(self.min_drawdown, self.drawdown)
+        # Welford update of the return moments
+        self.n += 1
+        delta = strategy_return - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (strategy_return - self.mean)
+        self.last_price, self.last_signal = price, signal
+        return self.value
+
+    @classmethod
+    def from_results(cls, results, initial_cash: float = 1_000_000, transaction_cost: float = 0.001) -> 'IncrementalBacktest':
+        """
+        Rebuild the terminal state from a ``BacktestEngine.run`` result frame.
+        Args:
+            results (pd.DataFrame): Backtest results with price, signal, strategy_returns,
+                portfolio_value and drawdown columns.
+        Returns:
+            IncrementalBacktest: State positioned after the last row.
+        """
+        state = cls(initial_cash, transaction_cost)
+        if len(results):
+            values = results['portfolio_value'].to_numpy(dtype=np.float64)
+            state.last_price = float(results['price'].iloc[-1])
+            state.last_signal = float(results['signal'].iloc[-1])
+            state.value = float(values[-1])
+            state.peak = max(float(initial_cash), float(values.max()))
+            state.drawdown = float(results['drawdown'].iloc[-1])
+            state.min_drawdown = float(results['drawdown'].min())
+            state._merge_moments(results['strategy_returns'].to_numpy(dtype=np.float64))
+        return state
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Current risk score, max drawdown and Sharpe ratio (same definitions as the API).
+        Returns:
+            Dict[str, float]: 'risk_score', 'max_drawdown', 'sharpe_ratio'.
+        """
+        std = np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+        return {
+            'risk_score': float(min(1.0, max(0.0, -self.min_drawdown * 10))),
+            'max_drawdown': self.min_drawdown,
+            'sharpe_ratio': float(np.sqrt(252) * self.mean / (std + 1e-9)),
+        }
+
+    def copy(self) -> 'IncrementalBacktest':
+        return copy.copy(self)
+
+    def _merge_moments(self, x: np.ndarray) -> None:
+        # Chan et al. parallel update of count, mean and sum of squared deviations
+        n_b = len(x)
+        if not n_b:
+            return
+        mean_b = float(x.mean())
+        m2_b = float(((x - mean_b) ** 2).sum())
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
@@ -1,5 +1,10 @@
+import logging
 import numpy as np
 import pandas as pd
+from typing import Dict, Sequence, Union
+from src.monitoring.instrumentation import timed
+
+logger = logging.getLogger(__name__)
 
 def sortino_ratio(returns: pd.Series, risk_free_rate: float = 0.0) -> float:
     """
@@ -11,12 +16,11 @@ def sortino_ratio(returns: pd.Series, risk_free_rate: float = 0.0) -> float:
         float: Sortino ratio.
     """
     try:
-        downside = returns[returns < 0]
-        downside_std = downside.std() + 1e-9
+        downside_std = float(_downside_std(np.asarray(returns, dtype=np.float64)[:, None])[0]) + 1e-9
         excess = returns.mean() - risk_free_rate / 252
         return np.sqrt(252) * excess / downside_std
-    except Exception as e:
-        print(f"Error in Sortino ratio: {e}")
+    except Exception:
+        logger.exception("Error in Sortino ratio")
         return np.nan
 
 def calmar_ratio(returns: pd.Series, max_drawdown: float) -> float:
@@ -31,6 +35,106 @@ def calmar_ratio(returns: pd.Series, max_drawdown: float) -> float:
     try:
         annual_return = returns.mean() * 252
         return annual_return / abs(max_drawdown + 1e-9)
-    except Exception as e:
-        print(f"Error in Calmar ratio: {e}")
-        return np.nan 
\ No newline at end of file
+    except Exception:
+        logger.exception("Error in Calmar ratio")
+        return np.nan 
+
+@timed('metrics.risk_report')
+def risk_report(returns, levels: Sequence[float] = (0.95, 0.99), risk_free_rate: float = 0.0,
+                omega_threshold: float = 0.0, periods_per_year: int = 252) -> Dict[str, Union[float, np.ndarray]]:
+    """
+    Compute a full risk report from one pass over a returns array.
+
+    The wealth curve, drawdowns, central moments and one sort of the returns are computed
+    once and shared by every metric, so no per-metric rescans or intermediate Series are
+    built. A 2-D (T x S) array is treated as S strategies and every metric comes back as
+    an (S,) vector. Sharpe, Sortino, Calmar and max drawdown follow the definitions of
+    ``BacktestEngine``, ``sortino_ratio`` and ``calmar_ratio``; VaR/CVaR are historical and
+    reported as positive losses.
+    Args:
+        returns (array-like): Period returns, shape (T,) or (T, S).
+        levels (Sequence[float]): Confidence levels for VaR/CVaR.
+        risk_free_rate (float): Risk-free rate (annualized).
+        omega_threshold (float): Return threshold of the Omega ratio.
+        periods_per_year (int): Periods per year for annualization.
+    Returns:
+        Dict[str, float | np.ndarray]: Metric name to value (scalar for 1-D input).
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    squeeze = r.ndim == 1
+    if squeeze:
+        r = r[:, None]
+    n = r.shape[0]
+    labels = [f"{level * 100:g}".replace('.', '_') for level in levels]
+    if n == 0:
+        # No returns: every metric is undefined
+        keys = ['annual_return', 'annual_volatility', 'sharpe_ratio', 'sortino_ratio', 'calmar_ratio',
+                'omega_ratio', 'max_drawdown', 'max_drawdown_duration', 'ulcer_index', 'hit_rate',
+                'skewness', 'kurtosis']
+        keys += [f'{kind}_{label}' for label in labels for kind in ('var', 'cvar')]
+        if squeeze:
+            return {k: np.nan for k in keys}
+        return {k: np.full(r.shape[1], np.nan) for k in keys}
+    ann = np.sqrt(periods_per_year)
+
+    mean = r.mean(axis=0)
+    dev = r - mean
+    dev2 = dev * dev
+    m2 = dev2.sum(axis=0)
+    m3 = (dev2 * dev).sum(axis=0)
+    m4 = (dev2 * dev2).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.full(mean.shape, np.nan)
+        skew = (m3 / n) / (m2 / n) ** 1.5
+        kurt = (m4 / n) / (m2 / n) ** 2 - 3
+
+    wealth = np.cumprod(1 + r, axis=0)
+    peak = np.maximum.accumulate(wealth, axis=0)
+    drawdown = wealth / peak - 1
+    mdd = drawdown.min(axis=0)
+    positions = np.arange(n)[:, None]
+    last_peak = np.maximum.accumulate(np.where(drawdown < 0, -1, positions), axis=0)
+    duration = (positions - last_peak).max(axis=0)
+
+    gains = np.maximum(r - omega_threshold, 0.0).sum(axis=0)
+    losses = np.maximum(omega_threshold - r, 0.0).sum(axis=0)
+    excess = mean - risk_free_rate / periods_per_year
+    with np.errstate(invalid='ignore', divide='ignore'):
+        report: Dict[str, np.ndarray] = {
+            'annual_return': mean * periods_per_year,
+            'annual_volatility': std * ann,
+            'sharpe_ratio': ann * excess / (std + 1e-9),
+            'sortino_ratio': ann * excess / (_downside_std(r) + 1e-9),
+            'calmar_ratio': mean * periods_per_year / np.abs(mdd + 1e-9),
+            'omega_ratio': gains / losses,
+            'max_drawdown': mdd,
+            'max_drawdown_duration': duration.astype(np.float64),
+            'ulcer_index': np.sqrt((drawdown * drawdown).mean(axis=0)),
+            'hit_rate': (r > 0).mean(axis=0),
+            'skewness': skew,
+            'kurtosis': kurt,
+        }
+
+    ordered = np.sort(r, axis=0)
+    tail_sums = np.cumsum(ordered, axis=0)
+    for level, label in zip(levels, labels):
+        pos = (1 - level) * (n - 1)
+        lo, frac = int(np.floor(pos)), pos - np.floor(pos)
+        hi = min(lo + 1, n - 1)
+        quantile = ordered[lo] + (ordered[hi] - ordered[lo]) * frac
+        k = max(1, int(np.ceil(round((1 - level) * n, 9))))
+        report[f'var_{label}'] = -quantile
+        report[f'cvar_{label}'] = -tail_sums[k - 1] / k
+
+    if squeeze:
+        return {k: float(v[0]) for k, v in report.items()}
+    return report
+
+def _downside_std(r: np.ndarray) -> np.ndarray:
+    """Sample std of the negative returns per column, without materializing a filtered copy."""
+    neg = r < 0
+    n_neg = neg.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        neg_mean = np.where(neg, r, 0.0).sum(axis=0) / n_neg
+        neg_var = (np.where(neg, r - neg_mean, 0.0) ** 2).sum(axis=0) / (n_neg - 1)
+    return np.where(n_neg > 1, np.sqrt(neg_var), np.nan)
@@ -1,7 +1,10 @@
+import logging
 import pandas as pd
 import numpy as np
 from typing import Callable
 
+logger = logging.getLogger(__name__)
+
 def stress_test(portfolio: pd.DataFrame, returns_col: str = 'strategy_returns', shock: float = -0.05) -> pd.DataFrame:
     """
     Apply a shock to returns and recalculate portfolio value.
@@ -17,6 +20,6 @@ def stress_test(portfolio: pd.DataFrame, returns_col: str = 'strategy_returns',
         stressed[returns_col] += shock
         stressed['stressed_value'] = (1 + stressed[returns_col]).cumprod() * stressed['portfolio_value'].iloc[0]
         return stressed
-    except Exception as e:
-        print(f"Error in stress test: {e}")
+    except Exception:
+        logger.exception("Error in stress test")
         return pd.DataFrame() 
\ No newline at end of file
@@ -0,0 +1,245 @@
+import copy
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from src.backtesting.engine import BacktestEngine
+from src.data.hashing import fingerprint, func_identity
+from src.monitoring.instrumentation import timed
+
+
+def walk_forward_splits(n_samples: int, train_size: int, test_size: int, step: Optional[int] = None,
+                        expanding: bool = True, gap: int = 0) -> List[Tuple[slice, slice]]:
+    """
+    Rolling-origin train/test splits in time order.
+    Args:
+        n_samples (int): Number of observations.
+        train_size (int): Length of the first training window (of every window if not expanding).
+        test_size (int): Length of each test window.
+        step (int, optional): Origin advance between folds (defaults to ``test_size``).
+        expanding (bool): Grow the training window from the start instead of rolling it.
+        gap (int): Observations skipped between the end of training and the test window.
+    Returns:
+        List[Tuple[slice, slice]]: Positional (train, test) slices.
+    """
+    if train_size < 1 or test_size < 1:
+        raise ValueError("train_size and test_size must be positive.")
+    step = step or test_size
+    splits = []
+    end = train_size
+    while end + gap < n_samples:
+        start = 0 if expanding else end - train_size
+        splits.append((slice(start, end), slice(end + gap, min(end + gap + test_size, n_samples))))
+        end += step
+    return splits
+
+
+def var_forecast(model: Any, X: Any, alpha: float = 0.99) -> np.ndarray:
+    """Prediction function for ``TailRiskModel``: the fitted VaR held over the test window."""
+    return np.full(len(X), model.var(alpha))
+
+
+def factor_exposures(model: Any, X: Any) -> np.ndarray:
+    """Prediction function for ``RiskFactorModel``: factor scores of the test rows under the fold's loadings."""
+    return model.transform(np.asarray(X, dtype=np.float64))
+
+
+class WalkForward:
+    """
+    Walk-forward (rolling-origin) evaluation of a model with cached refits.
+
+    Each fold builds a model with ``model_factory``, fits it on the training window and
+    predicts the test window; the out-of-sample predictions are concatenated in time order
+    and can be passed straight to ``BacktestEngine`` via ``backtest``. Fitting follows what
+    the model supports:
+
+    - ``partial_fit`` (with ``warm_start`` and expanding splits): one incremental chain, each
+      fold updating the previous fold's model with only the newly added rows.
+    - ``warm_start=True`` set on the model (sklearn convention, ``TailRiskModel``): each fold
+      refits a copy of the previous fold's model on the full window, starting from its solution.
+    - otherwise folds are independent and refit in parallel across ``n_jobs`` processes
+      (``EnsembleModel``, and ``RiskFactorModel`` with ``predict_fn=factor_exposures``).
+
+    Fold artifacts (fitted model and predictions) are pickled under ``cache_dir`` keyed by
+    the identities of the factory, ``fit_fn`` and ``predict_fn`` (name plus code, defaults,
+    closure values and ``partial`` arguments) and the fold's data, so a rerun after appending
+    data only fits new folds. A factory bound to objects without a stable repr needs an explicit
+    ``name``. ``VolatilityForecaster`` has ``fit``/``partial_fit``/``predict`` and runs as an
+    incremental chain; models with other training APIs plug in via ``fit_fn``/``predict_fn``.
+    For process-parallel runs, the factory and functions must be picklable top-level callables.
+    """
+    def __init__(self, model_factory: Callable[[], Any], fit_fn: Optional[Callable] = None,
+                 predict_fn: Optional[Callable] = None, warm_start: bool = True, n_jobs: int = 1,
+                 cache_dir: Optional[str] = None, name: Optional[str] = None):
+        """
+        Args:
+            model_factory (Callable): Returns a new unfitted model.
+            fit_fn (Callable, optional): ``fit_fn(model, X, y)``; defaults to ``model.fit(X, y)`` (or ``model.fit(X)`` without y).
+            predict_fn (Callable, optional): ``predict_fn(model, X)``; defaults to ``model.predict(X)``.
+            warm_start (bool): Reuse the previous fold's fit where the model supports it.
+            n_jobs (int): Worker processes for independent folds.
+            cache_dir (str, optional): Directory for fold artifacts.
+            name (str, optional): Model identity for the cache key, replacing the factory's identity.
+        """
+        self.model_factory = model_factory
+        self.fit_fn = fit_fn
+        self.predict_fn = predict_fn
+        self.warm_start = warm_start
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        self.name = name
+        self.folds: List[Dict[str, Any]] = []
+        self.predictions = None
+        self._identity = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Functions are part of the key: a different predict_fn must not reuse cached predictions
+            factory = name if name is not None else func_identity(model_factory, stable=True)
+            self._identity = fingerprint(factory, *(func_identity(f, stable=True) if f is not None else None
+                                                   for f in (fit_fn, predict_fn)))
+
+    def run(self, X: Any, y: Any = None, splits: Optional[List[Tuple[slice, slice]]] = None,
+            **split_params) -> Union[pd.Series, pd.DataFrame]:
+        """
+        Fit and predict every fold.
+        Args:
+            X (np.ndarray or pd.DataFrame/Series): Features in time order (1-D returns for ``TailRiskModel``).
+            y (array-like, optional): Targets aligned with X.
+            splits (List[Tuple[slice, slice]], optional): Precomputed splits; otherwise built by
+                ``walk_forward_splits(len(X), **split_params)``.
+        Returns:
+            pd.Series or pd.DataFrame: Out-of-sample predictions indexed like X's test rows
+                (a frame for multi-output models).
+        """
+        splits = splits if splits is not None else walk_forward_splits(len(X), **split_params)
+        probe = self.model_factory()
+        expanding = all(train.start == 0 for train, _ in splits)
+        if self.warm_start and hasattr(probe, 'partial_fit') and expanding:
+            mode = 'incremental'
+        elif self.warm_start and getattr(probe, 'warm_start', False) is True:
+            mode = 'warm'
+        else:
+            mode = 'independent'
+        keys = [self._key(X, y, train, test, mode, splits[:i]) for i, (train, test) in enumerate(splits)]
+        artifacts: List[Optional[Dict[str, Any]]] = [self._load(k) for k in keys]
+        cached = [a is not None for a in artifacts]
+
+        todo = [i for i, a in enumerate(artifacts) if a is None]
+        if mode == 'independent' and self.n_jobs > 1 and len(todo) > 1:
+            ctx = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(todo)), mp_context=ctx) as pool:
+                futures = {i: pool.submit(_fit_fold, self.model_factory, self.fit_fn, self.predict_fn, None, 'independent',
+                                          _take(X, splits[i][0]), _take(y, splits[i][0]), _take(X, splits[i][1]))
+                           for i in todo}
+                for i, future in futures.items():
+                    artifacts[i] = future.result()
+                    self._save(keys[i], artifacts[i])
+        else:
+            previous = None
+            for i, (train, test) in enumerate(splits):
+                if artifacts[i] is None:
+                    if mode == 'incremental' and previous is not None:
+                        done = splits[i - 1][0].stop
+                        rows = slice(done, train.stop)
+                    else:
+                        rows = train
+                    artifacts[i] = _fit_fold(self.model_factory, self.fit_fn, self.predict_fn, previous, mode,
+                                             _take(X, rows), _take(y, rows), _take(X, test))
+                    self._save(keys[i], artifacts[i])
+                previous = artifacts[i]['model']
+
+        index = X.index if isinstance(X, (pd.Series, pd.DataFrame)) else pd.RangeIndex(len(X))
+        self.folds = []
+        parts = []
+        for i, ((train, test), artifact) in enumerate(zip(splits, artifacts)):
+            self.folds.append({'fold': i, 'train': (train.start, train.stop), 'test': (test.start, test.stop),
+                               'fit_seconds': artifact['fit_seconds'], 'cached': cached[i], 'model': artifact['model']})
+            values = np.asarray(artifact['predictions']).reshape(len(index[test]), -1)
+            parts.append(pd.Series(values[:, 0], index=index[test]) if values.shape[1] == 1
+                         else pd.DataFrame(values, index=index[test]))
+        predictions = pd.concat(parts) if parts else pd.Series(dtype=np.float64)
+        # Overlapping test windows (step < test_size) keep the forecast from the latest origin
+        self.predictions = predictions[~predictions.index.duplicated(keep='last')]
+        return self.predictions
+
+    def backtest(self, prices: pd.DataFrame, signal_fn: Callable[[pd.Series], pd.Series] = np.sign,
+                 engine: Optional[BacktestEngine] = None, volume: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Backtest signals derived from the out-of-sample predictions over the test period.
+        Args:
+            prices (pd.DataFrame): Prices indexed like X.
+            signal_fn (Callable): Maps predictions to position signals (default: their sign).
+            engine (BacktestEngine, optional): Engine to use (default: ``BacktestEngine()``).
+            volume (pd.DataFrame, optional): Volume for volume-driven cost models.
+        Returns:
+            pd.DataFrame: ``BacktestEngine.run`` results over the out-of-sample rows.
+        """
+        if self.predictions is None:
+            raise ValueError("Run the walk-forward first.")
+        engine = engine or BacktestEngine()
+        oos = prices.loc[self.predictions.index]
+        signals = pd.Series(np.asarray(signal_fn(self.predictions), dtype=np.float64), index=self.predictions.index)
+        return engine.run(oos, signals, volume=volume.loc[oos.index] if volume is not None else None)
+
+    def _key(self, X, y, train: slice, test: slice, mode: str, history: List[Tuple[slice, slice]]) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        # Incremental/warm fits depend on every earlier fold, so their origins are part of the key
+        origins = [(tr.start, tr.stop) for tr, _ in history] if mode != 'independent' else []
+        return fingerprint(self._identity, mode, origins, _as_hashable(_take(X, train)), _as_hashable(_take(y, train)),
+                           _as_hashable(_take(X, test)))
+
+    def _load(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        path = os.path.join(self.cache_dir, f'fold_{key}.pkl')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _save(self, key: Optional[str], artifact: Dict[str, Any]) -> None:
+        if key is None:
+            return
+        tmp = os.path.join(self.cache_dir, f'fold_{key}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(self.cache_dir, f'fold_{key}.pkl'))
+
+
+@timed('walk_forward.fold')
+def _fit_fold(model_factory: Callable, fit_fn: Optional[Callable], predict_fn: Optional[Callable], previous: Any,
+              mode: str, X_train: Any, y_train: Any, X_test: Any) -> Dict[str, Any]:
+    """Fit one fold and predict its test window (top-level so process workers can run it)."""
+    start = time.perf_counter()
+    if previous is None:
+        model = model_factory()
+    else:
+        model = copy.deepcopy(previous)
+    if mode == 'incremental' and previous is not None:
+        model.partial_fit(X_train) if y_train is None else model.partial_fit(X_train, y_train)
+    elif fit_fn is not None:
+        fit_fn(model, X_train, y_train)
+    else:
+        model.fit(X_train) if y_train is None else model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    predictions = predict_fn(model, X_test) if predict_fn is not None else model.predict(X_test)
+    return {'model': model, 'predictions': np.asarray(predictions), 'fit_seconds': fit_seconds}
+
+
+def _take(data: Any, rows: slice) -> Any:
+    if data is None:
+        return None
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        return data.iloc[rows]
+    return data[rows]
+
+
+def _as_hashable(data: Any) -> Any:
+    if data is None or isinstance(data, (np.ndarray, pd.Series, pd.DataFrame)):
+        return data
+    return np.asarray(data)
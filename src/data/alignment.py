@@ -0,0 +1,87 @@
+import os
+from collections import OrderedDict
+import pandas as pd
+from typing import Dict, Optional
+from src.data.hashing import fingerprint
+from src.data.panel import panel_dates
+
+_MEMORY_CACHE: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_MEMORY_CACHE_SIZE = 8
+
+
+def align_point_in_time(prices: pd.DataFrame, macro: Optional[pd.DataFrame] = None, vix: Optional[pd.DataFrame] = None,
+                        release_lags: Optional[Dict[str, int]] = None, vix_col: str = 'Close',
+                        cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    As-of join FRED macro series and VIX onto a long price panel without look-ahead.
+
+    Every exogenous value is stamped with the date it became available (observation
+    date plus its release lag in business days). The stamped series are combined on one
+    sorted date index and forward-filled, then joined onto the date-sorted panel with a
+    single backward ``merge_asof``, so each row only sees values published on or before
+    its own date. Results are memoized in-process and, if ``cache_dir`` is given, on disk.
+    Args:
+        prices (pd.DataFrame): Long panel from ``YahooFinanceCollector.fetch_data`` (compact or not).
+        macro (pd.DataFrame, optional): Output of ``FREDCollector.fetch_data``.
+        vix (pd.DataFrame, optional): Output of ``VIXCollector.fetch_data``.
+        release_lags (Dict[str, int], optional): Business-day lag per exogenous column ('VIX' for VIX).
+        vix_col (str): VIX column to join, stored as 'VIX'.
+        cache_dir (str, optional): Directory for the on-disk cache.
+    Returns:
+        pd.DataFrame: Panel sorted by date with one extra column per exogenous series.
+    """
+    release_lags = dict(release_lags or {})
+    key = fingerprint(prices, macro, vix, sorted(release_lags.items()), vix_col)
+    if key in _MEMORY_CACHE:
+        _MEMORY_CACHE.move_to_end(key)
+        return _MEMORY_CACHE[key].copy()
+    path = os.path.join(cache_dir, f'pit_{key}.pkl') if cache_dir else None
+    if path and os.path.exists(path):
+        aligned = pd.read_pickle(path)
+    else:
+        aligned = _align(prices, macro, vix, release_lags, vix_col)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            aligned.to_pickle(path)
+    _MEMORY_CACHE[key] = aligned
+    if len(_MEMORY_CACHE) > _MEMORY_CACHE_SIZE:
+        _MEMORY_CACHE.popitem(last=False)
+    return aligned.copy()
+
+
+def _align(prices: pd.DataFrame, macro: Optional[pd.DataFrame], vix: Optional[pd.DataFrame],
+           release_lags: Dict[str, int], vix_col: str) -> pd.DataFrame:
+    series = []
+    if macro is not None:
+        for col in macro.columns:
+            if col != 'Date':
+                series.append(_stamp(macro['Date'], macro[col], col, release_lags.get(col, 0)))
+    if vix is not None:
+        series.append(_stamp(vix['Date'], vix[vix_col], 'VIX', release_lags.get('VIX', 0)))
+
+    dates = _naive(panel_dates(prices))
+    order = dates.argsort(kind='stable')
+    panel = prices.iloc[order].reset_index(drop=True)
+    if not series:
+        panel.attrs = dict(prices.attrs)
+        return panel
+    exog = pd.concat(series, axis=1, sort=True).ffill()
+    exog.index.name = '_pit_date'
+    left = pd.DataFrame({'_pit_date': dates[order]})
+    joined = pd.merge_asof(left, exog.reset_index(), on='_pit_date', direction='backward')
+    aligned = pd.concat([panel, joined.drop(columns='_pit_date')], axis=1)
+    aligned.attrs = dict(prices.attrs)
+    return aligned
+
+
+def _stamp(dates: pd.Series, values: pd.Series, name: str, lag: int) -> pd.Series:
+    available = _naive(pd.DatetimeIndex(pd.to_datetime(dates)))
+    if lag:
+        available = available + pd.offsets.BDay(lag)
+    s = pd.Series(values.to_numpy(), index=available, name=name).dropna()
+    return s[~s.index.duplicated(keep='last')]
+
+
+def _naive(dates: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    dates = dates.tz_localize(None) if dates.tz is not None else dates
+    return dates.as_unit('ns')
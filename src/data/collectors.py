@@ -1,22 +1,26 @@
+import logging
 from typing import Any, Dict
-import yfinance as yf
 import pandas as pd
-from fredapi import Fred
 import os
 import datetime
+from src.data.panel import compact_panel
+
+logger = logging.getLogger(__name__)
 
 class YahooFinanceCollector:
     """Collects historical price and volume data from Yahoo Finance."""
-    def fetch_data(self, tickers: list[str], start: str, end: str) -> pd.DataFrame:
+    def fetch_data(self, tickers: list[str], start: str, end: str, compact: bool = False) -> pd.DataFrame:
         """
         Fetch data for given tickers and date range from Yahoo Finance.
         Args:
             tickers (list[str]): List of ticker symbols.
             start (str): Start date (YYYY-MM-DD).
             end (str): End date (YYYY-MM-DD).
+            compact (bool): Return the memory-compact layout from ``src.data.panel.compact_panel``.
         Returns:
             pd.DataFrame: Multi-index DataFrame with ticker and date.
         """
+        import yfinance as yf
         try:
             data = yf.download(tickers, start=start, end=end, group_by='ticker', auto_adjust=True, progress=False)
             if isinstance(data.columns, pd.MultiIndex):
@@ -26,9 +30,11 @@ class YahooFinanceCollector:
                 # Single ticker: add Ticker column
                 data = data.reset_index()
                 data['Ticker'] = tickers[0] if tickers else None
+            if compact:
+                data = compact_panel(data)
             return data
-        except Exception as e:
-            print(f"Error fetching Yahoo Finance data: {e}")
+        except Exception:
+            logger.exception("Error fetching Yahoo Finance data")
             raise
 
     def validate_data(self, data: Any) -> bool:
@@ -40,14 +46,14 @@ class YahooFinanceCollector:
             bool: True if valid, False otherwise.
         """
         if not isinstance(data, pd.DataFrame):
-            print("Data is not a DataFrame.")
+            logger.warning("Data is not a DataFrame.")
             return False
         required_cols = {'Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume'}
         if not required_cols.issubset(set(data.columns)):
-            print(f"Missing required columns: {required_cols - set(data.columns)}")
+            logger.warning("Missing required columns: %s", required_cols - set(data.columns))
             return False
         if data.isnull().sum().sum() > 0:
-            print("Data contains missing values.")
+            logger.warning("Data contains missing values.")
             return False
         return True
 
@@ -61,6 +67,7 @@ class FREDCollector:
         self.api_key = api_key or os.getenv("FRED_API_KEY")
         if not self.api_key:
             raise ValueError("FRED API key must be provided or set as FRED_API_KEY environment variable.")
+        from fredapi import Fred
         self.fred = Fred(api_key=self.api_key)
 
     def fetch_data(self, series_ids: list[str], start: str, end: str) -> pd.DataFrame:
@@ -82,8 +89,8 @@ class FREDCollector:
             df.index.name = "Date"
             df = df.reset_index()
             return df
-        except Exception as e:
-            print(f"Error fetching FRED data: {e}")
+        except Exception:
+            logger.exception("Error fetching FRED data")
             raise
 
     def validate_data(self, data: Any) -> bool:
@@ -95,17 +102,17 @@ class FREDCollector:
             bool: True if valid, False otherwise.
         """
         if not isinstance(data, pd.DataFrame):
-            print("FRED data is not a DataFrame.")
+            logger.warning("FRED data is not a DataFrame.")
             return False
         if data.shape[1] < 2:  # At least Date + 1 series
-            print("FRED data missing expected columns.")
+            logger.warning("FRED data missing expected columns.")
             return False
         # Allow some missing values, but not all missing for any series
         for col in data.columns:
             if col == "Date":
                 continue
             if data[col].isnull().all():
-                print(f"All values missing for series: {col}")
+                logger.warning("All values missing for series: %s", col)
                 return False
         return True
 
@@ -120,6 +127,7 @@ class VIXCollector:
         Returns:
             pd.DataFrame: DataFrame with VIX data.
         """
+        import yfinance as yf
         try:
             data = yf.download("^VIX", start=start, end=end, auto_adjust=True, progress=False)
             if isinstance(data.columns, pd.MultiIndex):
@@ -128,8 +136,8 @@ class VIXCollector:
             data = data.reset_index()
             data['Symbol'] = 'VIX'
             return data
-        except Exception as e:
-            print(f"Error fetching VIX data: {e}")
+        except Exception:
+            logger.exception("Error fetching VIX data")
             raise
 
     def validate_data(self, data: Any) -> bool:
@@ -141,18 +149,18 @@ class VIXCollector:
             bool: True if valid, False otherwise.
         """
         if not isinstance(data, pd.DataFrame):
-            print("VIX data is not a DataFrame.")
+            logger.warning("VIX data is not a DataFrame.")
             return False
         if data.empty:
-            print("VIX data is empty.")
+            logger.warning("VIX data is empty.")
             return False
         required_cols = {'Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Symbol'}
         missing_cols = required_cols - set(data.columns)
         if missing_cols:
-            print(f"Missing required columns: {missing_cols}")
+            logger.warning("Missing required columns: %s", missing_cols)
             return False
         if data['Close'].isnull().all():
-            print("All VIX close values are missing.")
+            logger.warning("All VIX close values are missing.")
             return False
         return True
 
@@ -187,8 +195,8 @@ class SentimentCollector:
             # TODO: Implement Reddit API fetch (e.g., using praw)
             # TODO: Aggregate and return sentiment scores
             raise NotImplementedError("Sentiment data collection not yet implemented.")
-        except Exception as e:
-            print(f"Error fetching sentiment data: {e}")
+        except Exception:
+            logger.exception("Error fetching sentiment data")
             raise
 
     def validate_data(self, data: Any) -> bool:
@@ -0,0 +1,70 @@
+import functools
+import hashlib
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Callable
+
+# Default object reprs embed the memory address, which changes between processes
+_ADDRESS_REPR = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+def fingerprint(*objs: Any) -> str:
+    """
+    Compute a stable content hash of arrays, pandas objects and plain parameters.
+    Args:
+        *objs (Any): Objects to hash (np.ndarray, pd.Series/DataFrame, or repr-able values).
+    Returns:
+        str: Hex digest.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        if isinstance(obj, (pd.Series, pd.DataFrame)):
+            h.update(b'pd')
+            if isinstance(obj, pd.DataFrame):
+                h.update(repr(list(obj.columns)).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        elif isinstance(obj, np.ndarray):
+            arr = np.ascontiguousarray(obj)
+            h.update(f'np{arr.dtype.str}{arr.shape}'.encode())
+            h.update(arr.data if arr.dtype != object else repr(arr.tolist()).encode())
+        else:
+            h.update(repr(obj).encode())
+        h.update(b'|')
+    return h.hexdigest()
+
+
+def func_identity(func: Callable, stable: bool = False) -> str:
+    """
+    Identity of a callable for cache keys: its qualified name plus a hash of what it computes
+    (bytecode, constants, defaults, closure values and ``functools.partial`` arguments).
+    Args:
+        func (Callable): Function, lambda, class or ``functools.partial``.
+        stable (bool): Raise ``ValueError`` if part of the identity is an object that reprs by
+            memory address, i.e. would not match across processes.
+    Returns:
+        str: Hex digest (or the qualified name for callables without bytecode, e.g. classes).
+    """
+    if isinstance(func, functools.partial):
+        values = list(func.args) + sorted(func.keywords.items())
+        _check_stable(func, values, stable)
+        return fingerprint(func_identity(func.func, stable), func.args, sorted(func.keywords.items()))
+    name = f"{getattr(func, '__module__', None)}.{getattr(func, '__qualname__', type(func).__qualname__)}"
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return name
+    closure = [cell.cell_contents for cell in func.__closure__ or ()]
+    closure = [func_identity(v, stable) if hasattr(v, '__code__') else v for v in closure]
+    _check_stable(func, [func.__defaults__, func.__kwdefaults__] + closure, stable)
+    return fingerprint(name, _code_state(code), func.__defaults__, func.__kwdefaults__, *closure)
+
+
+def _code_state(code) -> tuple:
+    # Nested code objects (inner lambdas, comprehensions) repr with their address, so recurse into them
+    consts = tuple(_code_state(c) if hasattr(c, 'co_code') else c for c in code.co_consts)
+    return (code.co_code, consts, code.co_names)
+
+
+def _check_stable(func: Callable, values: list, stable: bool) -> None:
+    if stable and any(_ADDRESS_REPR.search(repr(v)) for v in values):
+        raise ValueError(f"{func!r} is bound to objects without a stable identity; pass an explicit name.")
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from typing import Sequence
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+DATE_EPOCH = pd.Timestamp('1970-01-01')
+
+
+def compact_panel(df: pd.DataFrame, price_cols: Sequence[str] = PRICE_COLUMNS, price_dtype: str = 'float32',
+                  rtol: float = 1e-6, exact: bool = False) -> pd.DataFrame:
+    """
+    Convert a long-format OHLCV panel to a memory-compact layout.
+
+    Tickers become categorical, prices are downcast to ``price_dtype`` when the
+    downcast stays within ``rtol`` relative error (columns that fail the check keep
+    float64), Volume becomes int64 and Date becomes int32 day offsets from 1970-01-01.
+    Args:
+        df (pd.DataFrame): Long-format panel with 'Date' and 'Ticker' columns.
+        price_cols (Sequence[str]): Price columns to downcast.
+        price_dtype (str): Target float dtype for prices.
+        rtol (float): Maximum relative error tolerated by the downcast.
+        exact (bool): Keep prices as float64 so the panel round-trips losslessly.
+    Returns:
+        pd.DataFrame: Compact panel (``attrs['compact']`` is True).
+    """
+    out = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col == 'Date':
+            dates = pd.to_datetime(df[col])
+            if getattr(dates.dt, 'tz', None) is not None:
+                dates = dates.dt.tz_localize(None)
+            out[col] = ((dates - DATE_EPOCH) // pd.Timedelta(days=1)).to_numpy().astype(np.int32)
+        elif col == 'Ticker':
+            out[col] = pd.Categorical(values)
+        elif col == 'Volume':
+            volume = df[col]
+            out[col] = volume.astype('Int64') if volume.isnull().any() else volume.to_numpy().astype(np.int64)
+        elif col in price_cols and not exact:
+            out[col] = _downcast(values.astype(np.float64), price_dtype, rtol)
+        else:
+            out[col] = values
+    out.attrs['compact'] = True
+    return out
+
+
+def expand_panel(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Restore a compact panel to the layout returned by ``YahooFinanceCollector.fetch_data``.
+    Args:
+        df (pd.DataFrame): Panel produced by ``compact_panel``.
+    Returns:
+        pd.DataFrame: Panel with datetime 'Date', object 'Ticker' and float64 prices/volume.
+    """
+    if not is_compact(df):
+        return df
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        if col == 'Date':
+            out[col] = DATE_EPOCH + pd.to_timedelta(df[col].to_numpy().astype(np.int64), unit='D')
+        elif col == 'Ticker':
+            out[col] = df[col].astype(object)
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            out[col] = df[col].astype(np.float64)
+        else:
+            out[col] = df[col]
+    return out
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    """Return True if ``df`` was produced by ``compact_panel``."""
+    return bool(df.attrs.get('compact', False))
+
+
+def panel_dates(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """
+    Return the 'Date' column of a compact or regular panel as a DatetimeIndex.
+    Args:
+        df (pd.DataFrame): Long-format panel.
+    Returns:
+        pd.DatetimeIndex: Dates for each row.
+    """
+    if is_compact(df):
+        return pd.DatetimeIndex(DATE_EPOCH + pd.to_timedelta(df['Date'].to_numpy().astype(np.int64), unit='D'))
+    return pd.DatetimeIndex(pd.to_datetime(df['Date']))
+
+
+def panel_to_wide(df: pd.DataFrame, field: str = 'Close') -> pd.DataFrame:
+    """
+    Pivot a long panel (compact or not) to a wide Date x Ticker frame for one field.
+    Args:
+        df (pd.DataFrame): Long-format panel with 'Date' and 'Ticker' columns.
+        field (str): Column to pivot (e.g. 'Close').
+    Returns:
+        pd.DataFrame: Wide frame indexed by date with one column per ticker.
+    """
+    wide = pd.DataFrame({'Date': panel_dates(df), 'Ticker': df['Ticker'].to_numpy(), field: df[field].to_numpy()})
+    wide = wide.pivot(index='Date', columns='Ticker', values=field)
+    wide.columns = wide.columns.astype(object)
+    wide.columns.name = None
+    return wide
+
+
+def _downcast(values: np.ndarray, dtype: str, rtol: float) -> np.ndarray:
+    cast = values.astype(dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        err = np.abs(cast.astype(np.float64) - values) / np.abs(values)
+    err = err[np.isfinite(err)]
+    if err.size and err.max() > rtol:
+        return values
+    return cast
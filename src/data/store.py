@@ -0,0 +1,132 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+from src.data.panel import panel_to_wide
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class PriceStore:
+    """
+    Read-only memory-mapped store for an adjusted OHLCV panel.
+
+    Each field is saved as a (dates x tickers) ``.npy`` file next to a ``dates.npy``
+    index and a ``meta.json`` ticker index. Opening the store maps the files with
+    ``np.load(mmap_mode='r')``, so processes reading the same store share one
+    page-cached copy and slices are views rather than copies.
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Directory written by ``PriceStore.write``.
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.tickers = list(meta['tickers'])
+        self.fields = list(meta['fields'])
+        self._ticker_pos = {t: i for i, t in enumerate(self.tickers)}
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(path, 'dates.npy')))
+        self._arrays = {}
+
+    @classmethod
+    def write(cls, panel: pd.DataFrame, path: str, fields: Sequence[str] = FIELDS, dtype: str = 'float64') -> 'PriceStore':
+        """
+        Write a long-format panel (compact or not) to ``path`` and open it.
+        Args:
+            panel (pd.DataFrame): Long-format panel with 'Date' and 'Ticker' columns.
+            path (str): Target directory (created if missing).
+            fields (Sequence[str]): Columns to store.
+            dtype (str): On-disk dtype of the arrays.
+        Returns:
+            PriceStore: The opened store.
+        """
+        os.makedirs(path, exist_ok=True)
+        fields = [f for f in fields if f in panel.columns]
+        index = None
+        for field in fields:
+            wide = panel_to_wide(panel, field)
+            if index is None:
+                index = wide.index
+                columns = list(wide.columns)
+            wide = wide.reindex(index=index, columns=columns)
+            np.save(os.path.join(path, f'{field}.npy'), np.ascontiguousarray(wide.to_numpy(dtype=dtype)))
+        np.save(os.path.join(path, 'dates.npy'), index.to_numpy(dtype='datetime64[D]'))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'tickers': [str(t) for t in columns], 'fields': fields}, f)
+        return cls(path)
+
+    def array(self, field: str = 'Close') -> np.ndarray:
+        """
+        Return the full memory-mapped (dates x tickers) array for ``field``.
+        Args:
+            field (str): Stored field name.
+        Returns:
+            np.ndarray: Read-only memory-mapped array.
+        """
+        if field not in self.fields:
+            raise KeyError(f"Field not in store: {field}")
+        if field not in self._arrays:
+            self._arrays[field] = np.load(os.path.join(self.path, f'{field}.npy'), mmap_mode='r')
+        return self._arrays[field]
+
+    def slice(self, field: str = 'Close', tickers: Optional[Sequence[str]] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> np.ndarray:
+        """
+        Slice a field by date range and tickers.
+
+        Date ranges and a single ticker (or a contiguous run of tickers) are returned as
+        zero-copy views; an arbitrary ticker list requires a gather and is copied.
+        Args:
+            field (str): Stored field name.
+            tickers (Sequence[str], optional): Tickers to select (all if None).
+            start (str, optional): First date (inclusive).
+            end (str, optional): Last date (inclusive).
+        Returns:
+            np.ndarray: (dates x tickers) array.
+        """
+        arr = self.array(field)[self._date_slice(start, end)]
+        if tickers is None:
+            return arr
+        pos = [self._ticker_pos[t] for t in tickers]
+        if pos == list(range(pos[0], pos[0] + len(pos))):
+            return arr[:, pos[0]:pos[0] + len(pos)]
+        return arr[:, pos]
+
+    def frame(self, field: str = 'Close', tickers: Optional[Sequence[str]] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Wrap a slice in a DataFrame without copying, ready for ``BacktestEngine.run``.
+        Args:
+            field (str): Stored field name.
+            tickers (Sequence[str], optional): Tickers to select (all if None).
+            start (str, optional): First date (inclusive).
+            end (str, optional): Last date (inclusive).
+        Returns:
+            pd.DataFrame: Date-indexed frame with one column per ticker.
+        """
+        dates = self.dates[self._date_slice(start, end)]
+        columns = list(tickers) if tickers is not None else self.tickers
+        return pd.DataFrame(self.slice(field, tickers, start, end), index=dates, columns=columns, copy=False)
+
+    def ohlcv(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Return the OHLCV columns of one ticker, as expected by the ``src.features`` functions.
+        Args:
+            ticker (str): Ticker symbol.
+            start (str, optional): First date (inclusive).
+            end (str, optional): Last date (inclusive).
+        Returns:
+            pd.DataFrame: Date-indexed frame with one column per stored field.
+        """
+        rows = self._date_slice(start, end)
+        col = self._ticker_pos[ticker]
+        data = {field: self.array(field)[rows, col] for field in self.fields}
+        return pd.DataFrame(data, index=self.dates[rows], copy=False)
+
+    def _date_slice(self, start: Optional[str], end: Optional[str]) -> slice:
+        lo = self.dates.searchsorted(pd.Timestamp(start), side='left') if start is not None else None
+        hi = self.dates.searchsorted(pd.Timestamp(end), side='right') if end is not None else None
+        return slice(lo, hi)
@@ -1,6 +1,9 @@
+import logging
 import pandas as pd
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 def rolling_correlation(df: pd.DataFrame, col1: str, col2: str, window: int = 21) -> pd.Series:
     """
     Calculate rolling correlation between two columns.
@@ -14,6 +17,6 @@ def rolling_correlation(df: pd.DataFrame, col1: str, col2: str, window: int = 21
     """
     try:
         return df[col1].rolling(window).corr(df[col2])
-    except Exception as e:
-        print(f"Error in rolling correlation: {e}")
+    except Exception:
+        logger.exception("Error in rolling correlation")
         return pd.Series(index=df.index, dtype=float) 
\ No newline at end of file
@@ -1,7 +1,10 @@
+import logging
 import numpy as np
 import pandas as pd
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 def fractal_dimension(series: pd.Series, window: int = 100) -> pd.Series:
     """
     Estimate the fractal dimension using the box-counting method over a rolling window.
@@ -21,8 +24,8 @@ def fractal_dimension(series: pd.Series, window: int = 100) -> pd.Series:
             coeffs = np.polyfit(np.log(range(2, 10)), np.log(counts), 1)
             return -coeffs[0]
         return series.rolling(window).apply(box_count, raw=False)
-    except Exception as e:
-        print(f"Error in fractal dimension calculation: {e}")
+    except Exception:
+        logger.exception("Error in fractal dimension calculation")
         return pd.Series(index=series.index, dtype=float)
 
 def hurst_exponent(series: pd.Series, window: int = 100) -> pd.Series:
@@ -46,6 +49,6 @@ def hurst_exponent(series: pd.Series, window: int = 100) -> pd.Series:
                 return np.nan
             return np.log(R / S_) / np.log(N) if R > 0 and S_ > 0 else np.nan
         return series.rolling(window).apply(hurst, raw=True)
-    except Exception as e:
-        print(f"Error in Hurst exponent calculation: {e}")
+    except Exception:
+        logger.exception("Error in Hurst exponent calculation")
         return pd.Series(index=series.index, dtype=float) 
\ No newline at end of file
@@ -1,6 +1,9 @@
+import logging
 import pandas as pd
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 def rsi(series: pd.Series, window: int = 14) -> pd.Series:
     """
     Calculate the Relative Strength Index (RSI).
@@ -19,8 +22,8 @@ def rsi(series: pd.Series, window: int = 14) -> pd.Series:
         rs = avg_gain / avg_loss
         rsi = 100 - (100 / (1 + rs))
         return rsi
-    except Exception as e:
-        print(f"Error in RSI calculation: {e}")
+    except Exception:
+        logger.exception("Error in RSI calculation")
         return pd.Series(index=series.index, dtype=float)
 
 def macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
@@ -40,26 +43,29 @@ def macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) ->
         macd_line = ema_fast - ema_slow
         signal_line = macd_line.ewm(span=signal, adjust=False).mean()
         return pd.DataFrame({'MACD': macd_line, 'Signal': signal_line})
-    except Exception as e:
-        print(f"Error in MACD calculation: {e}")
+    except Exception:
+        logger.exception("Error in MACD calculation")
         return pd.DataFrame(index=series.index)
 
-def bollinger_bands(series: pd.Series, window: int = 20, num_std: float = 2.0) -> pd.DataFrame:
+def bollinger_bands(series: pd.Series, window: int = 20, num_std: float = 2.0, store=None) -> pd.DataFrame:
     """
     Calculate Bollinger Bands.
     Args:
         series (pd.Series): Price series.
         window (int): Rolling window size.
         num_std (float): Number of standard deviations.
+        store (FeatureStore, optional): Build the bands from the store's shared rolling mean/std.
     Returns:
         pd.DataFrame: DataFrame with columns 'Middle', 'Upper', 'Lower'.
     """
+    if store is not None:
+        return store.bollinger_bands(series, window, num_std)
     try:
         middle = series.rolling(window).mean()
         std = series.rolling(window).std()
         upper = middle + num_std * std
         lower = middle - num_std * std
         return pd.DataFrame({'Middle': middle, 'Upper': upper, 'Lower': lower})
-    except Exception as e:
-        print(f"Error in Bollinger Bands calculation: {e}")
+    except Exception:
+        logger.exception("Error in Bollinger Bands calculation")
         return pd.DataFrame(index=series.index) 
\ No newline at end of file
@@ -1,6 +1,9 @@
+import logging
 import numpy as np
 import pandas as pd
 from typing import Optional
+
+logger = logging.getLogger(__name__)
 # from hmmlearn.hmm import GaussianHMM  # Uncomment when implementing
 
 def regime_indicator(series: pd.Series, n_states: int = 3) -> Optional[np.ndarray]:
@@ -15,6 +18,6 @@ def regime_indicator(series: pd.Series, n_states: int = 3) -> Optional[np.ndarra
     try:
         # TODO: Implement with hmmlearn
         raise NotImplementedError("Regime detection not yet implemented.")
-    except Exception as e:
-        print(f"Error in regime indicator: {e}")
+    except Exception:
+        logger.exception("Error in regime indicator")
         return None 
\ No newline at end of file
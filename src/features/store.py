@@ -0,0 +1,180 @@
+import os
+import pickle
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Optional, Union
+from src.data.hashing import fingerprint, func_identity
+
+Frame = Union[pd.Series, pd.DataFrame]
+
+
+class FeatureStore:
+    """
+    Memoizing store for ``src.features`` computations.
+
+    Results are keyed by (function, parameters, input fingerprint, date range) and kept in
+    an in-memory LRU, optionally persisted to ``cache_dir`` with LRU eviction on disk. The
+    function part of the key hashes its code, defaults and closure values as well as its
+    name, so lambdas sharing a qualname, or a function edited between runs, never reuse
+    each other's results. Callers get copies, so mutating a result cannot corrupt the cache.
+    Functions registered with a ``lookback`` (rows of history each output needs) are
+    extended incrementally: when the input extends a previously seen series, only the new
+    rows plus ``lookback`` rows of history are recomputed. Common intermediates (log
+    returns, rolling means/stds) are exposed as store methods so composite features
+    share them instead of recomputing them.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 256, max_disk_entries: int = 1024):
+        """
+        Args:
+            cache_dir (str, optional): Directory for persisted results (memory only if None).
+            max_entries (int): Maximum results kept in memory.
+            max_disk_entries (int): Maximum results kept on disk.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self._memory: "OrderedDict[str, Frame]" = OrderedDict()
+        self._lineage: Dict[str, Dict[str, Any]] = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def compute(self, func: Callable[..., Frame], data: Frame, lookback: Optional[int] = None, **params: Any) -> Frame:
+        """
+        Return ``func(data, **params)``, reusing or extending a cached result when possible.
+        Args:
+            func (Callable): Feature function taking the data as first argument.
+            data (pd.Series | pd.DataFrame): Date-indexed input.
+            lookback (int, optional): Rows of history each output row depends on; enables
+                incremental extension. None means the result is recomputed on any change.
+            **params: Keyword arguments forwarded to ``func``.
+        Returns:
+            pd.Series | pd.DataFrame: Feature values aligned with ``data``.
+        """
+        func_id = func_identity(func)
+        param_key = repr(sorted(params.items()))
+        date_range = (data.index[0], data.index[-1]) if len(data) else (None, None)
+        data_fp = fingerprint(data)
+        key = fingerprint(func_id, param_key, data_fp, date_range)
+
+        cached = self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached.copy()
+
+        self.misses += 1
+        lineage_key = fingerprint(func_id, param_key, self._lineage_id(data))
+        result = None
+        if lookback is not None:
+            result = self._extend(lineage_key, func, data, lookback, params)
+        if result is None:
+            result = func(data, **params)
+        self._put(key, result)
+        if lookback is not None:
+            self._lineage[lineage_key] = {'key': key, 'length': len(data), 'fingerprint': data_fp}
+        return result.copy()
+
+    def log_returns(self, series: pd.Series) -> pd.Series:
+        """Memoized log returns of a price series."""
+        return self.compute(_log_returns, series, lookback=1)
+
+    def rolling_mean(self, series: pd.Series, window: int) -> pd.Series:
+        """Memoized rolling mean."""
+        return self.compute(_rolling_mean, series, lookback=window - 1, window=window)
+
+    def rolling_std(self, series: pd.Series, window: int) -> pd.Series:
+        """Memoized rolling standard deviation."""
+        return self.compute(_rolling_std, series, lookback=window - 1, window=window)
+
+    def bollinger_bands(self, series: pd.Series, window: int = 20, num_std: float = 2.0) -> pd.DataFrame:
+        """
+        Bollinger Bands built from the shared rolling mean/std intermediates.
+        Args:
+            series (pd.Series): Price series.
+            window (int): Rolling window size.
+            num_std (float): Number of standard deviations.
+        Returns:
+            pd.DataFrame: DataFrame with columns 'Middle', 'Upper', 'Lower'.
+        """
+        middle = self.rolling_mean(series, window)
+        std = self.rolling_std(series, window)
+        return pd.DataFrame({'Middle': middle, 'Upper': middle + num_std * std, 'Lower': middle - num_std * std})
+
+    def clear(self) -> None:
+        """Drop in-memory results (disk entries are kept)."""
+        self._memory.clear()
+        self._lineage.clear()
+
+    def _extend(self, lineage_key: str, func: Callable[..., Frame], data: Frame, lookback: int,
+                params: Dict[str, Any]) -> Optional[Frame]:
+        prior = self._lineage.get(lineage_key)
+        if prior is None or prior['length'] >= len(data):
+            return None
+        old_len = prior['length']
+        if fingerprint(data.iloc[:old_len]) != prior['fingerprint']:
+            return None
+        cached = self._get(prior['key'])
+        if cached is None:
+            return None
+        start = max(old_len - lookback, 0)
+        tail = func(data.iloc[start:], **params)
+        self.extensions += 1
+        return pd.concat([cached, tail.iloc[old_len - start:]])
+
+    def _get(self, key: str) -> Optional[Frame]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        path = self._path(key)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(path)
+            self._remember(key, result)
+            return result
+        return None
+
+    def _put(self, key: str, result: Frame) -> None:
+        self._remember(key, result)
+        path = self._path(key)
+        if path:
+            with open(path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._evict_disk()
+
+    def _remember(self, key: str, result: Frame) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.pkl')]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            os.remove(entry.path)
+
+    def _path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f'{key}.pkl') if self.cache_dir else None
+
+    @staticmethod
+    def _lineage_id(data: Frame) -> Any:
+        columns = list(data.columns) if isinstance(data, pd.DataFrame) else data.name
+        return (columns, data.index[0] if len(data) else None)
+
+
+def _log_returns(series: pd.Series) -> pd.Series:
+    return np.log(series / series.shift(1))
+
+
+def _rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    return series.rolling(window).mean()
+
+
+def _rolling_std(series: pd.Series, window: int) -> pd.Series:
+    return series.rolling(window).std()
@@ -1,5 +1,10 @@
+import logging
 import pandas as pd
 import numpy as np
+from typing import Sequence, Tuple
+from src.data.panel import panel_to_wide
+
+logger = logging.getLogger(__name__)
 
 def parkinson_volatility(df: pd.DataFrame, high_col: str = 'High', low_col: str = 'Low', window: int = 21) -> pd.Series:
     """
@@ -16,8 +21,8 @@ def parkinson_volatility(df: pd.DataFrame, high_col: str = 'High', low_col: str
         rs = (np.log(df[high_col] / df[low_col])) ** 2
         parkinson = rs.rolling(window).mean() * (1 / (4 * np.log(2)))
         return np.sqrt(parkinson)
-    except Exception as e:
-        print(f"Error in Parkinson volatility calculation: {e}")
+    except Exception:
+        logger.exception("Error in Parkinson volatility calculation")
         return pd.Series(index=df.index, dtype=float)
 
 def garman_klass_volatility(df: pd.DataFrame, open_col: str = 'Open', high_col: str = 'High', low_col: str = 'Low', close_col: str = 'Close', window: int = 21) -> pd.Series:
@@ -39,6 +44,140 @@ def garman_klass_volatility(df: pd.DataFrame, open_col: str = 'Open', high_col:
         gk = 0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2
         gk_rolling = gk.rolling(window).mean()
         return np.sqrt(gk_rolling)
-    except Exception as e:
-        print(f"Error in Garman-Klass volatility calculation: {e}")
-        return pd.Series(index=df.index, dtype=float) 
\ No newline at end of file
+    except Exception:
+        logger.exception("Error in Garman-Klass volatility calculation")
+        return pd.Series(index=df.index, dtype=float) 
+
+VOL_ESTIMATORS = ('close_to_close', 'ewma', 'parkinson', 'garman_klass', 'rogers_satchell', 'yang_zhang')
+
+def realized_volatility_suite(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                              windows: Sequence[int] = (5, 21, 63, 252),
+                              estimators: Sequence[str] = VOL_ESTIMATORS) -> np.ndarray:
+    """
+    Compute several realized volatility estimators over several windows in one pass.
+
+    The log-ratio terms are computed once; each estimator's rolling means for every window
+    come from differences of a single cumulative sum. Inputs may be 1-D (one asset) or
+    2-D (dates x tickers). Values are per-period (not annualized), NaN until a window has
+    no missing inputs. 'ewma' uses ``span=window`` on squared log returns.
+    Args:
+        open_ (np.ndarray): Open prices, shape (T,) or (T, N).
+        high (np.ndarray): High prices.
+        low (np.ndarray): Low prices.
+        close (np.ndarray): Close prices.
+        windows (Sequence[int]): Rolling window sizes (in days), each at least 2.
+        estimators (Sequence[str]): Estimators from ``VOL_ESTIMATORS``.
+    Returns:
+        np.ndarray: Volatilities of shape (T, W, E) or (T, N, W, E).
+    """
+    unknown = set(estimators) - set(VOL_ESTIMATORS)
+    if unknown:
+        raise ValueError(f"Unknown volatility estimators: {sorted(unknown)}")
+    # Sample variances (and the Yang-Zhang weight) divide by window - 1
+    too_short = [w for w in windows if w < 2]
+    if too_short:
+        raise ValueError(f"Volatility windows must be at least 2, got {too_short}.")
+    o, h, l, c = (np.log(np.asarray(x, dtype=np.float64)) for x in (open_, high, low, close))
+    windows = list(windows)
+    prev_c = np.concatenate([np.full_like(c[:1], np.nan), c[:-1]])
+    ret = c - prev_c
+    out = np.full(c.shape + (len(windows), len(estimators)), np.nan)
+
+    for j, name in enumerate(estimators):
+        if name == 'close_to_close':
+            var = _rolling_var_multi(ret, windows)
+        elif name == 'ewma':
+            r2 = pd.DataFrame(ret.reshape(len(ret), -1) ** 2)
+            var = np.stack([r2.ewm(span=w, adjust=False, min_periods=w).mean().to_numpy().reshape(ret.shape)
+                            for w in windows], axis=-1)
+        elif name == 'parkinson':
+            var = _rolling_mean_multi((h - l) ** 2, windows) / (4 * np.log(2))
+        elif name == 'garman_klass':
+            var = _rolling_mean_multi(0.5 * (h - l) ** 2 - (2 * np.log(2) - 1) * (c - o) ** 2, windows)
+        elif name == 'rogers_satchell':
+            var = _rolling_mean_multi(_rs_term(o, h, l, c), windows)
+        else:
+            w_arr = np.asarray(windows, dtype=np.float64)
+            k = 0.34 / (1.34 + (w_arr + 1) / (w_arr - 1))
+            var = (_rolling_var_multi(o - prev_c, windows) + k * _rolling_var_multi(c - o, windows)
+                   + (1 - k) * _rolling_mean_multi(_rs_term(o, h, l, c), windows))
+        out[..., j] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+def volatility_suite_panel(panel: pd.DataFrame, windows: Sequence[int] = (5, 21, 63, 252),
+                           estimators: Sequence[str] = VOL_ESTIMATORS) -> Tuple[np.ndarray, pd.DatetimeIndex, list]:
+    """
+    Run ``realized_volatility_suite`` over every ticker of a long OHLC panel (compact or not).
+    Args:
+        panel (pd.DataFrame): Long panel with Date, Ticker, Open, High, Low, Close columns.
+        windows (Sequence[int]): Rolling window sizes (in days).
+        estimators (Sequence[str]): Estimators from ``VOL_ESTIMATORS``.
+    Returns:
+        Tuple[np.ndarray, pd.DatetimeIndex, list]: (T, N, W, E) volatilities, dates and tickers.
+    """
+    wide = {col: panel_to_wide(panel, col) for col in ('Open', 'High', 'Low', 'Close')}
+    close = wide['Close']
+    arrays = [wide[col].reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+              for col in ('Open', 'High', 'Low', 'Close')]
+    return realized_volatility_suite(*arrays, windows=windows, estimators=estimators), close.index, list(close.columns)
+
+def rogers_satchell_volatility(df: pd.DataFrame, open_col: str = 'Open', high_col: str = 'High', low_col: str = 'Low', close_col: str = 'Close', window: int = 21) -> pd.Series:
+    """
+    Calculate the Rogers-Satchell realized volatility estimator (drift-independent).
+    Args:
+        df (pd.DataFrame): DataFrame with open, high, low, close price columns.
+        window (int): Rolling window size (in days).
+    Returns:
+        pd.Series: Rogers-Satchell volatility estimate.
+    """
+    try:
+        vol = realized_volatility_suite(df[open_col], df[high_col], df[low_col], df[close_col], (window,), ('rogers_satchell',))
+        return pd.Series(vol[:, 0, 0], index=df.index)
+    except Exception:
+        logger.exception("Error in Rogers-Satchell volatility calculation")
+        return pd.Series(index=df.index, dtype=float)
+
+def yang_zhang_volatility(df: pd.DataFrame, open_col: str = 'Open', high_col: str = 'High', low_col: str = 'Low', close_col: str = 'Close', window: int = 21) -> pd.Series:
+    """
+    Calculate the Yang-Zhang realized volatility estimator (overnight + open-to-close + Rogers-Satchell).
+    Args:
+        df (pd.DataFrame): DataFrame with open, high, low, close price columns.
+        window (int): Rolling window size (in days).
+    Returns:
+        pd.Series: Yang-Zhang volatility estimate.
+    """
+    try:
+        vol = realized_volatility_suite(df[open_col], df[high_col], df[low_col], df[close_col], (window,), ('yang_zhang',))
+        return pd.Series(vol[:, 0, 0], index=df.index)
+    except Exception:
+        logger.exception("Error in Yang-Zhang volatility calculation")
+        return pd.Series(index=df.index, dtype=float)
+
+def _rs_term(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    return (h - c) * (h - o) + (l - c) * (l - o)
+
+def _window_sums(x: np.ndarray, windows: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling sums and valid counts for every window from one cumulative sum along axis 0."""
+    valid = np.isfinite(x)
+    zero = np.zeros_like(x[:1])
+    cs = np.concatenate([zero, np.cumsum(np.where(valid, x, 0.0), axis=0)])
+    cn = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    sums = np.full(x.shape + (len(windows),), np.nan)
+    counts = np.zeros(x.shape + (len(windows),))
+    for i, w in enumerate(windows):
+        if w <= len(x):
+            sums[w - 1:, ..., i] = cs[w:] - cs[:-w]
+            counts[w - 1:, ..., i] = cn[w:] - cn[:-w]
+    return sums, counts
+
+def _rolling_mean_multi(x: np.ndarray, windows: Sequence[int]) -> np.ndarray:
+    sums, counts = _window_sums(x, windows)
+    w = np.asarray(windows, dtype=np.float64)
+    return np.where(counts == w, sums / w, np.nan)
+
+def _rolling_var_multi(x: np.ndarray, windows: Sequence[int]) -> np.ndarray:
+    sums, counts = _window_sums(x, windows)
+    sq, _ = _window_sums(x * x, windows)
+    w = np.asarray(windows, dtype=np.float64)
+    var = (sq - sums ** 2 / w) / (w - 1)
+    return np.where(counts == w, var, np.nan)
@@ -0,0 +1,35 @@
+"""
+Risk models.
+
+The model backends are slow to import (torch and pytorch_lightning for ``VolatilityForecaster``,
+scikit-learn for ``EnsembleModel``/``RiskFactorModel``, scipy for ``TailRiskModel`` and
+``PortfolioOptimizer``), so nothing here is imported up front: the classes are resolved on
+first attribute access, and scikit-learn/scipy are imported inside the methods that use them.
+Importing the package, or the API that sits next to it, therefore only costs numpy/pandas.
+"""
+import importlib
+
+_EXPORTS = {
+    'VolatilityForecaster': 'src.models.volatility_forecaster',
+    'EnsembleModel': 'src.models.ensemble_model',
+    'RegimeDetector': 'src.models.regime_detector',
+    'RiskFactorModel': 'src.models.risk_factor_model',
+    'TailRiskModel': 'src.models.tail_risk_model',
+    'FactorCovariance': 'src.models.portfolio_optimizer',
+    'PortfolioOptimizer': 'src.models.portfolio_optimizer',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
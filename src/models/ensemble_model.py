@@ -1,25 +1,28 @@
+import logging
 from typing import Any, Optional
 import numpy as np
-from sklearn.ensemble import StackingRegressor
-from sklearn.linear_model import LinearRegression
+
+logger = logging.getLogger(__name__)
 
 class EnsembleModel:
     """
     Stacking/blending multiple models with uncertainty quantification.
     """
     def __init__(self, base_models: Optional[list] = None):
+        from sklearn.linear_model import LinearRegression
         self.base_models = base_models or []
         self.meta_model = LinearRegression()
         self.ensemble = None
 
     def fit(self, X: np.ndarray, y: np.ndarray):
         """Fit the ensemble model."""
+        from sklearn.ensemble import StackingRegressor
         try:
             estimators = [(f"model_{i}", m) for i, m in enumerate(self.base_models)]
             self.ensemble = StackingRegressor(estimators=estimators, final_estimator=self.meta_model)
             self.ensemble.fit(X, y)
-        except Exception as e:
-            print(f"Error fitting ensemble: {e}")
+        except Exception:
+            logger.exception("Error fitting ensemble")
             raise
 
     def predict(self, X: np.ndarray) -> np.ndarray:
@@ -28,6 +31,6 @@ class EnsembleModel:
             raise ValueError("Ensemble not fitted.")
         try:
             return self.ensemble.predict(X)
-        except Exception as e:
-            print(f"Error in ensemble prediction: {e}")
+        except Exception:
+            logger.exception("Error in ensemble prediction")
             raise 
\ No newline at end of file
@@ -0,0 +1,301 @@
+from typing import Callable, Optional, Sequence
+import numpy as np
+import pandas as pd
+from src.models.risk_factor_model import RiskFactorModel
+from src.monitoring.instrumentation import timed
+
+METHODS = ('min_variance', 'mean_variance', 'risk_parity', 'min_cvar')
+
+
+class FactorCovariance:
+    """
+    Factor-structured covariance Sigma = B diag(f) B' + diag(d) that is never formed densely.
+
+    Products cost O(M K) and solves use the Woodbury identity with a K x K system, so
+    thousands of assets stay cheap in time and memory.
+    """
+    def __init__(self, loadings: np.ndarray, factor_variance: np.ndarray, specific_variance: np.ndarray):
+        self.loadings = np.asarray(loadings, dtype=np.float64)
+        self.factor_variance = np.asarray(factor_variance, dtype=np.float64)
+        self.specific_variance = np.asarray(specific_variance, dtype=np.float64)
+        self._capacitance = None
+        self._max_eigenvalue = None
+
+    @classmethod
+    def from_risk_model(cls, model: RiskFactorModel) -> 'FactorCovariance':
+        """Build from a fitted ``RiskFactorModel``."""
+        return cls(*model.covariance_factors())
+
+    @property
+    def n_assets(self) -> int:
+        return len(self.specific_variance)
+
+    def dot(self, w: np.ndarray) -> np.ndarray:
+        """Sigma @ w for a vector (M,) or matrix (M, k)."""
+        scale = self.factor_variance if w.ndim == 1 else self.factor_variance[:, None]
+        d = self.specific_variance if w.ndim == 1 else self.specific_variance[:, None]
+        return self.loadings @ (scale * (self.loadings.T @ w)) + d * w
+
+    def variance(self, w: np.ndarray) -> float:
+        """Portfolio variance w' Sigma w."""
+        exposure = self.loadings.T @ w
+        return float(exposure @ (self.factor_variance * exposure) + w @ (self.specific_variance * w))
+
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        """Sigma^{-1} @ b via Woodbury: D^-1 b - D^-1 B (F^-1 + B' D^-1 B)^-1 B' D^-1 b."""
+        if self._capacitance is None:
+            scaled = self.loadings / self.specific_variance[:, None]
+            self._capacitance = np.diag(1.0 / self.factor_variance) + self.loadings.T @ scaled
+        d_inv_b = b / (self.specific_variance if b.ndim == 1 else self.specific_variance[:, None])
+        return d_inv_b - (self.loadings @ np.linalg.solve(self._capacitance, self.loadings.T @ d_inv_b)) / (
+            self.specific_variance if b.ndim == 1 else self.specific_variance[:, None])
+
+    def risk_contributions(self, w: np.ndarray) -> np.ndarray:
+        """Fraction of portfolio variance contributed by each asset."""
+        contributions = w * self.dot(w)
+        return contributions / contributions.sum()
+
+    def max_eigenvalue(self, n_iter: int = 50) -> float:
+        """Largest eigenvalue by power iteration (Lipschitz constant of the variance gradient)."""
+        if self._max_eigenvalue is None:
+            v = np.random.default_rng(0).normal(size=self.n_assets)
+            eig = 0.0
+            for _ in range(n_iter):
+                v = self.dot(v)
+                eig = np.linalg.norm(v)
+                v /= eig
+            # Power iteration approaches from below; pad so 1/L stays a safe step size
+            self._max_eigenvalue = 1.05 * eig
+        return self._max_eigenvalue
+
+
+class PortfolioOptimizer:
+    """
+    Turns risk model outputs into target weights.
+
+    Methods: 'min_variance', 'mean_variance' (max mu'w - risk_aversion/2 w'Sigma w),
+    'risk_parity' (equal or given risk budgets) and 'min_cvar' (Rockafellar-Uryasev LP over
+    return scenarios). Covariance-based methods use a ``FactorCovariance``; weights always
+    sum to one. Variance problems are solved in closed form on the factor structure, with a
+    primal active-set loop for ``long_only``/``max_weight`` bounds (accelerated projected
+    gradient as a fallback), and risk parity by L-BFGS-B on the log-barrier formulation.
+    Risk parity is long-only; with ``max_weight`` its solution is projected onto the capped
+    simplex, so capped assets carry less than their risk budget.
+    The previous solution is kept and used as the starting point of the next solve, so
+    successive rebalances converge in a few steps ('min_cvar' is an LP solved from scratch).
+    """
+    def __init__(self, method: str = 'min_variance', long_only: bool = True, max_weight: Optional[float] = None,
+                 risk_aversion: float = 1.0, cvar_level: float = 0.95, risk_budgets: Optional[np.ndarray] = None,
+                 tol: float = 1e-10, max_iter: int = 5_000):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if method == 'risk_parity' and not long_only:
+            raise ValueError("risk_parity is long-only.")
+        self.method = method
+        self.long_only = long_only
+        self.max_weight = max_weight
+        self.risk_aversion = risk_aversion
+        self.cvar_level = cvar_level
+        self.risk_budgets = risk_budgets
+        self.tol = tol
+        self.max_iter = max_iter
+        self.weights = None
+        self.n_iter = 0
+
+    @timed('optimizer.optimize')
+    def optimize(self, cov: Optional[FactorCovariance] = None, expected_returns: Optional[np.ndarray] = None,
+                 scenarios: Optional[np.ndarray] = None, assets: Optional[Sequence[str]] = None) -> pd.Series:
+        """
+        Solve for target weights, warm-started from the previous solution when the universe matches.
+        Args:
+            cov (FactorCovariance, optional): Covariance (all methods except 'min_cvar').
+            expected_returns (np.ndarray, optional): Expected returns (M,) for 'mean_variance'.
+            scenarios (np.ndarray, optional): Return scenarios (T x M) for 'min_cvar'.
+            assets (Sequence[str], optional): Asset names for the result index.
+        Returns:
+            pd.Series: Weights per asset.
+        """
+        n = cov.n_assets if cov is not None else np.shape(scenarios)[1]
+        lower, upper = self._bounds(n)
+        start = self._start(n)
+        if self.method == 'min_cvar':
+            if scenarios is None:
+                raise ValueError("min_cvar requires return scenarios.")
+            w = self._min_cvar(np.asarray(scenarios, dtype=np.float64), lower, upper)
+        elif cov is None:
+            raise ValueError(f"{self.method} requires a covariance.")
+        elif self.method == 'risk_parity':
+            w = self._risk_parity(cov, start)
+            if w.max() > upper:
+                w = _project(w, lower, upper)
+        else:
+            mu = np.zeros(n) if self.method == 'min_variance' else np.asarray(expected_returns, dtype=np.float64)
+            if self.method == 'mean_variance' and expected_returns is None:
+                raise ValueError("mean_variance requires expected returns.")
+            w = self._quadratic(cov, mu, lower, upper, start)
+        self.weights = w
+        return pd.Series(w, index=list(assets) if assets is not None else None, name='weight')
+
+    def rebalance(self, returns: pd.DataFrame, lookback: int = 252, every: int = 21, n_factors: int = 5,
+                  expected_returns_fn: Optional[Callable[[pd.DataFrame], np.ndarray]] = None) -> pd.DataFrame:
+        """
+        Target weights over time, re-optimized every ``every`` rows on the trailing ``lookback`` returns.
+
+        Weights computed at a date use data up to that date and, as ``BacktestEngine`` holds the
+        previous row's weights, are traded from the next period on. The result can be passed
+        directly as signals: ``BacktestEngine().run(prices, weights)``.
+        Args:
+            returns (pd.DataFrame): Asset returns (index: date, columns: assets).
+            lookback (int): Estimation window length.
+            every (int): Rows between rebalances.
+            n_factors (int): Factors of the ``RiskFactorModel`` covariance.
+            expected_returns_fn (Callable, optional): Expected returns from the window for
+                'mean_variance' (default: window mean).
+        Returns:
+            pd.DataFrame: Weights per date and asset (zero before the first rebalance).
+        """
+        weights = np.full(returns.shape, np.nan)
+        values = returns.to_numpy(dtype=np.float64)
+        for end in range(lookback, len(returns) + 1, every):
+            window = values[end - lookback:end]
+            cov = None
+            if self.method != 'min_cvar':
+                model = RiskFactorModel(n_factors=min(n_factors, window.shape[1], lookback - 1))
+                model.fit(window)
+                cov = FactorCovariance.from_risk_model(model)
+            mu = None
+            if self.method == 'mean_variance':
+                mu = expected_returns_fn(returns.iloc[end - lookback:end]) if expected_returns_fn else window.mean(axis=0)
+            weights[end - 1] = self.optimize(cov, expected_returns=mu, scenarios=window).to_numpy()
+        return pd.DataFrame(weights, index=returns.index, columns=returns.columns).ffill().fillna(0.0)
+
+    def _bounds(self, n: int) -> tuple:
+        lower = 0.0 if self.long_only else -np.inf
+        upper = self.max_weight if self.max_weight is not None else np.inf
+        if upper * n < 1:
+            raise ValueError(f"max_weight {upper} cannot sum to one over {n} assets.")
+        return lower, upper
+
+    def _start(self, n: int) -> np.ndarray:
+        if self.weights is not None and len(self.weights) == n:
+            return self.weights.copy()
+        return np.full(n, 1.0 / n)
+
+    def _quadratic(self, cov: FactorCovariance, mu: np.ndarray, lower: float, upper: float, start: np.ndarray) -> np.ndarray:
+        """min lambda/2 w'Sigma w - mu'w subject to 1'w = 1 and lower <= w <= upper."""
+        lam = self.risk_aversion
+        inv = cov.solve(np.column_stack([np.ones(cov.n_assets), mu]))
+        gamma = (inv[:, 1].sum() - lam) / inv[:, 0].sum()
+        unconstrained = (inv[:, 1] - gamma * inv[:, 0]) / lam
+        self.n_iter = 0
+        if np.all(unconstrained >= lower) and np.all(unconstrained <= upper):
+            return unconstrained
+        if self.weights is None or len(self.weights) != cov.n_assets:
+            # Cold start: the projected unconstrained optimum already pins most bound assets
+            start = unconstrained
+        # Primal active set: each pass solves the budget-constrained problem on the free assets
+        # in closed form (Woodbury on the factor structure restricted to them), then either
+        # steps towards it until a bound blocks or releases a pinned asset whose multiplier
+        # has the wrong sign. Starting from the previous solution, an unchanged or slightly
+        # changed problem resolves in a pass or two.
+        w = _project(start, lower, upper)
+        at_lower = (w <= lower + 1e-12) if np.isfinite(lower) else np.zeros(len(w), dtype=bool)
+        at_upper = (w >= upper - 1e-12) if np.isfinite(upper) else np.zeros(len(w), dtype=bool)
+        for self.n_iter in range(1, self.max_iter + 1):
+            free = ~(at_lower | at_upper)
+            target = np.where(at_lower, lower, 0.0) + np.where(at_upper, upper, 0.0)
+            gamma = 0.0
+            if free.any():
+                sub = FactorCovariance(cov.loadings[free], cov.factor_variance, cov.specific_variance[free])
+                inv = sub.solve(np.column_stack([np.ones(free.sum()), mu[free] - lam * cov.dot(target)[free]]))
+                gamma = (inv[:, 1].sum() - lam * (1 - target.sum())) / inv[:, 0].sum()
+                target[free] = (inv[:, 1] - gamma * inv[:, 0]) / lam
+            direction = target - w
+            with np.errstate(divide='ignore', invalid='ignore'):
+                to_lower = np.where(free & (direction < 0), (lower - w) / direction, np.inf)
+                to_upper = np.where(free & (direction > 0), (upper - w) / direction, np.inf)
+            blocking = np.minimum(to_lower, to_upper)
+            step = blocking.min()
+            if step < 1:
+                w = w + max(step, 0.0) * direction
+                hit = blocking <= step + 1e-12
+                at_lower |= hit & (to_lower <= to_upper)
+                at_upper |= hit & (to_upper < to_lower)
+                continue
+            w = target
+            grad = lam * cov.dot(w) - mu
+            if not free.any():
+                gamma = -np.median(grad)
+            grad += gamma
+            slack = 1e-9 * (np.abs(grad - gamma).max() + 1e-300)
+            violation = np.where(at_lower, -grad, 0.0) + np.where(at_upper, grad, 0.0)
+            worst = int(np.argmax(violation))
+            if violation[worst] <= slack:
+                return w
+            at_lower[worst] = at_upper[worst] = False
+        return self._projected_gradient(cov, mu, lower, upper, w)
+
+    def _projected_gradient(self, cov: FactorCovariance, mu: np.ndarray, lower: float, upper: float,
+                            start: np.ndarray) -> np.ndarray:
+        """FISTA over the capped simplex; fallback when the active-set iteration does not settle."""
+        lam = self.risk_aversion
+        step = 1.0 / (lam * cov.max_eigenvalue())
+        w = _project(start, lower, upper)
+        y, t = w.copy(), 1.0
+        for self.n_iter in range(1, self.max_iter + 1):
+            w_next = _project(y - step * (lam * cov.dot(y) - mu), lower, upper)
+            if np.max(np.abs(w_next - w)) < self.tol:
+                return w_next
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = w_next + (t - 1) / t_next * (w_next - w)
+            w, t = w_next, t_next
+        return w
+
+    def _risk_parity(self, cov: FactorCovariance, start: np.ndarray) -> np.ndarray:
+        from scipy.optimize import minimize
+        n = cov.n_assets
+        budgets = np.full(n, 1.0 / n) if self.risk_budgets is None else np.asarray(self.risk_budgets, dtype=np.float64)
+        budgets = budgets / budgets.sum()
+        # min 1/2 y'Sigma y - b'log(y); at the optimum y'Sigma y = 1, so scale the warm start accordingly
+        x0 = np.maximum(start, 1e-8)
+        x0 = x0 / np.sqrt(cov.variance(x0))
+
+        def objective(y):
+            sigma_y = cov.dot(y)
+            return 0.5 * y @ sigma_y - budgets @ np.log(y), sigma_y - budgets / y
+
+        res = minimize(objective, x0, jac=True, method='L-BFGS-B', bounds=[(1e-12, None)] * n,
+                       options={'maxiter': self.max_iter, 'ftol': self.tol, 'gtol': 1e-12})
+        self.n_iter = res.nit
+        return res.x / res.x.sum()
+
+    def _min_cvar(self, scenarios: np.ndarray, lower: float, upper: float) -> np.ndarray:
+        from scipy import sparse
+        from scipy.optimize import linprog
+        t, n = scenarios.shape
+        # Variables [w (n), alpha, u (t)]: min alpha + sum(u) / ((1 - beta) t), u >= -R w - alpha, u >= 0
+        c = np.concatenate([np.zeros(n), [1.0], np.full(t, 1.0 / ((1 - self.cvar_level) * t))])
+        a_ub = sparse.hstack([sparse.csr_matrix(-scenarios), -np.ones((t, 1)), -sparse.identity(t)], format='csr')
+        a_eq = np.concatenate([np.ones(n), [0.0], np.zeros(t)])[None, :]
+        bounds = [(None if np.isinf(lower) else lower, None if np.isinf(upper) else upper)] * n
+        bounds += [(None, None)] + [(0, None)] * t
+        res = linprog(c, A_ub=a_ub, b_ub=np.zeros(t), A_eq=a_eq, b_eq=[1.0], bounds=bounds, method='highs')
+        if not res.success:
+            raise ValueError(f"CVaR optimization failed: {res.message}")
+        self.n_iter = int(getattr(res, 'nit', 0))
+        return res.x[:n]
+
+
+def _project(v: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """Euclidean projection onto {w : sum(w) = 1, lower <= w <= upper} by bisection on the shift."""
+    if np.isinf(lower) and np.isinf(upper):
+        return v + (1 - v.sum()) / len(v)
+    lo = v.min() - (upper if np.isfinite(upper) else 1.0) - 1.0
+    hi = v.max() - (lower if np.isfinite(lower) else -1.0) + 1.0
+    for _ in range(100):
+        tau = 0.5 * (lo + hi)
+        if np.clip(v - tau, lower, upper).sum() > 1:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(v - 0.5 * (lo + hi), lower, upper)
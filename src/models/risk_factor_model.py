@@ -1,27 +1,48 @@
-from typing import Any, Optional
+import logging
+from typing import Any, Optional, Tuple
 import numpy as np
-from sklearn.decomposition import PCA
+
+logger = logging.getLogger(__name__)
 
 class RiskFactorModel:
     """
     PCA/Factor analysis for systematic risk decomposition.
     """
     def __init__(self, n_factors: int = 3):
+        from sklearn.decomposition import PCA
         self.n_factors = n_factors
         self.pca = PCA(n_components=n_factors)
+        self.asset_variance = None
 
     def fit(self, X: np.ndarray):
         """Fit the PCA model to the data."""
         try:
             self.pca.fit(X)
-        except Exception as e:
-            print(f"Error fitting PCA: {e}")
+            self.asset_variance = np.asarray(X, dtype=np.float64).var(axis=0, ddof=1)
+        except Exception:
+            logger.exception("Error fitting PCA")
             raise
 
     def transform(self, X: np.ndarray) -> np.ndarray:
         """Transform data using the fitted PCA model."""
         try:
             return self.pca.transform(X)
-        except Exception as e:
-            print(f"Error transforming with PCA: {e}")
-            raise 
\ No newline at end of file
+        except Exception:
+            logger.exception("Error transforming with PCA")
+            raise
+
+    def covariance_factors(self, min_specific: float = 1e-10) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Factor-structured covariance of the fitted data, Sigma = B diag(f) B' + diag(d).
+        Args:
+            min_specific (float): Floor for the specific (idiosyncratic) variances.
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Loadings B (M x K), factor variances f (K,)
+                and specific variances d (M,).
+        """
+        if self.asset_variance is None:
+            raise ValueError("Model not fitted.")
+        loadings = self.pca.components_.T
+        factor_variance = self.pca.explained_variance_
+        specific = self.asset_variance - (loadings ** 2) @ factor_variance
+        return loadings, factor_variance, np.maximum(specific, min_specific)
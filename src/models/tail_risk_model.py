@@ -1,30 +1,45 @@
+import logging
 from typing import Any, Optional
 import numpy as np
-from scipy.stats import genpareto
+
+logger = logging.getLogger(__name__)
 # from arch.univariate import ConstantMean, GARCH, Normal  # Uncomment for full implementation
 
 class TailRiskModel:
     """
     Extreme Value Theory for VaR/CVaR calculation.
+
+    With ``warm_start=True`` a refit starts the GPD likelihood optimization from the
+    previously fitted shape and scale, which converges faster when the sample only grew a little
+    (e.g. successive walk-forward folds).
     """
-    def __init__(self, threshold_quantile: float = 0.95):
+    def __init__(self, threshold_quantile: float = 0.95, warm_start: bool = False):
         self.threshold_quantile = threshold_quantile
+        self.warm_start = warm_start
         self.gpd_params = None
 
     def fit(self, returns: np.ndarray):
         """Fit GPD to the tail of the returns distribution."""
+        from scipy.stats import genpareto
         try:
             threshold = np.quantile(returns, self.threshold_quantile)
             excess = returns[returns > threshold] - threshold
-            self.gpd_params = genpareto.fit(excess)
-        except Exception as e:
-            print(f"Error fitting GPD: {e}")
+            if self.warm_start and self.gpd_params is not None:
+                # Shape and scale seed the optimizer; the location keeps its default guess,
+                # since starting from the previous one can drift to a degenerate fit
+                c, _, scale = self.gpd_params
+                self.gpd_params = genpareto.fit(excess, c, scale=scale)
+            else:
+                self.gpd_params = genpareto.fit(excess)
+        except Exception:
+            logger.exception("Error fitting GPD")
             raise
 
     def var(self, alpha: float = 0.99) -> float:
         """Calculate Value at Risk (VaR) at given alpha."""
         if self.gpd_params is None:
             raise ValueError("Model not fitted.")
+        from scipy.stats import genpareto
         c, loc, scale = self.gpd_params
         return genpareto.ppf(alpha, c, loc=loc, scale=scale)
 
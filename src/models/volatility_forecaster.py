@@ -1,6 +1,8 @@
 import torch
 import torch.nn as nn
+import numpy as np
 import pytorch_lightning as pl
+from torch.utils.data import DataLoader, TensorDataset
 from typing import Any, Optional
 
 class VolatilityForecaster(pl.LightningModule):
@@ -27,4 +29,26 @@ class VolatilityForecaster(pl.LightningModule):
         return loss
 
     def configure_optimizers(self):
-        return torch.optim.Adam(self.parameters(), lr=self.lr) 
\ No newline at end of file
+        return torch.optim.Adam(self.parameters(), lr=self.lr)
+
+    def fit(self, X: np.ndarray, y: np.ndarray, max_epochs: int = 10, batch_size: int = 64):
+        """
+        Train on sequences X (n, seq_len, input_size) and targets y (n,) with a Lightning Trainer.
+        Training continues from the current weights, so calling it again warm-starts.
+        """
+        dataset = TensorDataset(torch.as_tensor(np.asarray(X), dtype=torch.float32),
+                                torch.as_tensor(np.asarray(y), dtype=torch.float32).reshape(-1, 1))
+        trainer = pl.Trainer(max_epochs=max_epochs, logger=False, enable_checkpointing=False,
+                             enable_progress_bar=False, enable_model_summary=False)
+        trainer.fit(self, DataLoader(dataset, batch_size=batch_size, shuffle=True))
+        return self
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray, max_epochs: int = 2, batch_size: int = 64):
+        """Update the fitted weights with new observations only (used by walk-forward evaluation)."""
+        return self.fit(X, y, max_epochs=max_epochs, batch_size=batch_size)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Forecast for sequences X (n, seq_len, input_size)."""
+        self.eval()
+        with torch.no_grad():
+            return self(torch.as_tensor(np.asarray(X), dtype=torch.float32)).numpy().ravel()
@@ -0,0 +1,362 @@
+"""
+Lightweight instrumentation for the API and engine hot paths.
+
+- ``span(name)`` / ``timed(name)`` time a stage into the ``risk_stage_seconds`` histogram and,
+  inside a request opened with ``start_request``, into that request's stage list (served as a
+  ``Server-Timing`` header by the API).
+- ``Counter``, ``Gauge`` and ``Histogram`` live in a ``Registry`` rendered in the Prometheus
+  text exposition format (``REGISTRY.render()``, served on ``/metrics``).
+- ``SamplingProfiler`` samples Python stacks from a background thread into collapsed stacks
+  (flamegraph.pl / speedscope input); the API runs it per request on demand.
+- ``configure_logging`` sets up text or JSON log records for the service.
+
+Instrumentation is on unless RISK_INSTRUMENTATION=0. When off, ``span`` returns a shared
+no-op context manager and ``timed`` functions call straight through, so the cost is one
+global lookup per call. Spans recorded in process-pool workers only reach the worker's own
+registry; the parent sees the enclosing span around the offloaded call.
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+ENABLED = os.getenv("RISK_INSTRUMENTATION", "1") != "0"
+
+# Seconds; spans cover sub-millisecond stages up to slow offloaded backtests
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn span timing on or off at runtime."""
+    global ENABLED
+    ENABLED = enabled
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, labels: Dict[str, Any]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}'] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        # Unlabelled metrics are exported from the start, labelled ones once a label set is seen
+        self._values: Dict[Tuple, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._labels(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items]
+
+
+class Gauge(Counter):
+    """Current value per label set."""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observations per label set."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label set -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._labels(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._labels(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = ('le', _format_value(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Named metrics rendered together in the Prometheus text format."""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}.")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram('risk_stage_seconds', 'Time spent in each instrumented stage.', ('stage',))
+
+# Stage timings of the current request; None outside a request
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_spans', default=None)
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, stage=self.name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((self.name, elapsed))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str):
+    """
+    Context manager timing a stage.
+    Args:
+        name (str): Stage name (the ``stage`` label).
+    Returns:
+        Context manager recording the stage's wall time on exit.
+    """
+    return _Span(name) if ENABLED else _NOOP
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of a function as stage ``name``."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_request():
+    """Open a per-request stage list in the current context; pass the token to ``end_request``."""
+    return _request_spans.set([])
+
+
+def end_request(token) -> List[Tuple[str, float]]:
+    """Close the request opened with ``token`` and return its (stage, seconds) spans in completion order."""
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing(spans: Sequence[Tuple[str, float]]) -> str:
+    """``Server-Timing`` header value (durations in milliseconds; repeated stages are summed)."""
+    totals: Dict[str, float] = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ', '.join(f'{name.replace(".", "_")};dur={seconds * 1e3:.3f}' for name, seconds in totals.items())
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a daemon thread samples the Python stacks of the process's other
+    threads every ``interval`` seconds and tallies them as collapsed stacks. Sampling is
+    process-wide, so work from concurrent requests shows up too.
+    """
+    def __init__(self, interval: float = 0.001, max_depth: int = 64):
+        """
+        Args:
+            interval (float): Seconds between samples.
+            max_depth (int): Frames kept per stack (innermost first are dropped beyond it).
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: _Tally = _Tally()
+        self.n_samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SamplingProfiler':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+            self.n_samples += 1
+
+    def collapsed(self) -> str:
+        """Samples as 'frame;frame;... count' lines, hottest first."""
+        return ''.join(f'{stack} {n}\n' for stack, n in self.samples.most_common())
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; ``extra`` fields are included as keys."""
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self._RESERVED})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """
+    Configure the root logger for the service, unless the host application already did.
+    Args:
+        level (str, optional): Log level (default RISK_LOG_LEVEL or 'INFO').
+        fmt (str, optional): 'json' or 'text' (default RISK_LOG_FORMAT or 'text').
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    if (fmt or os.getenv('RISK_LOG_FORMAT', 'text')) == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    root.addHandler(handler)
+    root.setLevel((level or os.getenv('RISK_LOG_LEVEL', 'INFO')).upper())
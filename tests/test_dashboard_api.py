@@ -1,6 +1,15 @@
+import asyncio
+import time
+import json
+import io
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
+from src.api import main
 from src.api.main import app
+from src.api.executor import ExecutionLayer, JobTimeout, Saturated
+from src.api.cache import ResultCache
+from src.backtesting.incremental import IncrementalBacktest
 
 client = TestClient(app)
 
@@ -24,6 +33,9 @@ def test_risk_assessment_api(sample_data):
     assert isinstance(data["sharpe_ratio"], float)
     assert isinstance(data["portfolio_value"], list)
     assert len(data["portfolio_value"]) == len(sample_data["prices"])
+    assert data["metrics"]["max_drawdown"] == pytest.approx(data["max_drawdown"])
+    assert data["metrics"]["sharpe_ratio"] == pytest.approx(data["sharpe_ratio"])
+    assert {"omega_ratio", "ulcer_index", "var_95", "cvar_99"} <= set(data["metrics"])
 
 def test_backtest_api(sample_data):
     resp = client.post("/backtest", json=sample_data)
@@ -35,4 +47,347 @@ def test_backtest_api(sample_data):
     assert isinstance(data["max_drawdown"], float)
     assert isinstance(data["sharpe_ratio"], float)
     assert isinstance(data["portfolio_value"], list)
-    assert len(data["portfolio_value"]) == len(sample_data["prices"]) 
\ No newline at end of file
+    assert len(data["portfolio_value"]) == len(sample_data["prices"]) 
+
+def _npy_body(sample_data):
+    buf = io.BytesIO()
+    np.save(buf, np.array([sample_data["prices"], sample_data["signals"]], dtype=np.float64))
+    return buf.getvalue()
+
+def test_risk_bulk_npy_matches_json(sample_data):
+    expected = client.post("/risk", json=sample_data).json()
+    resp = client.post("/risk/bulk", content=_npy_body(sample_data), headers={"Content-Type": "application/x-npy"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["risk_score"] == pytest.approx(expected["risk_score"])
+    assert data["portfolio_value"] == pytest.approx(expected["portfolio_value"])
+
+def test_backtest_bulk_raw_binary_response(sample_data):
+    body = np.concatenate([sample_data["prices"], sample_data["signals"]]).astype("<f8").tobytes()
+    resp = client.post("/backtest/bulk?format=binary", content=body, headers={"Content-Type": "application/octet-stream"})
+    assert resp.status_code == 200
+    values = np.frombuffer(resp.content, dtype="<f8")
+    assert len(values) == len(sample_data["prices"])
+    assert float(resp.headers["X-Max-Drawdown"]) <= 0
+
+def test_risk_bulk_arrow_and_multipart(sample_data):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"price": sample_data["prices"], "signal": sample_data["signals"]})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    resp = client.post("/risk/bulk", content=sink.getvalue().to_pybytes(),
+                       headers={"Content-Type": "application/vnd.apache.arrow.stream",
+                                "Accept": "application/vnd.apache.arrow.stream"})
+    assert resp.status_code == 200
+    result = pa.ipc.open_stream(resp.content).read_all()
+    assert result.num_rows == len(sample_data["prices"])
+    assert "risk_score" in {k.decode() for k in result.schema.metadata}
+    pytest.importorskip("multipart")
+    files = {
+        "prices": ("prices.bin", np.asarray(sample_data["prices"], dtype="<f8").tobytes(), "application/octet-stream"),
+        "signals": ("signals.bin", np.asarray(sample_data["signals"], dtype="<f8").tobytes(), "application/octet-stream"),
+    }
+    assert client.post("/risk/bulk", files=files).status_code == 200
+
+def test_risk_bulk_rejects_malformed_payloads():
+    pa = pytest.importorskip("pyarrow")
+    npy = io.BytesIO()
+    np.save(npy, np.ones((2, 100)))
+    truncated = client.post("/risk/bulk", content=npy.getvalue()[:-80], headers={"Content-Type": "application/x-npy"})
+    assert truncated.status_code == 400
+    garbage = client.post("/risk/bulk", content=b"not an arrow stream", headers={"Content-Type": "application/vnd.apache.arrow.stream"})
+    assert garbage.status_code == 400
+    strings = pa.table({"price": ["a", "b"], "signal": [1.0, 1.0]})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, strings.schema) as writer:
+        writer.write_table(strings)
+    assert client.post("/risk/bulk", content=sink.getvalue().to_pybytes(),
+                       headers={"Content-Type": "application/vnd.apache.arrow.stream"}).status_code == 400
+    pytest.importorskip("multipart")
+    form_fields = client.post("/risk/bulk", data={"prices": "1,2,3", "signals": "1,1,1"},
+                              files={"note": ("note.txt", b"", "text/plain")})
+    assert form_fields.status_code == 400 and "file upload" in form_fields.json()["detail"]
+
+def test_risk_bulk_validates_series_and_emits_strict_json():
+    raw = {"Content-Type": "application/octet-stream"}
+    assert client.post("/risk/bulk", content=b"", headers=raw).status_code == 422
+    for prices in ([100.0, np.nan], [100.0, 0.0], [100.0, np.inf]):
+        body = np.array(prices + [1.0, 1.0], dtype="<f8").tobytes()
+        assert client.post("/risk/bulk", content=body, headers=raw).status_code == 422
+    single = client.post("/risk/bulk", content=np.array([100.0, 1.0], dtype="<f8").tobytes(), headers=raw)
+    assert single.status_code == 200 and "NaN" not in single.text
+    assert json.loads(single.text, parse_constant=lambda c: pytest.fail(c))["sharpe_ratio"] is None
+
+def test_risk_bulk_downsample_and_errors():
+    prices = 100 * np.exp(np.cumsum(np.random.randn(5_000) * 0.01))
+    signals = np.ones_like(prices)
+    body = np.concatenate([prices, signals]).astype("<f8").tobytes()
+    data = client.post("/risk/bulk?max_points=200", content=body, headers={"Content-Type": "application/octet-stream"}).json()
+    assert len(data["portfolio_value"]) <= 200
+    assert data["portfolio_index"][0] == 0 and data["portfolio_index"][-1] == 4_999
+    assert client.post("/risk/bulk", content=b"\x00" * 12, headers={"Content-Type": "application/octet-stream"}).status_code == 400
+    assert client.post("/risk/bulk", content=b"{}", headers={"Content-Type": "text/plain"}).status_code == 415
+
+def test_risk_batch_matches_single(sample_data):
+    other = {"prices": [100, 98, 97, 99, 101, 100], "signals": [1, 1, 1, 0, -1, -1]}
+    batch = {"portfolios": [dict(sample_data, id="a"), dict(other, id="b"), sample_data]}
+    resp = client.post("/risk/batch", json=batch)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["id"] for r in results] == ["a", "b", "2"]
+    for row, single in zip(results, [sample_data, other, sample_data]):
+        expected = client.post("/risk", json=single).json()
+        assert row["risk_score"] == pytest.approx(expected["risk_score"])
+        assert row["max_drawdown"] == pytest.approx(expected["max_drawdown"])
+        assert row["sharpe_ratio"] == pytest.approx(expected["sharpe_ratio"])
+        for key in ("sortino_ratio", "calmar_ratio"):
+            assert key in row
+
+def test_backtest_batch_ndjson_stream(sample_data):
+    batch = {"portfolios": [sample_data] * 5, "include_curves": True}
+    resp = client.post("/backtest/batch?stream=true", json=batch)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(rows) == 5
+    assert "risk_score" not in rows[0]
+    assert len(rows[0]["portfolio_value"]) == len(sample_data["prices"])
+    assert client.post("/backtest/batch", json={"portfolios": [{"prices": [1, 2], "signals": [1]}]}).status_code == 400
+
+def test_single_price_returns_null_metrics(monkeypatch):
+    monkeypatch.setattr(main, "cache", ResultCache())
+    for path in ("/risk", "/backtest"):
+        resp = client.post(path, json={"prices": [100.0], "signals": [1]})
+        assert resp.status_code == 200
+        assert resp.json()["sharpe_ratio"] is None and resp.json()["portfolio_value"] == [1_000_000.0]
+
+def test_risk_rejects_empty_or_mismatched_series():
+    assert client.post("/risk", json={"prices": [], "signals": []}).status_code == 422
+    assert client.post("/backtest", json={"prices": [100.0, 101.0], "signals": [1]}).status_code == 422
+    job = client.post("/jobs", json={"kind": "risk", "payload": {"prices": [], "signals": []}})
+    assert job.status_code == 422
+
+def test_streamed_batch_goes_through_execution_layer(sample_data, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CHUNK", 2)
+    resp = client.post("/risk/batch?stream=true", json={"portfolios": [sample_data] * 5})
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == ["0", "1", "2", "3", "4"]
+    monkeypatch.setattr(main, "executor", ExecutionLayer(max_pending=0, inline_max_points=0))
+    resp = client.post("/risk/batch?stream=true", json={"portfolios": [sample_data] * 5})
+    assert resp.status_code == 429
+
+def test_risk_rejects_when_saturated(sample_data, monkeypatch):
+    monkeypatch.setattr(main, "executor", ExecutionLayer(max_pending=0, inline_max_points=0))
+    monkeypatch.setattr(main, "cache", ResultCache())
+    resp = client.post("/risk", json=sample_data)
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "1"
+
+def test_execution_layer_offload_and_timeout():
+    layer = ExecutionLayer(max_workers=1, max_pending=1, inline_max_points=0, timeout=0.5)
+    async def scenario():
+        value = await layer.run(abs, -3, size=10)
+        with pytest.raises(JobTimeout):
+            await layer.run(time.sleep, 2, size=10)
+        # The timed-out call still occupies the worker, so it keeps its slot until it finishes
+        assert layer.pending == 1
+        with pytest.raises(Saturated):
+            await layer.run(abs, -1, size=10)
+        return value
+    try:
+        assert asyncio.run(scenario()) == 3
+        for _ in range(100):
+            if layer.pending == 0:
+                break
+            time.sleep(0.05)
+        assert layer.pending == 0
+    finally:
+        layer.shutdown()
+
+def test_execution_layer_bounds_inline_calls():
+    layer = ExecutionLayer(max_pending=1, inline_max_points=100, timeout=0.5)
+    async def scenario():
+        # Inline calls run off the event loop
+        ticks = []
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        await asyncio.gather(layer.run(time.sleep, 0.3, size=1), ticker())
+        assert ticks[-1] - ticks[0] < 0.2
+        # ...but share the admission limit and the timeout of the pool path
+        with pytest.raises(JobTimeout):
+            await layer.run(time.sleep, 0.8, size=1)
+        assert layer.pending == 1
+        with pytest.raises(Saturated):
+            await layer.run(abs, -1, size=1)
+        await asyncio.sleep(0.8)
+        assert layer.pending == 0
+        return await layer.run(abs, -2, size=1)
+    assert asyncio.run(scenario()) == 2
+
+def test_async_job_roundtrip(sample_data, monkeypatch):
+    layer = ExecutionLayer(max_workers=1)
+    monkeypatch.setattr(main, "executor", layer)
+    try:
+        resp = client.post("/jobs", json={"kind": "risk", "payload": sample_data})
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+        for _ in range(600):
+            result = client.get(f"/jobs/{job_id}/result")
+            if result.status_code != 202:
+                break
+            time.sleep(0.1)
+        assert result.status_code == 200
+        assert result.json()["risk_score"] == pytest.approx(client.post("/risk", json=sample_data).json()["risk_score"])
+        assert client.get(f"/jobs/{job_id}").json()["status"] == "done"
+        assert client.get("/jobs/missing").status_code == 404
+    finally:
+        layer.shutdown()
+
+def test_result_cache_hits_and_prefix_reuse(monkeypatch):
+    monkeypatch.setattr(main, "cache", ResultCache())
+    rng = np.random.default_rng(3)
+    prices = (100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))).tolist()
+    signals = rng.integers(-1, 2, 300).tolist()
+    first = client.post("/risk", json={"prices": prices[:250], "signals": signals[:250]}).json()
+    again = client.post("/backtest", json={"prices": prices[:250], "signals": signals[:250]}).json()
+    assert again["portfolio_value"] == first["portfolio_value"]
+    extended = client.post("/risk", json={"prices": prices, "signals": signals}).json()
+    stats = client.get("/cache/stats").json()
+    assert stats["hits"] == 1 and stats["prefix_hits"] == 1 and stats["entries"] == 2
+    monkeypatch.setattr(main, "cache", ResultCache())
+    full = client.post("/risk", json={"prices": prices, "signals": signals}).json()
+    assert extended["portfolio_value"] == pytest.approx(full["portfolio_value"], rel=1e-12)
+    for key in ("risk_score", "max_drawdown", "sharpe_ratio"):
+        assert extended[key] == pytest.approx(full[key], rel=1e-9)
+
+def test_result_cache_bounds_and_disk_tier(tmp_path):
+    cache = ResultCache(max_entries=2, ttl=0, cache_dir=str(tmp_path))
+    params = (1_000_000, 0.001)
+    for i in range(3):
+        prices = np.arange(1.0, 11.0) + i
+        signals = np.ones(10)
+        result = {"max_drawdown": 0.0, "portfolio_value": np.ones(10)}
+        cache.put(cache.key(prices, signals, params), prices, signals, params, result, IncrementalBacktest())
+    assert cache.snapshot()["entries"] == 2 and cache.stats["evictions"] == 1
+    evicted = cache.key(np.arange(1.0, 11.0), np.ones(10), params)
+    assert cache.get(evicted) is not None
+    assert cache.stats["disk_hits"] == 1
+    bounded = ResultCache(ttl=0, cache_dir=str(tmp_path / "bounded"), max_disk_entries=2)
+    for i in range(4):
+        prices = np.arange(1.0, 11.0) + i
+        bounded.put(bounded.key(prices, np.ones(10), params), prices, np.ones(10), params,
+                    {"portfolio_value": np.ones(10)}, IncrementalBacktest())
+    assert len(list((tmp_path / "bounded").glob("*.pkl"))) == 2
+
+def test_websocket_risk_stream(sample_data):
+    expected = client.post("/risk", json=sample_data).json()
+    with client.websocket_connect("/ws/risk") as ws:
+        for price, signal in zip(sample_data["prices"][:4], sample_data["signals"][:4]):
+            ws.send_json({"price": price, "signal": signal})
+            update = ws.receive_json()
+        assert update["n"] == 4
+        ws.send_json({"prices": sample_data["prices"][4:], "signals": sample_data["signals"][4:]})
+        update = ws.receive_json()
+        ws.send_json({"price": "bad"})
+        assert "error" in ws.receive_json()
+        ws.send_json({"price": 0, "signal": 1})
+        assert "error" in ws.receive_json()
+        ws.send_json({"prices": [101.0, -1.0], "signals": [1, 1]})
+        assert "error" in ws.receive_json()
+        ws.send_text("not json")
+        assert "error" in ws.receive_json()
+        ws.send_json({"price": 100.0, "signal": 0})
+        assert ws.receive_json()["n"] == len(sample_data["prices"]) + 1
+    assert update["n"] == len(sample_data["prices"])
+    assert update["portfolio_value"] == pytest.approx(expected["portfolio_value"][-1])
+    assert update["max_drawdown"] == pytest.approx(expected["max_drawdown"])
+    assert update["sharpe_ratio"] == pytest.approx(expected["sharpe_ratio"])
+    assert update["risk_score"] == pytest.approx(expected["risk_score"])
+
+def test_risk_bulk_lttb_segment():
+    prices = 100 + np.cumsum(np.random.randn(20_000)) * 0.1 + 50
+    body = np.concatenate([prices, np.ones_like(prices)]).astype("<f8").tobytes()
+    headers = {"Content-Type": "application/octet-stream"}
+    full = client.post("/risk/bulk", content=body, headers=headers).json()
+    overview = client.post("/risk/bulk?max_points=500&downsample=lttb", content=body, headers=headers).json()
+    assert len(overview["portfolio_value"]) == 500
+    assert overview["max_drawdown"] == full["max_drawdown"]
+    segment = client.post("/risk/bulk?start=1000&end=1200", content=body, headers=headers).json()
+    assert segment["portfolio_index"] == list(range(1000, 1200))
+    assert segment["portfolio_value"] == pytest.approx(full["portfolio_value"][1000:1200])
+    zoomed = client.post("/risk/bulk?start=5000&end=15000&max_points=300&downsample=lttb", content=body, headers=headers).json()
+    assert zoomed["portfolio_index"][0] == 5000 and zoomed["portfolio_index"][-1] == 14_999
+    assert client.post("/risk/bulk?downsample=bogus", content=body, headers=headers).status_code == 400
+
+def test_metrics_server_timing_and_profiles(sample_data, monkeypatch):
+    from src.monitoring import instrumentation
+    monkeypatch.setattr(main, "cache", ResultCache())
+    monkeypatch.setattr(main, "PROFILING", True)
+    resp = client.post("/risk", json=sample_data, headers={"X-Profile": "1"})
+    stages = [part.split(";")[0] for part in resp.headers["Server-Timing"].split(", ")]
+    assert {"parse", "cache", "compute", "backtest_run", "report", "serialize", "total"} <= set(stages)
+    profile = client.get(f"/debug/profiles/{resp.headers['X-Profile-Id']}")
+    assert profile.status_code == 200 and profile.headers["content-type"].startswith("text/plain")
+    assert client.get("/debug/profiles/unknown").status_code == 404
+
+    text = client.get("/metrics").text
+    assert '# TYPE risk_api_requests_total counter' in text
+    assert 'risk_api_requests_total{method="POST",route="/risk",status="200"}' in text
+    assert 'risk_stage_seconds_bucket{stage="backtest.run",le="+Inf"}' in text
+    assert 'risk_api_cache_lookups_total{outcome="miss"}' in text
+    assert 'risk_api_cache{stat="entries"} 1' in text
+
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    count = instrumentation.STAGE_SECONDS.count(stage="backtest.run")
+    resp = client.post("/risk", json={"prices": [1.0, 2.0, 3.0], "signals": [1, 0, 1]})
+    assert resp.status_code == 200 and "Server-Timing" not in resp.headers
+    assert instrumentation.STAGE_SECONDS.count(stage="backtest.run") == count
+
+def test_unhandled_errors_are_counted(sample_data, monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(main, "_cached_backtest", broken)
+    before = main.REQUESTS.value(method="POST", route="/backtest", status=500)
+    observed = main.LATENCY.count(method="POST", route="/backtest")
+    resp = TestClient(app, raise_server_exceptions=False).post("/backtest", json=sample_data)
+    assert resp.status_code == 500
+    assert main.REQUESTS.value(method="POST", route="/backtest", status=500) == before + 1
+    assert main.LATENCY.count(method="POST", route="/backtest") == observed + 1
+
+def test_api_import_skips_heavy_backends():
+    import subprocess
+    import sys
+    from src.api.service import HEAVY_MODULES
+    code = ("import json, sys\n"
+            "import src.api.main, src.models, src.data.collectors, src.backtesting.hedge, src.models.ensemble_model\n"
+            "import src.models.portfolio_optimizer, src.models.risk_factor_model, src.models.tail_risk_model\n"
+            f"loaded = sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)\n"
+            "src.models.TailRiskModel().fit(__import__('numpy').random.default_rng(0).standard_t(4, 500))\n"
+            "print(json.dumps([loaded, 'scipy' in sys.modules]))\n")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    loaded, scipy_after_use = json.loads(out.stdout.strip().splitlines()[-1])
+    assert loaded == [] and scipy_after_use
+
+def test_warm_up_targets():
+    from src.api.service import warm_up
+    timings = warm_up(("backtest", "models"))
+    assert set(timings) == {"backtest", "models"} and all(t >= 0 for t in timings.values())
+    with pytest.raises(ValueError):
+        warm_up(("bogus",))
+    layer = ExecutionLayer(max_workers=1, timeout=0.5)
+    try:
+        with pytest.raises(TimeoutError):
+            layer.warm_up(time.sleep, 5)
+    finally:
+        layer.shutdown()
+
+def test_lifespan_runs_configured_warm_up(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "warm_up", lambda targets: calls.append(("service", list(targets))) or {})
+    monkeypatch.setattr(main.executor, "warm_up", lambda func: calls.append(("pool", func)))
+    monkeypatch.setenv("RISK_API_WARMUP", "backtest, pool")
+    with TestClient(app) as warmed:
+        assert calls == [("service", ["backtest"]), ("pool", main.warm_up)]
+        assert warmed.get("/health").status_code == 200
@@ -1,23 +1,32 @@
 import pytest
 from src.data.collectors import YahooFinanceCollector, FREDCollector, VIXCollector, SentimentCollector
+from src.data.panel import compact_panel, expand_panel, panel_to_wide
+from src.data.store import PriceStore
+from src.data.alignment import align_point_in_time
 import pandas as pd
 import os
-from src.features.volatility import parkinson_volatility, garman_klass_volatility
+from src.features.volatility import parkinson_volatility, garman_klass_volatility, rogers_satchell_volatility, yang_zhang_volatility, realized_volatility_suite, volatility_suite_panel
 from src.features.correlations import rolling_correlation
 from src.features.indicators import rsi, macd, bollinger_bands
 from src.features.fractal_hurst import fractal_dimension, hurst_exponent
 from src.features.regime import regime_indicator
+from src.features.store import FeatureStore
 import numpy as np
 from src.models.volatility_forecaster import VolatilityForecaster
 from src.models.regime_detector import RegimeDetector
 from src.models.risk_factor_model import RiskFactorModel
+from src.models.portfolio_optimizer import FactorCovariance, PortfolioOptimizer
 from src.models.tail_risk_model import TailRiskModel
 from src.models.ensemble_model import EnsembleModel
 import torch
 from src.backtesting.engine import BacktestEngine
 from src.backtesting.hedge import dynamic_hedge_ratio
 from src.backtesting.stress import stress_test
-from src.backtesting.metrics import sortino_ratio, calmar_ratio
+from src.backtesting.metrics import sortino_ratio, calmar_ratio, risk_report
+from src.backtesting.batch import run_batch_backtest, batch_metrics
+from src.backtesting.walk_forward import WalkForward, factor_exposures, var_forecast, walk_forward_splits
+from src.backtesting.costs import BorrowCost, CommissionSchedule, CostModel, FlatCost, SpreadCost, SquareRootImpact, capacity_curve, evaluate_costs
+from src.backtesting.incremental import IncrementalBacktest
 
 @pytest.mark.parametrize("collector_class, args", [
     (YahooFinanceCollector, {"tickers": ["AAPL"], "start": "2020-01-01", "end": "2020-12-31"}),
@@ -44,6 +53,18 @@ def test_yahoo_finance_fetch_and_validate():
     assert isinstance(df, pd.DataFrame)
     assert collector.validate_data(df)
 
+def test_validation_logs_and_json_formatter(caplog):
+    import json
+    import logging
+    from src.monitoring.instrumentation import JsonFormatter
+    with caplog.at_level(logging.WARNING, logger="src.data.collectors"):
+        assert not YahooFinanceCollector().validate_data(pd.DataFrame({"Date": []}))
+    record = caplog.records[-1]
+    assert record.levelname == "WARNING" and "Missing required columns" in record.getMessage()
+    entry = json.loads(JsonFormatter().format(logging.makeLogRecord({"name": "src.api", "msg": "done %s", "args": (1,),
+                                                                     "levelname": "INFO", "route": "/risk"})))
+    assert entry["message"] == "done 1" and entry["route"] == "/risk" and entry["logger"] == "src.api"
+
 def test_fred_fetch_and_validate():
     api_key = os.getenv("FRED_API_KEY")
     if not api_key:
@@ -217,4 +238,387 @@ def test_sortino_calmar():
     sortino = sortino_ratio(returns)
     calmar = calmar_ratio(returns, mdd)
     assert isinstance(sortino, float)
-    assert isinstance(calmar, float) 
\ No newline at end of file
+    assert isinstance(calmar, float)
+
+def _long_panel(n_dates=50, tickers=('AAPL', 'MSFT', 'SPY')):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2020-01-01', periods=n_dates)
+    rows = []
+    for t in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_dates)))
+        rows.append(pd.DataFrame({
+            'Date': dates, 'Ticker': t,
+            'Open': close * 0.995, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(1_000, 1_000_000, n_dates).astype(float),
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+def test_compact_panel_roundtrip():
+    df = _long_panel()
+    exact = compact_panel(df, exact=True)
+    pd.testing.assert_frame_equal(expand_panel(exact), df, check_dtype=False)
+    compact = compact_panel(df)
+    assert compact['Close'].dtype == np.float32
+    assert compact['Date'].dtype == np.int32
+    assert compact['Volume'].dtype == np.int64
+    as_object = df.astype({'Ticker': object})
+    assert compact_panel(as_object).memory_usage(deep=True).sum() * 3 < as_object.memory_usage(deep=True).sum()
+    np.testing.assert_allclose(expand_panel(compact)['Close'], df['Close'], rtol=1e-6)
+
+def test_compact_panel_precision_check():
+    df = _long_panel()
+    compact = compact_panel(df, rtol=0.0)
+    assert compact['Close'].dtype == np.float64
+
+def test_compact_panel_features_and_backtest():
+    compact = compact_panel(_long_panel())
+    vol = parkinson_volatility(compact[compact['Ticker'] == 'AAPL'], window=5)
+    assert len(vol) == 50
+    wide = panel_to_wide(compact, 'Close')
+    assert list(wide.columns) == ['AAPL', 'MSFT', 'SPY']
+    signals = pd.Series(1, index=wide.index)
+    results = BacktestEngine().run(wide[['AAPL']], signals)
+    assert results['portfolio_value'].dtype == np.float64
+
+def test_price_store_zero_copy(tmp_path):
+    store = PriceStore.write(compact_panel(_long_panel()), str(tmp_path / 'prices'))
+    reopened = PriceStore(str(tmp_path / 'prices'))
+    assert reopened.tickers == ['AAPL', 'MSFT', 'SPY']
+    close = reopened.frame('Close', ['MSFT'], start='2020-01-10')
+    assert np.shares_memory(close.to_numpy(), reopened.array('Close'))
+    assert len(close) == 41
+    ohlcv = reopened.ohlcv('AAPL')
+    assert len(garman_klass_volatility(ohlcv, window=5)) == 50
+    results = BacktestEngine().run(close, pd.Series(1, index=close.index))
+    assert len(results) == 41
+    model = RiskFactorModel(n_factors=2)
+    model.fit(np.diff(np.log(store.array('Close')), axis=0))
+    assert model.transform(np.diff(np.log(store.array('Close')), axis=0)).shape == (49, 2)
+
+def test_align_point_in_time(tmp_path):
+    panel = _long_panel(10)
+    macro = pd.DataFrame({'Date': pd.date_range('2019-12-31', periods=4, freq='3D'), 'DGS10': [1.0, 2.0, 3.0, 4.0]})
+    vix = pd.DataFrame({'Date': pd.date_range('2020-01-01', periods=10), 'Close': np.arange(10.0), 'Symbol': 'VIX'})
+    aligned = align_point_in_time(panel, macro, vix, release_lags={'DGS10': 1}, cache_dir=str(tmp_path))
+    assert len(aligned) == len(panel)
+    assert aligned['Date'].is_monotonic_increasing
+    by_date = aligned.groupby('Date')[['DGS10', 'VIX']].first()
+    # 2020-01-03 print is released 2020-01-06 (next business day), never earlier
+    assert by_date.loc['2020-01-05', 'DGS10'] == 1.0
+    assert by_date.loc['2020-01-06', 'DGS10'] == 2.0
+    assert by_date.loc['2020-01-04', 'VIX'] == 3.0
+    assert len(list(tmp_path.glob('pit_*.pkl'))) == 1
+    compact = align_point_in_time(compact_panel(panel), macro, vix, release_lags={'DGS10': 1})
+    np.testing.assert_array_equal(compact['DGS10'].to_numpy(), aligned['DGS10'].to_numpy())
+
+def test_feature_store_memoizes_and_extends(tmp_path):
+    idx = pd.date_range('2020-01-01', periods=120)
+    s = pd.Series(100 + np.cumsum(np.random.randn(120)), index=idx, name='AAPL')
+    store = FeatureStore(cache_dir=str(tmp_path))
+    bands = store.bollinger_bands(s.iloc[:100])
+    pd.testing.assert_frame_equal(bands, bollinger_bands(s.iloc[:100]))
+    store.bollinger_bands(s.iloc[:100])
+    assert store.hits == 2
+    extended = store.bollinger_bands(s)
+    assert store.extensions == 2
+    pd.testing.assert_frame_equal(extended, bollinger_bands(s), check_exact=False)
+    fresh = FeatureStore(cache_dir=str(tmp_path))
+    fresh.compute(rsi, s, lookback=14, window=14)
+    fresh.compute(rsi, s, lookback=14, window=14)
+    assert fresh.misses == 1 and fresh.hits == 1
+    reopened = FeatureStore(cache_dir=str(tmp_path))
+    reopened.compute(rsi, s, window=14)
+    assert reopened.hits == 1
+    # Results are copies, and same-named lambdas/closures with different code or captures do not collide
+    shared = bollinger_bands(s, store=store)
+    shared['Upper'] *= 2
+    pd.testing.assert_frame_equal(bollinger_bands(s, store=store), bollinger_bands(s), check_exact=False)
+    double = lambda x: x * 2
+    triple = lambda x: x * 3
+    assert store.compute(triple, s).equals(s * 3) and store.compute(double, s).equals(s * 2)
+    scaled = [(lambda k: (lambda x: x * k))(k) for k in (4, 5)]
+    assert store.compute(scaled[0], s).equals(s * 4) and store.compute(scaled[1], s).equals(s * 5)
+
+def test_realized_volatility_suite():
+    df = _long_panel(300)
+    aapl = df[df['Ticker'] == 'AAPL'].reset_index(drop=True)
+    estimators = ('close_to_close', 'parkinson', 'garman_klass', 'rogers_satchell', 'yang_zhang', 'ewma')
+    vol = realized_volatility_suite(aapl['Open'], aapl['High'], aapl['Low'], aapl['Close'], windows=(5, 21), estimators=estimators)
+    assert vol.shape == (300, 2, 6)
+    with pytest.raises(ValueError):
+        realized_volatility_suite(aapl['Open'], aapl['High'], aapl['Low'], aapl['Close'], windows=(1, 21))
+    np.testing.assert_allclose(vol[:, 1, 1], parkinson_volatility(aapl, window=21), equal_nan=True)
+    np.testing.assert_allclose(vol[:, 0, 2], garman_klass_volatility(aapl, window=5), equal_nan=True)
+    np.testing.assert_allclose(vol[:, 1, 0], np.log(aapl['Close']).diff().rolling(21).std(), equal_nan=True)
+    assert np.isnan(vol[:21, 1, 4]).all() and not np.isnan(vol[21:, 1, 4]).any()
+    rs = rogers_satchell_volatility(aapl, window=21)
+    yz = yang_zhang_volatility(aapl, window=21)
+    np.testing.assert_allclose(rs, vol[:, 1, 3], equal_nan=True)
+    np.testing.assert_allclose(yz, vol[:, 1, 4], equal_nan=True)
+    panel_vol, dates, tickers = volatility_suite_panel(df, windows=(5, 21), estimators=estimators)
+    assert panel_vol.shape == (300, 3, 2, 6)
+    assert tickers == ['AAPL', 'MSFT', 'SPY']
+    np.testing.assert_allclose(panel_vol[:, 0], vol, equal_nan=True)
+
+def test_batch_backtest_matches_engine():
+    rng = np.random.default_rng(1)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (60, 4)), axis=0))
+    signals = rng.integers(-1, 2, (60, 4))
+    results = run_batch_backtest(prices, signals)
+    metrics = batch_metrics(results['strategy_returns'])
+    for j in range(4):
+        engine = BacktestEngine()
+        single = engine.run(pd.DataFrame({'A': prices[:, j]}), pd.Series(signals[:, j]))
+        np.testing.assert_allclose(results['portfolio_value'][:, j], single['portfolio_value'])
+        assert metrics['sharpe_ratio'][j] == pytest.approx(engine.sharpe_ratio())
+        assert metrics['max_drawdown'][j] == pytest.approx(engine.max_drawdown())
+        assert metrics['sortino_ratio'][j] == pytest.approx(sortino_ratio(single['strategy_returns']))
+        assert metrics['calmar_ratio'][j] == pytest.approx(calmar_ratio(single['strategy_returns'], engine.max_drawdown()))
+
+def test_risk_report_matches_reference_metrics():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0.0005, 0.01, (400, 3))
+    report = risk_report(returns, levels=(0.95, 0.99))
+    assert report['sharpe_ratio'].shape == (3,)
+    for j in range(3):
+        r = pd.Series(returns[:, j])
+        wealth = (1 + r).cumprod()
+        drawdown = wealth / wealth.cummax() - 1
+        single = risk_report(returns[:, j])
+        assert single['sharpe_ratio'] == pytest.approx(report['sharpe_ratio'][j])
+        assert single['max_drawdown'] == pytest.approx(drawdown.min())
+        assert single['sortino_ratio'] == pytest.approx(sortino_ratio(r))
+        assert single['calmar_ratio'] == pytest.approx(calmar_ratio(r, drawdown.min()))
+        assert single['skewness'] == pytest.approx(r.skew(), rel=0.02)
+        assert single['kurtosis'] == pytest.approx(r.kurt(), rel=0.05, abs=0.02)
+        assert single['var_95'] == pytest.approx(-r.quantile(0.05))
+        assert single['cvar_99'] == pytest.approx(-r.nsmallest(4).mean())
+        assert single['omega_ratio'] == pytest.approx(r.clip(lower=0).sum() / -r.clip(upper=0).sum())
+        assert single['ulcer_index'] == pytest.approx(np.sqrt((drawdown ** 2).mean()))
+        assert single['hit_rate'] == pytest.approx((r > 0).mean())
+        underwater = (drawdown < 0).astype(int)
+        runs = underwater.groupby((underwater == 0).cumsum()).sum()
+        assert single['max_drawdown_duration'] == runs.max()
+    empty = risk_report(np.array([]))
+    assert set(empty) == set(single) and all(np.isnan(v) for v in empty.values())
+    assert risk_report(np.empty((0, 3)))['sharpe_ratio'].shape == (3,)
+
+def test_cost_models_and_capacity_curve():
+    rng = np.random.default_rng(4)
+    assets = ['AAA', 'BBB', 'CCC']
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, (250, 3)), axis=0)), columns=assets)
+    volume = pd.DataFrame(rng.integers(100_000, 1_000_000, (250, 3)), columns=assets)
+    weights = pd.DataFrame(rng.normal(0, 0.3, (250, 3)), columns=assets)
+    signals = pd.Series(rng.integers(-1, 2, 250))
+    legacy = BacktestEngine().run(prices, signals)
+    modeled = BacktestEngine(cost_model=FlatCost(0.001)).run(prices, signals)
+    np.testing.assert_allclose(modeled['portfolio_value'], legacy['portfolio_value'])
+    impact = evaluate_costs(prices, weights, SquareRootImpact(max_impact=np.inf), [1e6, 4e6], volume)['costs']
+    np.testing.assert_allclose(impact[1, 3:], 2 * impact[0, 3:])
+    # Costs at t only depend on data before t; unknown liquidity is charged the cap
+    capped = SquareRootImpact(max_impact=0.05)
+    baseline = evaluate_costs(prices, weights, capped, 1e6, volume)['asset_costs'][0]
+    shocked_volume, shocked_prices = volume.astype(float), prices.copy()
+    shocked_volume.iloc[100:] = np.nan
+    shocked_prices.iloc[100:] *= 3
+    shocked = evaluate_costs(shocked_prices, weights, capped, 1e6, shocked_volume)['asset_costs'][0]
+    np.testing.assert_array_equal(shocked[:101], baseline[:101])
+    trades = np.abs(np.diff(weights.to_numpy(), axis=0))
+    np.testing.assert_allclose(baseline[1], 0.05 * trades[0])
+    assert np.isfinite(shocked).all() and np.all(shocked[130:] == pytest.approx(0.05 * trades[129:]))
+    class NoCost(CostModel):
+        pass
+    with pytest.raises(TypeError):
+        NoCost()
+    borrow = evaluate_costs(prices, weights.abs(), BorrowCost(), 1e6)['costs']
+    assert np.all(borrow == 0)
+    commission = CommissionSchedule(per_share={'AAA': 0.005, 'BBB': 0.01, 'CCC': 0.0}, minimum=1.0)
+    asset_costs = evaluate_costs(prices, weights, commission, 1e6)['asset_costs'][0]
+    assert np.all(asset_costs[1:, 2] == pytest.approx(1.0 / 1e6))
+    model = SpreadCost() + SquareRootImpact() + BorrowCost() + commission
+    curve = capacity_curve(prices, weights, [1e5, 1e7, 1e9], model, volume=volume, min_net_return=-np.inf)
+    assert curve['net_return'].is_monotonic_decreasing
+    np.testing.assert_allclose(curve['gross_return'] - curve['cost_drag'], curve['net_return'])
+    assert curve.attrs['capacity'] == 1e9
+    results = BacktestEngine(cost_model=model).run(prices, weights, volume=volume)
+    assert results['transaction_costs'].to_numpy() == pytest.approx(evaluate_costs(prices, weights, model, 1e6, volume)['costs'][0])
+
+def test_walk_forward_splits():
+    expanding = walk_forward_splits(100, train_size=40, test_size=20)
+    assert [(tr.start, tr.stop, te.start, te.stop) for tr, te in expanding] == [(0, 40, 40, 60), (0, 60, 60, 80), (0, 80, 80, 100)]
+    rolling = walk_forward_splits(100, train_size=40, test_size=25, expanding=False, gap=5)
+    assert [(tr.start, tr.stop, te.start, te.stop) for tr, te in rolling] == [(0, 40, 45, 70), (25, 65, 70, 95), (50, 90, 95, 100)]
+
+def test_walk_forward_caches_and_backtests(tmp_path):
+    from sklearn.linear_model import LinearRegression, SGDRegressor
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range('2020-01-01', periods=400)
+    X = pd.DataFrame(rng.normal(size=(400, 3)), index=index)
+    y = X.to_numpy() @ np.array([0.5, -0.2, 0.0]) + rng.normal(0, 0.1, 400)
+    wf = WalkForward(LinearRegression, n_jobs=2, cache_dir=str(tmp_path))
+    predictions = wf.run(X, y, train_size=200, test_size=50)
+    assert predictions.index.equals(index[200:])
+    assert not any(f['cached'] for f in wf.folds)
+    reference = LinearRegression().fit(X.iloc[:300], y[:300]).predict(X.iloc[300:350])
+    np.testing.assert_allclose(predictions.iloc[100:150], reference)
+    rerun = WalkForward(LinearRegression, cache_dir=str(tmp_path))
+    pd.testing.assert_series_equal(rerun.run(X, y, train_size=200, test_size=50), predictions)
+    assert all(f['cached'] for f in rerun.folds)
+    prices = pd.DataFrame({'A': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))}, index=index)
+    results = rerun.backtest(prices)
+    assert len(results) == 200 and results['signal'].isin([-1, 0, 1]).all()
+    incremental = WalkForward(SGDRegressor)
+    incremental.run(X, y, train_size=200, test_size=50)
+    assert incremental.folds[-1]['model'].t_ > incremental.folds[0]['model'].t_
+
+def test_walk_forward_warm_started_tail_model():
+    from functools import partial
+    returns = pd.Series(np.random.default_rng(6).standard_t(4, 1000) * 0.01)
+    warm_wf = WalkForward(partial(TailRiskModel, warm_start=True), predict_fn=var_forecast)
+    cold_wf = WalkForward(TailRiskModel, predict_fn=var_forecast)
+    warm = warm_wf.run(returns, train_size=500, test_size=100)
+    cold = cold_wf.run(returns, train_size=500, test_size=100)
+    assert len(warm) == len(cold) == 500
+    assert np.isfinite(warm).all() and (warm > 0).all()
+    assert warm.iloc[0] == cold.iloc[0]
+    # Later folds start from the previous solution; the fit must be as good as a cold refit
+    from scipy.stats import genpareto
+    for warm_fold, cold_fold in zip(warm_wf.folds, cold_wf.folds):
+        train = returns.iloc[slice(*warm_fold['train'])].to_numpy()
+        excess = train[train > np.quantile(train, 0.95)] - np.quantile(train, 0.95)
+        warm_nll = genpareto.nnlf(warm_fold['model'].gpd_params, excess)
+        cold_nll = genpareto.nnlf(cold_fold['model'].gpd_params, excess)
+        assert warm_nll <= cold_nll + 1e-3 * abs(cold_nll)
+
+def test_walk_forward_cache_key_covers_functions(tmp_path):
+    from functools import partial
+    returns = pd.Series(np.random.default_rng(8).standard_t(4, 600) * 0.01)
+    params = dict(train_size=400, test_size=100)
+    base = WalkForward(TailRiskModel, predict_fn=var_forecast, cache_dir=str(tmp_path)).run(returns, **params)
+    other_alpha = WalkForward(TailRiskModel, predict_fn=partial(var_forecast, alpha=0.9), cache_dir=str(tmp_path))
+    assert (other_alpha.run(returns, **params) < base).all() and not any(f['cached'] for f in other_alpha.folds)
+    for quantile in (0.95, 0.80):
+        lam = WalkForward(lambda: TailRiskModel(quantile), predict_fn=var_forecast, cache_dir=str(tmp_path))
+        lam.run(returns, **params)
+        assert not any(f['cached'] for f in lam.folds)
+    # partial factories key on their arguments, not their address
+    for expected in (False, True):
+        wf = WalkForward(partial(TailRiskModel, threshold_quantile=0.9), predict_fn=var_forecast, cache_dir=str(tmp_path))
+        wf.run(returns, **params)
+        assert all(f['cached'] == expected for f in wf.folds)
+    with pytest.raises(ValueError):
+        WalkForward(partial(TailRiskModel, threshold_quantile=object()), cache_dir=str(tmp_path))
+
+def test_walk_forward_factor_and_ensemble_models():
+    from functools import partial
+    from sklearn.linear_model import LinearRegression, Ridge
+    returns = _factor_returns(n_dates=300, n_assets=10)
+    factors = WalkForward(partial(RiskFactorModel, n_factors=2), predict_fn=factor_exposures, n_jobs=2)
+    scores = factors.run(returns, train_size=200, test_size=50)
+    reference = RiskFactorModel(n_factors=2)
+    reference.fit(returns[:250])
+    np.testing.assert_allclose(scores.iloc[50:].to_numpy(), reference.transform(returns[250:]))
+    X, y = returns[:, 1:], returns[:, 0]
+    ensemble = WalkForward(partial(EnsembleModel, [LinearRegression(), Ridge(alpha=1e-4)]), n_jobs=2)
+    predictions = ensemble.run(X, y, train_size=200, test_size=50)
+    assert len(predictions) == 100 and np.corrcoef(predictions, y[200:])[0, 1] > 0.5
+
+def _factor_returns(n_dates=300, n_assets=40, seed=7):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (n_dates, 3))
+    loadings = rng.normal(1, 0.5, (n_assets, 3))
+    return factors @ loadings.T + rng.normal(0, 0.01, (n_dates, n_assets)) + 0.0003
+
+def test_factor_covariance_woodbury():
+    model = RiskFactorModel(n_factors=4)
+    model.fit(_factor_returns())
+    cov = FactorCovariance.from_risk_model(model)
+    dense = cov.loadings @ np.diag(cov.factor_variance) @ cov.loadings.T + np.diag(cov.specific_variance)
+    np.testing.assert_allclose(np.diag(dense), model.asset_variance, rtol=1e-8)
+    b = np.random.default_rng(0).normal(size=cov.n_assets)
+    np.testing.assert_allclose(cov.dot(b), dense @ b)
+    np.testing.assert_allclose(cov.solve(b), np.linalg.solve(dense, b), rtol=1e-6)
+
+def test_portfolio_optimizer_methods():
+    from scipy.optimize import minimize
+    returns = _factor_returns()
+    model = RiskFactorModel(n_factors=4)
+    model.fit(returns)
+    cov = FactorCovariance.from_risk_model(model)
+    dense = cov.loadings @ np.diag(cov.factor_variance) @ cov.loadings.T + np.diag(cov.specific_variance)
+    n = cov.n_assets
+    unconstrained = PortfolioOptimizer('min_variance', long_only=False).optimize(cov).to_numpy()
+    expected = np.linalg.solve(dense, np.ones(n))
+    np.testing.assert_allclose(unconstrained, expected / expected.sum(), rtol=1e-6)
+    for optimizer in (PortfolioOptimizer('min_variance', max_weight=0.1), PortfolioOptimizer('mean_variance', risk_aversion=50)):
+        mu = returns.mean(axis=0)
+        w = optimizer.optimize(cov, expected_returns=mu).to_numpy()
+        lam, cap = optimizer.risk_aversion, optimizer.max_weight or 1.0
+        mu = mu if optimizer.method == 'mean_variance' else np.zeros(n)
+        reference = minimize(lambda x: lam / 2 * x @ dense @ x - mu @ x, np.full(n, 1 / n), jac=lambda x: lam * dense @ x - mu,
+                             bounds=[(0, cap)] * n, constraints=[{'type': 'eq', 'fun': lambda x: x.sum() - 1}],
+                             method='SLSQP', options={'ftol': 1e-15, 'maxiter': 1000})
+        assert w.sum() == pytest.approx(1.0) and w.min() >= 0 and w.max() <= cap + 1e-12
+        assert lam / 2 * w @ dense @ w - mu @ w <= reference.fun + 1e-9
+        optimizer.optimize(cov, expected_returns=returns.mean(axis=0))
+        assert optimizer.n_iter <= 1
+    parity = PortfolioOptimizer('risk_parity').optimize(cov).to_numpy()
+    np.testing.assert_allclose(cov.risk_contributions(parity), 1 / n, rtol=1e-3)
+    capped = PortfolioOptimizer('risk_parity', max_weight=0.03).optimize(cov).to_numpy()
+    assert parity.max() > 0.03 and capped.max() <= 0.03 + 1e-12
+    assert capped.sum() == pytest.approx(1.0) and capped.min() > 0
+    with pytest.raises(ValueError):
+        PortfolioOptimizer('risk_parity', long_only=False)
+    cvar = PortfolioOptimizer('min_cvar', cvar_level=0.95).optimize(scenarios=returns).to_numpy()
+    def historical_cvar(w):
+        losses = np.sort(-(returns @ w))[::-1]
+        return losses[:15].mean()
+    assert cvar.sum() == pytest.approx(1.0)
+    assert historical_cvar(cvar) <= historical_cvar(np.full(n, 1 / n))
+
+def test_optimizer_rebalance_feeds_backtest():
+    index = pd.bdate_range('2020-01-01', periods=400)
+    returns = pd.DataFrame(_factor_returns(400, 15), index=index, columns=[f'A{i}' for i in range(15)])
+    prices = 100 * (1 + returns).cumprod()
+    weights = PortfolioOptimizer('min_variance').rebalance(returns, lookback=200, every=20, n_factors=3)
+    assert (weights.iloc[:199] == 0).all().all()
+    np.testing.assert_allclose(weights.iloc[199:].sum(axis=1), 1.0)
+    results = BacktestEngine().run(prices, weights)
+    assert len(results) == 400 and results['portfolio_value'].notna().all()
+    assert results['turnover'].iloc[199] == pytest.approx(1.0)
+    assert (results['gross_returns'].iloc[:200] == 0).all()
+
+def test_incremental_backtest_matches_engine():
+    rng = np.random.default_rng(2)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+    signals = rng.integers(-1, 2, 200)
+    engine = BacktestEngine()
+    results = engine.run(pd.DataFrame({'A': prices}), pd.Series(signals))
+    state = IncrementalBacktest()
+    values = np.concatenate([state.extend(prices[:120], signals[:120]), state.extend(prices[120:], signals[120:])])
+    np.testing.assert_allclose(values, results['portfolio_value'], rtol=1e-12)
+    metrics = state.metrics()
+    assert metrics['max_drawdown'] == pytest.approx(engine.max_drawdown())
+    assert metrics['sharpe_ratio'] == pytest.approx(engine.sharpe_ratio())
+    resumed = IncrementalBacktest.from_results(engine.run(pd.DataFrame({'A': prices[:120]}), pd.Series(signals[:120])))
+    np.testing.assert_allclose(resumed.extend(prices[120:], signals[120:]), values[120:], rtol=1e-12)
+
+def test_benchmark_gate_flags_regressions():
+    from benchmarks import suite
+    result = suite.run_case('backtest_engine_run', 'small', repeat=2)
+    assert result['size'] == 1_000 and result['seconds'] > 0 and result['peak_mb'] > 0
+    # The gate compares medians against threshold + the case's noise floor (0.15 here)
+    base = {'size': 1_000, 'seconds': 0.09, 'median_seconds': 0.1, 'peak_mb': 1.0}
+    baseline = {'backtest_engine_run[small]': base}
+    within = dict(base, median_seconds=0.139, seconds=0.5)
+    assert suite.compare({'backtest_engine_run[small]': within}, baseline, threshold=0.25) == []
+    slower = dict(base, median_seconds=0.2, peak_mb=4.0)
+    failures = suite.compare({'backtest_engine_run[small]': slower}, baseline, threshold=0.25)
+    assert len(failures) == 2
+    # On a machine that runs the calibration 3x slower, a 2x slower median is not a regression
+    scaled = suite.compare({'backtest_engine_run[small]': dict(slower, peak_mb=1.0)}, baseline, speed_ratio=3.0)
+    assert scaled == []
+    from src.api import main
+    app_cache = main.cache
+    suite.run_case('risk_endpoint', 'small', repeat=1, profile_memory=False)
+    assert main.cache is app_cache